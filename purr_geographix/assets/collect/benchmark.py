@@ -0,0 +1,436 @@
+"""Ad hoc benchmarks run against a live repo (these are not part of the API)
+
+Run from the install location so the local SQLite repo list is found:
+
+    python -m purr_geographix.assets.collect.benchmark id_transfer COL_7159C5 survey
+
+The other benchmarks can record their chunk to a fixture (a pickle) on the
+first run and replay it later without a database:
+
+    python -m purr_geographix.assets.collect.benchmark standardize \\
+        COL_7159C5 vector_log --fixture C:/temp/vector_log_chunk.pkl
+"""
+
+import argparse
+import json
+import os
+import pickle
+import tempfile
+import time
+from functools import partial
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+
+import pandas as pd
+
+from purr_geographix.core.crud import get_repo_by_id
+from purr_geographix.core.database import get_db
+from purr_geographix.core.sqlanywhere import pooled_connection
+from purr_geographix.assets.collect.handle_query import (
+    fetch_id_list,
+    load_recipe,
+    transform_batch,
+)
+from purr_geographix.assets.collect.serializer import get_serializer, serializers
+from purr_geographix.assets.collect.compression import open_decompressed
+from purr_geographix.assets.collect.writers import (
+    doc_schema,
+    export_available,
+    export_ext,
+    open_writer,
+    pa,
+    pq,
+    writers,
+)
+from purr_geographix.assets.collect.sql_helper import (
+    chunk_ids,
+    create_selectors,
+    get_column_info,
+    load_id_table,
+    make_where_clause,
+)
+from purr_geographix.assets.collect.xformer import (
+    PURR_WHERE,
+    column_formatters,
+    formatters,
+    standardize_df_columns,
+)
+
+
+def repo_conn(repo_id: str) -> Dict[str, Any]:
+    """A repo's SQLAnywhere connection parameters, from the local repo list"""
+    db = next(get_db())
+    repo = get_repo_by_id(db, repo_id)
+    db.close()
+    if repo is None:
+        raise ValueError(f"unknown repo: {repo_id}")
+    return cast(Dict[str, Any], repo.conn)
+
+
+def bench_id_transfer(
+    repo_id: str,
+    asset: str,
+    uwi_list: Optional[List[str]] = None,
+    repeat: int = 3,
+) -> Dict[str, Dict[str, float]]:
+    """Compare the literal IN list and temp table id_transfer strategies.
+
+    Every chunk selector of the recipe is run with both strategies. The
+    "execute" time covers parse, optimize and open of the statement, "fetch"
+    covers pulling all rows and "load" is the temp table insert.
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype) to query from project database
+        uwi_list (Optional[List[str]]): optional uwi filter (see parse_uwis)
+        repeat (int): number of runs per strategy, the median is reported
+
+    Returns:
+        Dict[str, Dict[str, float]]: seconds per phase for each strategy
+    """
+    conn_params = repo_conn(repo_id)
+    recipe = load_recipe(asset)
+    where = make_where_clause(uwi_list or [])
+    ids = fetch_id_list(conn_params, recipe["identifier"].replace(PURR_WHERE, where))
+    chunked_ids = chunk_ids(ids, recipe.get("chunk_size", 1000))
+
+    results = {}
+    for strategy in ("in_list", "temp_table"):
+        selectors = list(
+            create_selectors(chunked_ids, {**recipe, "id_transfer": strategy})
+        )
+        runs: Dict[str, List[float]] = {"load": [], "execute": [], "fetch": []}
+
+        for _ in range(repeat):
+            totals = {"load": 0.0, "execute": 0.0, "fetch": 0.0}
+            for q, chunk in selectors:
+                with pooled_connection(conn_params) as conn, conn.cursor() as cursor:
+                    t0 = time.perf_counter()
+                    if chunk is not None:
+                        load_id_table(cursor, chunk)
+                    t1 = time.perf_counter()
+                    cursor.execute(q)
+                    t2 = time.perf_counter()
+                    cursor.fetchall()
+                    t3 = time.perf_counter()
+                totals["load"] += t1 - t0
+                totals["execute"] += t2 - t1
+                totals["fetch"] += t3 - t2
+            for phase, seconds in totals.items():
+                runs[phase].append(seconds)
+
+        results[strategy] = {k: round(median(v), 4) for k, v in runs.items()}
+        results[strategy]["chunks"] = len(selectors)
+
+    return results
+
+
+def legacy_standardize_df_columns(df: pd.DataFrame, column_types: Dict[str, str]):
+    """The original per-cell standardize_df_columns (reference for equivalence)"""
+    for col, col_type in column_types.items():
+        if "int" in col_type:
+            df[col] = df[col].apply(lambda x: None if pd.isna(x) else x)
+            df[col] = df[col].astype("Int64")
+        elif "str" in col_type:
+            df[col] = df[col].apply(lambda x: None if pd.isna(x) else x)
+            df[col] = df[col].astype("string")
+        elif "datetime64[ns]" in col_type:
+            df[col] = df[col].apply(lambda x: None if pd.isna(x) else x)
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d %H:%M:%S").dt.floor("s")
+        else:
+            df[col] = df[col].astype(col_type)
+    return df
+
+
+def record_chunk(
+    repo_id: str, asset: str, uwi_list: Optional[List[str]] = None
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Fetch the first chunk of a recipe as a raw (unstandardized) DataFrame
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype) to query from project database
+        uwi_list (Optional[List[str]]): optional uwi filter (see parse_uwis)
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, str]]: the chunk and its column types
+    """
+    conn_params = repo_conn(repo_id)
+    recipe = load_recipe(asset)
+    where = make_where_clause(uwi_list or [])
+    ids = fetch_id_list(conn_params, recipe["identifier"].replace(PURR_WHERE, where))
+    q, chunk = next(create_selectors(chunk_ids(ids, recipe["chunk_size"]), recipe))
+
+    with pooled_connection(conn_params) as conn, conn.cursor() as cursor:
+        if chunk is not None:
+            load_id_table(cursor, chunk)
+        cursor.execute(q)
+        column_names, column_types = get_column_info(cursor)
+        rows = [tuple(row) for row in cursor.fetchall()]
+
+    return pd.DataFrame(rows, columns=column_names), column_types
+
+
+def load_chunk(
+    repo_id: str,
+    asset: str,
+    uwi_list: Optional[List[str]] = None,
+    fixture: Optional[str] = None,
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Load a recorded chunk fixture, or record_chunk and save it as one"""
+    if fixture and os.path.exists(fixture):
+        with open(fixture, "rb") as f:
+            return pickle.load(f)
+
+    df, column_types = record_chunk(repo_id, asset, uwi_list)
+    if fixture:
+        with open(fixture, "wb") as f:
+            pickle.dump((df, column_types), f)
+    return df, column_types
+
+
+def bench_standardize(
+    repo_id: str,
+    asset: str,
+    uwi_list: Optional[List[str]] = None,
+    repeat: int = 3,
+    fixture: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Time standardize_df_columns against the legacy version on one chunk.
+
+    The outputs must be identical (pd.testing.assert_frame_equal), otherwise
+    an AssertionError names the first column that differs.
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype) to query from project database
+        uwi_list (Optional[List[str]]): optional uwi filter (see parse_uwis)
+        repeat (int): number of runs per version, the median is reported
+        fixture (Optional[str]): pickle of a recorded chunk; it is fetched
+            from the repo and written here if the file does not exist yet.
+
+    Returns:
+        Dict[str, Any]: seconds per version, rows, columns and the speedup
+    """
+    df, column_types = load_chunk(repo_id, asset, uwi_list, fixture)
+
+    versions = {
+        "legacy": legacy_standardize_df_columns,
+        "vectorized": standardize_df_columns,
+    }
+    results: Dict[str, Any] = {}
+    outputs = {}
+    for name, func in versions.items():
+        runs = []
+        for _ in range(repeat):
+            frame = df.copy()
+            t0 = time.perf_counter()
+            outputs[name] = func(frame, column_types)
+            runs.append(time.perf_counter() - t0)
+        results[name] = round(median(runs), 4)
+
+    pd.testing.assert_frame_equal(outputs["legacy"], outputs["vectorized"])
+
+    results["rows"] = len(df)
+    results["columns"] = len(column_types)
+    results["speedup"] = round(results["legacy"] / max(results["vectorized"], 1e-9), 1)
+    return results
+
+
+def bench_decoders(
+    repo_id: str,
+    asset: str,
+    uwi_list: Optional[List[str]] = None,
+    repeat: int = 3,
+    fixture: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Time the per-cell array_of_* formatters against the column_formatters.
+
+    Every array_of_* column in the recipe's xforms is decoded both ways and
+    the results must be identical.
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype) to query from project database
+        uwi_list (Optional[List[str]]): optional uwi filter (see parse_uwis)
+        repeat (int): number of runs per version, the median is reported
+        fixture (Optional[str]): pickle of a recorded chunk (see load_chunk)
+
+    Returns:
+        Dict[str, Any]: seconds per version for each decoded column
+    """
+    df, column_types = load_chunk(repo_id, asset, uwi_list, fixture)
+    df = standardize_df_columns(df, column_types)
+    xforms = load_recipe(asset)["xforms"]
+
+    results: Dict[str, Any] = {}
+    for col, xform in xforms.items():
+        if xform not in column_formatters or col not in df.columns:
+            continue
+        timings = {}
+        outputs = {}
+        versions: Dict[str, Callable[[pd.Series], pd.Series]] = {
+            "per_cell": partial(pd.Series.apply, func=formatters[xform]),
+            "column": column_formatters[xform],
+        }
+        for name, func in versions.items():
+            runs = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                outputs[name] = func(df[col])
+                runs.append(time.perf_counter() - t0)
+            timings[name] = round(median(runs), 4)
+        assert outputs["per_cell"].tolist() == outputs["column"].tolist(), col
+        results[col] = timings
+
+    return results
+
+
+def bench_serializer(
+    repo_id: str,
+    asset: str,
+    uwi_list: Optional[List[str]] = None,
+    repeat: int = 3,
+    fixture: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Time the json engines against per-doc json.dumps(doc, default=str).
+
+    The chunk is transformed to docs once; the default engine's bytes must be
+    identical to the legacy per-doc output (the golden reference).
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype) to query from project database
+        uwi_list (Optional[List[str]]): optional uwi filter (see parse_uwis)
+        repeat (int): number of runs per engine, the median is reported
+        fixture (Optional[str]): pickle of a recorded chunk (see load_chunk)
+
+    Returns:
+        Dict[str, Any]: seconds per engine, docs and output bytes
+    """
+    df, column_types = load_chunk(repo_id, asset, uwi_list, fixture)
+    docs = transform_batch(df, column_types, load_recipe(asset))
+
+    def legacy(batch: List[Dict[str, Any]]) -> bytes:
+        text = "".join(json.dumps(doc, default=str) + "," for doc in batch)
+        return text[:-1].encode("utf-8")
+
+    engines: Dict[str, Any] = {"legacy": legacy}
+    for name in serializers:
+        serializer = get_serializer(name)
+        if serializer.name == name:
+            engines[name] = serializer.encode_batch
+
+    results: Dict[str, Any] = {}
+    outputs = {}
+    for name, encode in engines.items():
+        runs = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            outputs[name] = encode(docs)
+            runs.append(time.perf_counter() - t0)
+        results[name] = round(median(runs), 4)
+
+    assert outputs["json"] == outputs["legacy"], "json engine output differs"
+
+    results["docs"] = len(docs)
+    results["bytes"] = {name: len(out) for name, out in outputs.items()}
+    return results
+
+
+def bench_export_formats(
+    repo_id: str,
+    asset: str,
+    uwi_list: Optional[List[str]] = None,
+    repeat: int = 3,
+    fixture: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Compare file size, write and load time of each export format.
+
+    The chunk is transformed to docs once and written with every writer, and
+    every compression it supports, to a temp dir. "load" reads the file back
+    the way an analytics job would: json.load (or one json.loads per line)
+    versus pyarrow read_table.
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype) to query from project database
+        uwi_list (Optional[List[str]]): optional uwi filter (see parse_uwis)
+        repeat (int): number of runs per format, the median is reported
+        fixture (Optional[str]): pickle of a recorded chunk (see load_chunk)
+
+    Returns:
+        Dict[str, Any]: bytes and seconds to write/load for each format
+        and compression, i.e. results["ndjson+zstd"]
+    """
+    df, column_types = load_chunk(repo_id, asset, uwi_list, fixture)
+    recipe = load_recipe(asset)
+    docs = transform_batch(df, column_types, recipe)
+    # the chunk has the selector's columns, so no describe_selector needed
+    schema = doc_schema(column_types, recipe) if pa is not None else None
+
+    def load_json(path: str, compression: Optional[str]) -> Any:
+        with open_decompressed(path, compression) as f:
+            return json.load(f)
+
+    def load_ndjson(path: str, compression: Optional[str]) -> Any:
+        with open_decompressed(path, compression) as f:
+            return [json.loads(line) for line in f]
+
+    loaders = {
+        "json": load_json,
+        "ndjson": load_ndjson,
+        "parquet": lambda path, _: pq.read_table(path),
+        "arrow": lambda path, _: pa.ipc.open_file(path).read_all(),
+    }
+
+    results: Dict[str, Any] = {"docs": len(docs)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in writers:
+            for compression in (None,) + writers[fmt].codecs:
+                if not export_available(fmt, compression):
+                    continue
+                label = f"{fmt}+{compression}" if compression else fmt
+                path = os.path.join(tmp, f"{asset}.{export_ext(fmt, compression)}")
+                timings: Dict[str, List[float]] = {"write": [], "load": []}
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    with open_writer(
+                        path, fmt, schema=schema, compression=compression
+                    ) as writer:
+                        writer.write_batch(docs)
+                    t1 = time.perf_counter()
+                    loaders[fmt](path, compression)
+                    t2 = time.perf_counter()
+                    timings["write"].append(t1 - t0)
+                    timings["load"].append(t2 - t1)
+                results[label] = {k: round(median(v), 4) for k, v in timings.items()}
+                results[label]["bytes"] = os.path.getsize(path)
+
+    return results
+
+
+benchmarks: Dict[str, Any] = {
+    "id_transfer": bench_id_transfer,
+    "standardize": bench_standardize,
+    "decoders": bench_decoders,
+    "serializer": bench_serializer,
+    "export_formats": bench_export_formats,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=benchmarks.keys())
+    parser.add_argument("repo_id")
+    parser.add_argument("asset")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixture", help="recorded chunk (all but id_transfer)")
+    cli_args = parser.parse_args()
+
+    options: Dict[str, Any] = {"repeat": cli_args.repeat}
+    if cli_args.fixture:
+        options["fixture"] = cli_args.fixture
+
+    res = benchmarks[cli_args.benchmark](cli_args.repo_id, cli_args.asset, **options)
+    print(json.dumps(res, indent=2))
@@ -0,0 +1,235 @@
+"""Export result cache
+
+Identical export requests (i.e. several users grabbing "well" from the same
+repo) reuse the first export's file instead of re-running the selectors. An
+entry is keyed on:
+
+    repo_id, asset, the normalized uwi_list, export_format, compression,
+    compression_level, PURR_JSON_ENGINE and the repo's fingerprint
+
+The fingerprint is the size and mtime of the project's gxdb.db and gxdb.log
+(the transaction log grows with every commit), or the latest change date in
+the recipe's "changes" tables if the project directory cannot be read. A
+repo that changed since the cached export starts gets a new fingerprint, so
+the request misses and the old entry is dropped once the new export is done.
+The fingerprint is taken before the export runs, so changes made during the
+export also miss next time.
+
+A finished export is hardlinked (or copied, i.e. across volumes) into the
+file_depot's export_cache directory, and a hit links that cached copy to the
+new export file name, so every job returns its own export file. Entries are
+evicted least recently used first once the cache holds more than
+PURR_EXPORT_CACHE_BYTES or PURR_EXPORT_CACHE_ENTRIES. Eviction only ever
+deletes the cached copy; export files handed out to users are never touched.
+
+Only single-file, non-incremental exports are cached.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from purr_geographix.assets.collect.incremental import latest_change
+from purr_geographix.assets.collect.serializer import JSON_ENGINE
+from purr_geographix.core.crud import (
+    delete_cache_entries,
+    get_cache_entries,
+    get_cache_entry,
+    touch_cache_entry,
+    upsert_cache_entry,
+)
+from purr_geographix.core.logger import logger
+
+EXPORT_CACHE = os.environ.get("PURR_EXPORT_CACHE", "1") == "1"
+EXPORT_CACHE_BYTES = int(os.environ.get("PURR_EXPORT_CACHE_BYTES", "10737418240"))
+EXPORT_CACHE_ENTRIES = int(os.environ.get("PURR_EXPORT_CACHE_ENTRIES", "200"))
+
+# file_depot subdirectory holding the cached copies
+CACHE_DIR = "export_cache"
+
+# since this process started
+cache_stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def repo_fingerprint(
+    fs_path: str, conn: Dict[str, Any], recipe: Dict[str, Any]
+) -> Optional[str]:
+    """Identify the current state of a repo's database
+
+    Args:
+        fs_path (str): Repo (project) directory
+        conn (Dict[str, Any]): SQLAnywhere connection parameters
+        recipe (Dict[str, Any]): The asset recipe (for its "changes" tables)
+
+    Returns:
+        Optional[str]: None if neither the files nor the tables tell (the
+        export is then not cached)
+    """
+    try:
+        parts = []
+        for name in ("gxdb.db", "gxdb.log"):
+            path = Path(fs_path) / name
+            if name == "gxdb.db" or path.exists():
+                stat = path.stat()
+                parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+        return "fs:" + ";".join(parts)
+    except OSError as e:
+        logger.debug(f"no file fingerprint for {fs_path}: {e}")
+
+    if "changes" in recipe:
+        changed = latest_change(conn, recipe)
+        if changed is not None:
+            return f"db:{changed}"
+    return None
+
+
+def cache_key(
+    repo_id: str, asset: str, fingerprint: str, **options: Any
+) -> Tuple[str, Dict[str, Any]]:
+    """Key and params of an export cache entry
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype)
+        fingerprint (str): From repo_fingerprint
+        **options: uwi_list, export_format, compression and compression_level
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: sha256 hex key and the normalized params
+    """
+    params = {
+        **options,
+        "uwi_list": sorted(set(options.get("uwi_list") or [])),
+        "json_engine": JSON_ENGINE,
+    }
+    blob = json.dumps([repo_id, asset, params, fingerprint], sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest(), params
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlink src to dst, or copy it if the file system can't"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def cached_copy(depot: Path, export_file: str) -> Path:
+    """Path of a cache entry's copy of an export (see CACHE_DIR)"""
+    return depot / CACHE_DIR / export_file
+
+
+def cache_lookup(db: Session, depot: Path, key: str) -> Optional[Path]:
+    """The cached copy of an export for a key, if it is still in the depot
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        depot (Path): The file_depot
+        key (str): From cache_key
+
+    Returns:
+        Optional[Path]: None on a miss
+    """
+    entry = get_cache_entry(db, key)
+    if entry is not None:
+        cached = cached_copy(depot, str(entry.export_file))
+        if cached.is_file():
+            touch_cache_entry(db, key)
+            cache_stats["hits"] += 1
+            return cached
+        # deleted from the depot by hand (or an entry from before CACHE_DIR)
+        delete_cache_entries(db, [key])
+    cache_stats["misses"] += 1
+    return None
+
+
+def cache_store(
+    db: Session,
+    depot: Path,
+    key: str,
+    repo_id: str,
+    asset: str,
+    params: Dict[str, Any],
+    fingerprint: str,
+    out_file: Path,
+) -> None:
+    """Add a copy of a finished export to the cache, then evict stale and old
+    entries
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        depot (Path): The file_depot
+        key (str): From cache_key
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype)
+        params (Dict[str, Any]): From cache_key
+        fingerprint (str): From repo_fingerprint, taken before the export
+        out_file (Path): The export file (in the depot), left as it is
+    """
+    entries = get_cache_entries(db)
+    # the same export of an older repo state will never hit again
+    stale = [
+        e
+        for e in entries
+        if (e.repo_id, e.asset, e.params) == (repo_id, asset, params)
+        and e.fingerprint != fingerprint
+    ]
+    remove_entries(db, depot, stale)
+
+    cached = cached_copy(depot, f"{key}_{out_file.name}")
+    cached.parent.mkdir(exist_ok=True)
+    cached.unlink(missing_ok=True)
+    link_or_copy(out_file, cached)
+
+    upsert_cache_entry(
+        db,
+        {
+            "key": key,
+            "repo_id": repo_id,
+            "asset": asset,
+            "params": params,
+            "fingerprint": fingerprint,
+            "export_file": cached.name,
+            "bytes": cached.stat().st_size,
+        },
+    )
+    evict(db, depot)
+
+
+def remove_entries(db: Session, depot: Path, entries: List[Any]) -> None:
+    """Delete cache entries and their cached copies (never an export file)"""
+    for entry in entries:
+        logger.info(f"evicting cached export: {entry.export_file}")
+        cached_copy(depot, entry.export_file).unlink(missing_ok=True)
+    delete_cache_entries(db, [entry.key for entry in entries])
+    cache_stats["evictions"] += len(entries)
+
+
+def evict(db: Session, depot: Path) -> None:
+    """Remove least recently used entries beyond the size and count limits"""
+    total = 0
+    evicted = []
+    for i, entry in enumerate(get_cache_entries(db)):
+        total += int(entry.bytes or 0)
+        if total > EXPORT_CACHE_BYTES or i >= EXPORT_CACHE_ENTRIES:
+            evicted.append(entry)
+    remove_entries(db, depot, evicted)
+
+
+def cache_summary(db: Session) -> Dict[str, Any]:
+    """Export cache size, limits and hit/miss counts (see cache_stats)"""
+    entries = get_cache_entries(db)
+    return {
+        "enabled": EXPORT_CACHE,
+        "entries": len(entries),
+        "bytes": sum(entry.bytes or 0 for entry in entries),
+        "max_entries": EXPORT_CACHE_ENTRIES,
+        "max_bytes": EXPORT_CACHE_BYTES,
+        "entry_hits": sum(entry.hits or 0 for entry in entries),
+        **cache_stats,
+    }
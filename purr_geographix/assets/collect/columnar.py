@@ -0,0 +1,159 @@
+"""Columnar (Arrow) fetch engine for asset selectors
+
+This is an optional alternative to the pyodbc row-tuple path in handle_query.
+Result sets are read by arrow-odbc directly into Arrow record batches, which
+are then handed to pandas without building a Python tuple per row. If
+arrow-odbc/pyarrow are not installed, handle_query falls back to pyodbc.
+
+    pip install purr_geographix[arrow]
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+import pandas as pd
+
+from purr_geographix.core.governor import governed
+from purr_geographix.core.sqlanywhere import (
+    conn_variants,
+    make_conn_string,
+    record_conn_result,
+)
+from purr_geographix.core.logger import logger
+
+try:
+    import pyarrow as pa
+    from arrow_odbc import Error as ArrowOdbcError
+    from arrow_odbc import read_arrow_batches_from_odbc
+except ImportError:
+    pa = None
+    ArrowOdbcError = Exception
+    read_arrow_batches_from_odbc = None
+
+# LIST() aggregates and curve blobs are unbounded (long varchar/binary), so
+# arrow-odbc needs an upper bound to size its transfer buffers.
+ARROW_MAX_TEXT_SIZE = int(os.environ.get("PURR_ARROW_MAX_TEXT_SIZE", "1048576"))
+ARROW_MAX_BINARY_SIZE = int(os.environ.get("PURR_ARROW_MAX_BINARY_SIZE", "8388608"))
+
+
+def arrow_available() -> bool:
+    """True if the optional arrow-odbc and pyarrow packages are installed"""
+    return read_arrow_batches_from_odbc is not None
+
+
+def map_arrow_type(arrow_type) -> str:
+    """Map an Arrow data type to the pandas types used by sql_helper"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return "string"
+    if pa.types.is_integer(arrow_type):
+        return "int64"
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return "float64"
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+        return "datetime64[ns]"
+    return "object"
+
+
+def get_arrow_column_info(schema) -> Dict[str, str]:
+    """Return column types from an Arrow schema (see get_column_info)"""
+    return {field.name: map_arrow_type(field.type) for field in schema}
+
+
+def regroup_frames(frames: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Carry rows for the last w_uwi of each frame into the next frame.
+
+    This is the DataFrame equivalent of handle_query.fetch_batches: a well's
+    rows are never split between batches.
+    """
+    carry = None
+    for df in frames:
+        if carry is not None:
+            df = pd.concat([carry, df], ignore_index=True)
+            carry = None
+        if df.empty or "w_uwi" not in df.columns:
+            if not df.empty:
+                yield df
+            continue
+
+        tail = df["w_uwi"] == df["w_uwi"].iat[-1]
+        if tail.all():
+            carry = df
+            continue
+        carry = df[tail]
+        yield df[~tail].reset_index(drop=True)
+
+    if carry is not None and not carry.empty:
+        yield carry.reset_index(drop=True)
+
+
+def open_arrow_reader(conn: dict, sql: str, fetch_size: int) -> Any:
+    """Start an arrow-odbc reader, trying the remembered conn variant first.
+
+    arrow-odbc opens its own ODBC connection (not one from the pyodbc pool),
+    but it connects like ConnectionPool does: each variant from conn_variants
+    in turn, and the one that worked is remembered for the repo.
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+        sql (str): A selector to execute on the gxdb.
+        fetch_size (int): Rows per Arrow record batch.
+
+    Returns:
+        An arrow-odbc BatchReader.
+    """
+    last_error = None
+    for variant, params in conn_variants(conn):
+        try:
+            reader = read_arrow_batches_from_odbc(
+                query=sql,
+                connection_string=make_conn_string(params),
+                batch_size=fetch_size,
+                max_text_size=ARROW_MAX_TEXT_SIZE,
+                max_binary_size=ARROW_MAX_BINARY_SIZE,
+            )
+        except ArrowOdbcError as e:
+            record_conn_result(conn, variant, ok=False)
+            logger.debug(f"arrow-odbc via {variant} failed: {e}")
+            last_error = e
+            continue
+        record_conn_result(conn, variant, ok=True)
+        return reader
+    assert last_error is not None  # conn_variants is never empty
+    raise last_error
+
+
+@contextmanager
+def fetch_arrow_batches(
+    conn: dict, sql: str, fetch_size: int, stats: Optional[Dict[str, float]] = None
+) -> Iterator[Tuple[Dict[str, str], Iterator[pd.DataFrame]]]:
+    """Execute a selector with arrow-odbc and stream it as DataFrames.
+
+    A governor slot for the repo's server is held until the context exits
+    (see core.governor), just like pooled_connection. Record batches are
+    converted with to_pandas, which avoids copies for numeric columns that
+    have no nulls.
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+        sql (str): A selector to execute on the gxdb.
+        fetch_size (int): Rows per Arrow record batch.
+        stats (Optional[Dict[str, float]]): Gets the query's execution time
+            added to "seconds" (not the wait for a governor slot).
+
+    Yields:
+        Tuple[Dict[str, str], Iterator[pd.DataFrame]]: column types (mapped
+        like get_column_info) and a lazy iterator of DataFrames.
+    """
+    with governed(conn):
+        start = time.perf_counter()
+        reader = open_arrow_reader(conn, sql, fetch_size)
+        if stats is not None:
+            stats["seconds"] += time.perf_counter() - start
+        column_types = get_arrow_column_info(reader.schema)
+        logger.debug(f"arrow schema: {reader.schema}")
+
+        frames = (batch.to_pandas(split_blocks=True) for batch in reader)
+        yield column_types, regroup_frames(frames)
@@ -1,18 +1,89 @@
 """GeoGraphix asset query"""
 
-import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
+from queue import Full, Queue
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 import pandas as pd
 import numpy as np
 import pyodbc
 
-from purr_geographix.core.sqlanywhere import db_exec
+from purr_geographix.core.sqlanywhere import (
+    db_stream,
+    get_conn_strategy,
+    pooled_connection,
+    set_conn_strategy,
+)
 from purr_geographix.core.database import get_db
-from purr_geographix.core.crud import get_repo_by_id, get_file_depot
-from purr_geographix.assets.collect.xformer import formatters
+from purr_geographix.core.crud import (
+    get_repo_by_id,
+    get_export_watermark,
+    get_file_depot,
+    update_conn_strategy,
+    upsert_export_watermark,
+)
+from purr_geographix.assets.collect.xformer import (
+    column_formatters,
+    formatters,
+    nested_formatters,
+)
 from purr_geographix.core.util import async_wrap, import_dict_from_file
 from purr_geographix.assets.collect.post_process import post_process
+from purr_geographix.assets.collect.ragged import RaggedArray
+from purr_geographix.assets.collect.serializer import get_serializer
+from purr_geographix.assets.collect.writers import (
+    DocWriter,
+    doc_schema,
+    open_writer,
+    writers,
+)
+from purr_geographix.assets.collect.shards import (
+    MANIFEST,
+    ShardedWriter,
+    load_resumable,
+    new_manifest,
+    open_sharded_writer,
+)
+from purr_geographix.assets.collect.cache import (
+    EXPORT_CACHE,
+    cache_key,
+    cache_lookup,
+    cache_store,
+    link_or_copy,
+    repo_fingerprint,
+)
+from purr_geographix.assets.collect.incremental import (
+    changed_clause,
+    changes_manifest,
+    latest_change,
+    track_uwis,
+    watermark_scope,
+    write_changes,
+)
+from purr_geographix.assets.collect.columnar import (
+    arrow_available,
+    fetch_arrow_batches,
+)
 from purr_geographix.assets.collect.xformer import (
     PURR_WHERE,
     standardize_df_columns,
@@ -21,131 +92,575 @@ from purr_geographix.assets.collect.xformer import (
 from purr_geographix.assets.collect.sql_helper import (
     get_column_info,
     make_where_clause,
-    create_selectors,
+    make_keyset_bound,
+    make_keyset_clause,
+    create_selector,
     chunk_ids,
+    AdaptiveChunker,
+    load_id_table,
 )
 from purr_geographix.core.logger import logger
 
+FETCH_SIZE = int(os.environ.get("PURR_FETCH_SIZE", "1000"))
+
+# a selector's sql and the ids to load first (id_transfer "temp_table" only)
+Selector = Tuple[str, Optional[List[Union[str, int]]]]
+
+# "pyodbc" (row tuples) or "arrow" (columnar, needs the arrow extras)
+FETCH_ENGINE = os.environ.get("PURR_FETCH_ENGINE", "pyodbc")
+
+# resize chunks from observed bytes/latency (see AdaptiveChunker)
+ADAPTIVE_CHUNKS = os.environ.get("PURR_ADAPTIVE_CHUNKS", "1") == "1"
+
+# number of chunk selectors to run at once (see resolve_chunk_workers)
+CHUNK_WORKERS = int(os.environ.get("PURR_CHUNK_WORKERS", "1"))
+
+# doc batches each running chunk selector may have waiting to be written
+CHUNK_QUEUE_BATCHES = int(os.environ.get("PURR_CHUNK_QUEUE_BATCHES", "2"))
+
+# end of a chunk's batches (see iter_selector_docs)
+_CHUNK_DONE = object()
+
 ##############################################################################
 
 
+def load_recipe(asset: str) -> Dict[str, Any]:
+    """Import the recipe dict for an asset from the recipes directory"""
+    recipe_path = Path(Path(__file__).resolve().parent, f"recipes/{asset}.py")
+    return import_dict_from_file(recipe_path, "recipe")
+
+
 def fetch_id_list(conn, id_sql):
     """Excutes an asset recipe's identifier SQL and returns ids"""
-    res = db_exec(conn, id_sql)
-    if res and "w_uwi" in res[0]:
-        ids = [row["w_uwi"] for row in res]
-        return ids
-    else:
-        return []
+    return [row["w_uwi"] for row in db_stream(conn, id_sql) if "w_uwi" in row]
 
 
-def collect_and_assemble_docs(args: Dict[str, Any]):
-    """todo"""
-    conn_params = args["conn"]
-    recipe = args["recipe"]
-    out_file = args["out_file"]
-    xforms = recipe["xforms"]
+def describe_selector(conn: Dict[str, Any], recipe: Dict[str, Any]) -> Dict[str, str]:
+    """Column types of a recipe's selector, from a run that returns no rows"""
+    sql = recipe["selector"].replace(PURR_WHERE, "WHERE 1=0")
+    with pooled_connection(conn) as connection, connection.cursor() as cursor:
+        cursor.execute(sql)
+        _, column_types = get_column_info(cursor)
+    return column_types
 
-    # control memory usage by the number of "ids" in the where clause
-    chunk_size = recipe["chunk_size"] if "chunk_size" in recipe else 1000
 
-    where = make_where_clause(args["uwi_list"])
+def fetch_batches(
+    cursor: pyodbc.Cursor, column_names: List[str], fetch_size: int
+) -> Iterator[pd.DataFrame]:
+    """Pull rows from an open cursor fetch_size at a time as DataFrames.
+
+    Rows belonging to the same w_uwi are never split across batches (the
+    trailing group is carried over to the next batch), so post_process
+    aggregation still sees every row for a well. This relies on the selector
+    being ORDER BY w_uwi whenever the recipe has a post_process step.
 
-    id_sql = recipe["identifier"].replace(PURR_WHERE, where)
+    Args:
+        cursor (pyodbc.Cursor): Cursor with an executed selector.
+        column_names (List[str]): Column names from the cursor description.
+        fetch_size (int): Number of rows to pull per fetchmany call.
 
-    logger.debug(id_sql)
+    Yields:
+        pd.DataFrame: A batch of roughly fetch_size rows.
+    """
+    uwi_idx = column_names.index("w_uwi") if "w_uwi" in column_names else None
+    carry: List[tuple] = []
+
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        batch = carry + [tuple(row) for row in rows]
+        cut = len(batch)
+
+        if uwi_idx is not None:
+            last_uwi = batch[-1][uwi_idx]
+            while cut > 0 and batch[cut - 1][uwi_idx] == last_uwi:
+                cut -= 1
+            if cut == 0:
+                # one well spans the whole batch; keep reading
+                carry = batch
+                continue
+
+        carry = batch[cut:]
+        yield pd.DataFrame(batch[:cut], columns=column_names)
+
+    if carry:
+        yield pd.DataFrame(carry, columns=column_names)
+
+
+def transform_batch(
+    df: pd.DataFrame, column_types: Dict[str, str], recipe: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Standardize, format and post-process a batch, then build json docs"""
+    xforms = recipe["xforms"]
 
-    ids = fetch_id_list(conn_params, id_sql)
+    # useful for diagnostics:
+    # duplicates = df[df.duplicated(subset=["w_uwi"])]
 
-    logger.debug(ids)
+    df = standardize_df_columns(df, column_types)
 
-    chunked_ids = chunk_ids(ids, chunk_size)
+    if df.empty:
+        return []
 
-    if len(chunked_ids) == 0:
-        msg = "Query returned zero hits"
-        logger.info(msg)
-        return msg
+    # decoded LIST columns stay as RaggedArray, df keeps a placeholder
+    ragged: Dict[str, RaggedArray] = {}
+
+    for col in df.columns:
+        col_type = str(df.dtypes[col])
+
+        xform = xforms.get(col, col_type)
+
+        if xform in column_formatters:
+            ragged[col] = column_formatters[xform](df[col])
+            df[col] = None
+            continue
+
+        formatter = formatters.get(xform, lambda x: x)
+
+        # pylint: disable=cell-var-from-loop
+        df[col] = df[col].apply(formatter)
+
+    df = df.replace({np.nan: None})
+
+    if postproc := recipe.get("post_process"):
+        post_processor = post_process[postproc]
+        if post_processor:
+            logger.info(f"post-processing: {postproc}")
+            df, ragged = post_processor(df, ragged)
+
+    # transform this batch by table prefixes
+    nested = frozenset(c for c, x in xforms.items() if x in nested_formatters)
+    return transform_dataframe_to_json(df, recipe["prefixes"], ragged, nested)
+
+
+def measure_frames(
+    frames: Iterator[pd.DataFrame], stats: Dict[str, float]
+) -> Iterator[pd.DataFrame]:
+    """Pass frames through, adding fetch time, rows and bytes to stats"""
+    while True:
+        start = time.perf_counter()
+        df = next(frames, None)
+        stats["seconds"] += time.perf_counter() - start
+        if df is None:
+            return
+        stats["rows"] += len(df)
+        stats["bytes"] += int(df.memory_usage(deep=True).sum())
+        yield df
+
+
+def stream_docs(
+    conn_params: Dict[str, Any],
+    sel: Selector,
+    recipe: Dict[str, Any],
+    fetch_size: int,
+    stats: Optional[Dict[str, float]] = None,
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """Execute one selector and yield json docs one fetch batch at a time.
+
+    Only a single batch (plus any carried-over w_uwi group) is held in memory,
+    so peak memory depends on fetch_size rather than the size of the result.
+    The fetch engine is recipe["fetch_engine"] or PURR_FETCH_ENGINE; "arrow"
+    falls back to pyodbc if arrow-odbc is not installed. Selectors that need
+    their ids loaded into a temp table always use pyodbc, since the table only
+    exists on the (pooled) connection that loaded it.
+
+    If given, stats gets "seconds" (execute + fetch, excluding transform),
+    "rows" and "bytes" (DataFrame memory) for this selector.
+    """
+    q, ids = sel
+    logger.debug(q)
+
+    if stats is None:
+        stats = {}
+    stats.update({"seconds": 0.0, "rows": 0, "bytes": 0})
+
+    engine = recipe.get("fetch_engine", FETCH_ENGINE)
+
+    if engine == "arrow" and arrow_available() and ids is None:
+        arrow = fetch_arrow_batches(conn_params, q, fetch_size, stats)
+        with arrow as (column_types, frames):
+            for df in measure_frames(frames, stats):
+                yield transform_batch(df, column_types, recipe)
+        return
+
+    if engine == "arrow":
+        logger.warning("arrow-odbc is not installed, using pyodbc fetch engine")
+
+    with pooled_connection(conn_params) as conn, conn.cursor() as cursor:
+        start = time.perf_counter()
+        if ids is not None:
+            load_id_table(cursor, ids)
+
+        cursor.execute(q)
+        stats["seconds"] += time.perf_counter() - start
+
+        column_names, column_types = get_column_info(cursor)
+
+        frames = fetch_batches(cursor, column_names, fetch_size)
+        for df in measure_frames(frames, stats):
+            yield transform_batch(df, column_types, recipe)
+
+
+def iter_keyset_docs(
+    conn_params: Dict[str, Any],
+    recipe: Dict[str, Any],
+    uwi_list: List[str],
+    fetch_size: int,
+    last_uwi: Optional[str] = None,
+    changed: Optional[str] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield json docs by keyset pagination over the selector (no id pass).
+
+    Each page takes the next chunk_size (or recipe["keyset_page"]) uwis after
+    last_uwi from the well table (see make_keyset_bound), then runs the
+    selector once on that w_uwi range, ordered by w_uwi. This skips the
+    identifier query entirely, which mostly helps "select all" exports and
+    recipes with an expensive identifier. Pass last_uwi to start after that
+    well (i.e. to resume an export) and changed to select only changed wells
+    (see incremental.py).
+    """
+    page_wells = recipe.get("keyset_page", recipe.get("chunk_size", 1000))
 
-    selectors = create_selectors(chunked_ids, recipe)
+    while True:
+        bound_sql = make_keyset_bound(uwi_list, last_uwi, page_wells, changed)
+        logger.debug(bound_sql)
+        rows = list(db_stream(conn_params, bound_sql))
+        bound_uwi = rows[0]["bound_uwi"] if rows else None
+        if bound_uwi is None:
+            return
 
-    all_columns = set()
+        where = make_keyset_clause(uwi_list, last_uwi, changed, bound_uwi)
+        q = recipe["selector"].replace(PURR_WHERE, where)
+        logger.debug(q)
 
-    docs_written = 0
+        with pooled_connection(conn_params) as conn, conn.cursor() as cursor:
+            cursor.execute(q)
 
-    with open(out_file, "w", encoding="utf-8") as f:
-        f.write("[")  # Start of JSON array
+            column_names, column_types = get_column_info(cursor)
 
-        for q in selectors:
-            logger.debug(q)
+            for df in fetch_batches(cursor, column_names, fetch_size):
+                yield transform_batch(df, column_types, recipe)
 
-            # pylint: disable=c-extension-no-member
-            with pyodbc.connect(**conn_params) as conn:
-                cursor = conn.cursor()
-                cursor.execute(q)
+        if rows[0]["wells"] < page_wells:
+            return
+        last_uwi = bound_uwi
 
-                column_names, column_types = get_column_info(cursor)
 
-                df = pd.DataFrame(
-                    [tuple(row) for row in cursor.fetchall()], columns=column_names
-                )
+def resolve_chunk_workers(repo_id: str, ggx_host: Optional[str]) -> int:
+    """Number of chunk selectors to run concurrently for a repo.
 
-                # useful for diagnostics:
-                # duplicates = df[df.duplicated(subset=["w_uwi"])]
+    The most specific environment variable wins:
+        PURR_CHUNK_WORKERS_<REPO_ID>  (i.e. PURR_CHUNK_WORKERS_COL_7159C5)
+        PURR_CHUNK_WORKERS_<GGX_HOST> (i.e. PURR_CHUNK_WORKERS_SCARAB)
+        PURR_CHUNK_WORKERS            (default 1, strictly sequential)
 
-                df = standardize_df_columns(df, column_types)
+    Args:
+        repo_id (str): ID from a specific project
+        ggx_host (Optional[str]): GeoGraphix project server hostname
 
-                if not df.empty:
-                    all_columns.update(df.columns)
+    Returns:
+        int: Number of concurrent chunk selectors (at least 1)
+    """
+    for suffix in (repo_id, ggx_host):
+        if suffix:
+            value = os.environ.get(f"PURR_CHUNK_WORKERS_{suffix.upper()}")
+            if value:
+                return max(1, int(value))
+    return max(1, CHUNK_WORKERS)
+
+
+def iter_selector_docs(
+    conn_params: Dict[str, Any],
+    chunked_ids: Iterable[List[Union[str, int]]],
+    recipe: Dict[str, Any],
+    fetch_size: int,
+    workers: int = 1,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield json docs for all chunk selectors, always in chunk order.
+
+    With workers=1 every selector is streamed batch by batch. Otherwise up to
+    `workers` selectors run at once on a thread pool, each on its own pooled
+    connection, and each one hands its doc batches back through a queue of
+    PURR_CHUNK_QUEUE_BATCHES. A selector that gets ahead of the writer blocks
+    on its full queue (with its cursor open), so at most about
+    workers * (PURR_CHUNK_QUEUE_BATCHES + 1) batches of fetch_size rows are
+    held at once, however large the chunks are. Batches are yielded in chunk
+    order, so the output file is the same regardless of which chunk finishes
+    first.
+
+    If chunked_ids is an AdaptiveChunker, it observes every finished chunk so
+    that later chunks get resized.
+    """
+
+    def observe(ids: List[Union[str, int]], stats: Dict[str, float]) -> None:
+        if isinstance(chunked_ids, AdaptiveChunker):
+            chunked_ids.observe(len(ids), stats["bytes"], stats["seconds"])
+
+    if workers <= 1:
+        for ids in chunked_ids:
+            stats: Dict[str, float] = {}
+            sel = create_selector(ids, recipe)
+            yield from stream_docs(conn_params, sel, recipe, fetch_size, stats)
+            observe(ids, stats)
+        return
+
+    # set when the writer stops early, so blocked selectors give up
+    stop = threading.Event()
+
+    def put(batches: Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def run_selector(ids: List[Union[str, int]], batches: Queue):
+        stats: Dict[str, float] = {}
+        try:
+            sel = create_selector(ids, recipe)
+            docs = stream_docs(conn_params, sel, recipe, fetch_size, stats)
+            with closing(docs):
+                for batch in docs:
+                    if not put(batches, batch):
+                        break
+        finally:
+            put(batches, _CHUNK_DONE)
+        return ids, stats
+
+    def submit(ids: List[Union[str, int]]) -> Tuple[Queue, Future]:
+        batches: Queue = Queue(maxsize=max(1, CHUNK_QUEUE_BATCHES))
+        return batches, executor.submit(run_selector, ids, batches)
+
+    chunks = iter(chunked_ids)
+    pending: Deque[Tuple[Queue, Future]] = deque()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk")
+    try:
+        for ids in islice(chunks, workers):
+            pending.append(submit(ids))
+
+        while pending:
+            batches, future = pending.popleft()
+            while (batch := batches.get()) is not _CHUNK_DONE:
+                yield batch
+            ids, stats = future.result()
+            observe(ids, stats)
+            # keep `workers` selectors in flight
+            if (next_ids := next(chunks, None)) is not None:
+                pending.append(submit(next_ids))
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def collect_and_assemble_docs(args: Dict[str, Any]):
+    """Run an asset recipe's selectors and write the json docs to out_file.
 
-                    for col in df.columns:
-                        col_type = str(df.dtypes[col])
+    The pipeline is lazy from end to end: each selector is streamed in
+    fetch_size batches through transform_batch and written out before the
+    next batch is pulled from the cursor. Set args["chunk_workers"] > 1 to
+    run several chunk selectors at once (see iter_selector_docs).
 
-                        xform = xforms.get(col, col_type)
+    args["strategy"] (or recipe["strategy"]) picks how wells get selected:
+        "chunked": run the identifier, then one selector per chunk of ids,
+            with chunk sizes adapted as they run (see AdaptiveChunker)
+        "keyset": page through the selector by w_uwi (see iter_keyset_docs)
 
-                        formatter = formatters.get(xform, lambda x: x)
+    With args["manifest"] (see shards.py) the docs are written as shards to
+    the out_file directory instead, starting after the manifest's last_uwi.
 
-                        # pylint: disable=cell-var-from-loop
-                        df[col] = df[col].apply(formatter)
+    With args["incremental"] ({"since", "previous_uwis"}, see incremental.py)
+    only wells changed since the watermark are selected, a changes manifest
+    is written next to the export and result["changes"] holds the new
+    watermark and uwis for the caller to save.
+    """
+    conn_params = args["conn"]
+    recipe = args["recipe"]
+    out_file = args["out_file"]
+    strategy = args.get("strategy") or recipe.get("strategy", "chunked")
+    chunked_ids = None
+
+    manifest = args.get("manifest")
+    resume_uwi = manifest["last_uwi"] if manifest else None
+    rotated = manifest is not None and manifest["shard_by"] != "uwi_hash"
+    if rotated:
+        # last_uwi is only a resume point if wells are written in order
+        recipe = {**recipe, "ordered": True}
+
+    # incremental: the new watermark is read before any wells are selected
+    incremental = args.get("incremental")
+    changed = None
+    current_uwis = None
+    if incremental is not None:
+        watermark = latest_change(conn_params, recipe)
+        if incremental["since"] is not None:
+            changed = changed_clause(recipe, incremental["since"])
+            # every well in scope (changed or not), to find the deleted ones
+            all_sql = recipe["identifier"].replace(
+                PURR_WHERE, make_where_clause(args["uwi_list"])
+            )
+            current_uwis = fetch_id_list(conn_params, all_sql)
 
-                    df = df.replace({np.nan: None})
+    # control memory usage by the number of "ids" in the where clause
+    chunk_size = recipe["chunk_size"] if "chunk_size" in recipe else 1000
 
-                    if postproc := recipe.get("post_process"):
-                        post_processor = post_process[postproc]
-                        if post_processor:
-                            logger.info(f"post-processing: {postproc}")
-                            df = post_processor(df)
+    # ...and by the number of rows pulled from the cursor at once
+    fetch_size = recipe.get("fetch_size", FETCH_SIZE)
 
-                    # transform this chunk by table prefixes
-                    json_data = transform_dataframe_to_json(df, recipe["prefixes"])
+    if strategy == "keyset":
+        doc_batches = iter_keyset_docs(
+            conn_params, recipe, args["uwi_list"], fetch_size, resume_uwi, changed
+        )
+    else:
+        if rotated:
+            where = make_keyset_clause(args["uwi_list"], resume_uwi, changed)
+        else:
+            where = make_where_clause(args["uwi_list"], changed)
+
+        id_sql = recipe["identifier"].replace(PURR_WHERE, where)
+
+        logger.debug(id_sql)
+
+        ids = fetch_id_list(conn_params, id_sql)
+
+        logger.debug(ids)
+
+        if recipe.get("adaptive_chunks", ADAPTIVE_CHUNKS):
+            chunked_ids = AdaptiveChunker(
+                ids, chunk_size, max_size=recipe.get("max_chunk_size")
+            )
+        else:
+            chunked_ids = chunk_ids(ids, chunk_size)
+
+        # an empty incremental export still writes its changes and watermark
+        if len(chunked_ids) == 0 and manifest is None and incremental is None:
+            msg = "Query returned zero hits"
+            logger.info(msg)
+            return msg
+
+        doc_batches = iter_selector_docs(
+            conn_params,
+            chunked_ids,
+            recipe,
+            fetch_size,
+            args.get("chunk_workers", 1),
+        )
+
+    serializer = get_serializer(args.get("json_engine"))
+    export_format = args.get("export_format") or "json"
+
+    # columnar formats fix their schema before the first batch
+    schema = None
+    if writers[export_format].columnar:
+        schema = doc_schema(describe_selector(conn_params, recipe), recipe)
+
+    # compressed as each batch is written (see compression.py)
+    writer_args = {
+        "export_format": export_format,
+        "serializer": serializer,
+        "schema": schema,
+        "compression": args.get("compression"),
+        "level": args.get("compression_level"),
+    }
+    output: ContextManager[Union[DocWriter, ShardedWriter]]
+    if manifest is None:
+        output = open_writer(out_file, **writer_args)
+    else:
+        well_table = recipe["prefixes"].get("w_", "well")
+        output = open_sharded_writer(out_file, manifest, writer_args, well_table)
 
-                    logger.info(f"assembled {len(json_data)} docs")
+    exported: set = set()
+    if incremental is not None:
+        well_table = recipe["prefixes"].get("w_", "well")
+        doc_batches = track_uwis(doc_batches, well_table, exported)
 
-                    for json_obj in json_data:
-                        json_str = json.dumps(json_obj, default=str)
-                        f.write(json_str + ",")
-                        docs_written += 1
+    progress = args.get("progress")
+    with output as writer:
+        for batches, json_data in enumerate(doc_batches, start=1):
+            logger.info(f"assembled {len(json_data)} docs")
+            # one buffer (and one write) per batch of docs
+            writer.write_batch(json_data)
+            if progress is not None:
+                progress(docs=writer.docs_written, batches=batches)
 
-        f.seek(f.tell() - 1, 0)  # Remove the last comma
-        f.write("]")
+    docs_written = writer.docs_written
 
     end_msg = f"json docs written: {docs_written}"
     logger.info(end_msg)
-    return {"message": end_msg, "out_file": out_file}
+    result = {"message": end_msg, "out_file": out_file}
+    if manifest is not None:
+        result["shards"] = len(manifest["shards"])
+        result["manifest"] = Path(out_file) / MANIFEST
+    if isinstance(chunked_ids, AdaptiveChunker):
+        logger.info(f"chunk sizes: {chunked_ids.sizes}")
+        result["chunk_sizes"] = chunked_ids.sizes
+    if incremental is not None:
+        if current_uwis is None:
+            # a full export: everything in scope was just exported
+            current_uwis = sorted(exported)
+        job = {
+            "repo_id": args["repo_id"],
+            "asset": args["asset"],
+            "uwi_list": args["uwi_list"],
+            "since": incremental["since"],
+            "watermark": watermark,
+            "export": Path(out_file).name,
+        }
+        changes = changes_manifest(
+            job, incremental["previous_uwis"], current_uwis, exported
+        )
+        if manifest is None:
+            changes_file = Path(f"{out_file}.changes.json")
+        else:
+            changes_file = Path(out_file) / "changes.json"
+        write_changes(changes_file, changes)
+        result["changes_manifest"] = changes_file
+        result["changes"] = {"watermark": watermark, "uwis": current_uwis}
+    return result
 
 
 async def selector(
-    repo_id: str, asset: str, export_file: str, uwi_list: str = List[str]
-) -> str:
+    repo_id: str,
+    asset: str,
+    export_file: str,
+    uwi_list: Optional[List[str]] = None,
+    strategy: Optional[str] = None,
+    export_format: str = "json",
+    compression: Optional[str] = None,
+    compression_level: Optional[int] = None,
+    shard_by: Optional[str] = None,
+    shard_size: Optional[int] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    use_cache: bool = True,
+    progress: Optional[Callable[..., None]] = None,
+) -> Union[str, Dict[str, Any]]:
     """Main entry point to collect data from a GeoGraphix project
 
     Args:
         repo_id (str): ID from a specific project
         asset (str): An asset (i.e. datatype) to query from project database
         export_file (str): Export file name with timestamp
-        uwi_list (str): List of UWI strings
+        uwi_list (Optional[List[str]]): List of UWI strings
+        strategy (Optional[str]): "chunked" or "keyset", default from recipe
+        export_format (str): "json", "ndjson", "parquet" or "arrow" (see writers.py)
+        compression (Optional[str]): "gzip", "zstd" or None (uncompressed)
+        compression_level (Optional[int]): codec level, None for its default
+        shard_by (Optional[str]): "docs", "bytes" or "uwi_hash" to write
+            shards to the export_file directory (see shards.py)
+        shard_size (Optional[int]): docs or bytes per shard, or shard count
+        resume (bool): continue the failed sharded export in export_file
+        incremental (bool): only export wells changed since the last
+            incremental export of this asset and uwi_list (see incremental.py)
+        use_cache (bool): reuse an identical export of the same repo state,
+            and cache this one (see cache.py)
+        progress (Optional[Callable[..., None]]): called with docs and
+            batches counters after each batch (see tasks.ProgressReporter)
 
     Returns:
-        str: A summary of the selector job--probably from export_json()
+        Union[str, Dict[str, Any]]: The job's result (message, out_file, ...),
+        or a message if the repo is unknown
     """
     db = next(get_db())
     repo = get_repo_by_id(db, repo_id)
@@ -158,22 +673,98 @@ async def selector(
     if repo is None:
         return "Query returned no results"
 
-    conn = repo.conn
-
-    recipe_path = Path(Path(__file__).resolve().parent, f"recipes/{asset}.py")
-    recipe = import_dict_from_file(recipe_path, "recipe")
+    conn = cast(dict, repo.conn)
+    set_conn_strategy(conn, cast(Optional[dict], repo.conn_strategy))
+
+    recipe = load_recipe(asset)
+
+    manifest = None
+    if resume:
+        manifest = load_resumable(out_file, repo_id, asset)
+    elif shard_by:
+        manifest = new_manifest(
+            repo_id,
+            asset,
+            export_format,
+            compression,
+            shard_by,
+            shard_size,
+            compression_level=compression_level,
+            uwi_list=uwi_list,
+            strategy=strategy,
+            incremental=incremental,
+        )
+
+    scope = watermark_scope(uwi_list)
+    incremental_args = None
+    if incremental:
+        db = next(get_db())
+        mark = get_export_watermark(db, repo_id, asset, scope)
+        db.close()
+        incremental_args = {
+            "since": mark.watermark if mark else None,
+            "previous_uwis": mark.uwis if mark else None,
+        }
+
+    # identical single-file exports of an unchanged repo are reused
+    fingerprint = None
+    if use_cache and EXPORT_CACHE and manifest is None and not incremental:
+        fingerprint = await async_wrap(repo_fingerprint)(repo.fs_path, conn, recipe)
+    if fingerprint is not None:
+        key, params = cache_key(
+            repo_id,
+            asset,
+            fingerprint,
+            uwi_list=uwi_list,
+            export_format=export_format,
+            compression=compression,
+            compression_level=compression_level,
+        )
+        db = next(get_db())
+        cached = cache_lookup(db, depot_path, key)
+        db.close()
+        if cached is not None and cached != out_file:
+            await async_wrap(link_or_copy)(cached, out_file)
+            msg = f"cache hit, export file is a copy of: {cached.name}"
+            logger.info(msg)
+            return {"message": msg, "out_file": out_file, "cached_from": cached.name}
 
     collection_args = {
         "recipe": recipe,
         "repo_id": repo_id,
+        "asset": asset,
         "conn": conn,
         "uwi_list": uwi_list,
         "out_file": out_file,
+        "strategy": strategy,
+        "export_format": export_format,
+        "compression": compression,
+        "compression_level": compression_level,
+        "manifest": manifest,
+        "incremental": incremental_args,
+        "progress": progress,
+        "chunk_workers": resolve_chunk_workers(
+            repo_id, (cast(Optional[dict], repo.conn_aux) or {}).get("ggx_host")
+        ),
     }
 
     async_collect_and_assemble_docs = async_wrap(collect_and_assemble_docs)
     result = await async_collect_and_assemble_docs(collection_args)
 
+    db = next(get_db())
+    update_conn_strategy(db, repo_id, get_conn_strategy(conn))
+    # only a finished export moves the watermark
+    if isinstance(result, dict) and "changes" in result:
+        changes = result.pop("changes")
+        upsert_export_watermark(
+            db, repo_id, asset, scope, changes["watermark"], changes["uwis"]
+        )
+    if fingerprint is not None and isinstance(result, dict):
+        await async_wrap(cache_store)(
+            db, depot_path, key, repo_id, asset, params, fingerprint, out_file
+        )
+    db.close()
+
     # print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@")
     # with open(result["out_file"], "r") as file:
     #     data = json.load(file)
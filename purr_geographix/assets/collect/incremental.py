@@ -0,0 +1,134 @@
+"""Incremental (watermark based) asset exports
+
+Each recipe lists the tables whose change dates mark a well as changed:
+
+    "changes": [("well", "uwi", "row_changed_date"), ...]
+
+An incremental export of (repo, asset, uwi filter) only selects wells with
+a change date at or after the watermark saved by the previous incremental
+export. The predicate goes into the identifier (and the keyset selector;
+chunk selectors only see the changed ids anyway):
+
+    w_uwi IN (SELECT uwi FROM well WHERE row_changed_date >= '...' UNION ...)
+
+The new watermark is the latest change date in those tables, read before
+any wells are selected, so anything changed during the export is picked up
+(again) next time. The first incremental export has no watermark yet and
+exports everything.
+
+Next to the export, a changes manifest (<export>.changes.json, or
+changes.json in a .shards directory) lists the wells that were added or
+updated, and the tombstones: wells the identifier returned last time but no
+longer does. A well whose child rows were only deleted has no new change
+date, so it is not re-exported.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from purr_geographix.core.sqlanywhere import db_stream
+from purr_geographix.core.logger import logger
+
+
+def watermark_scope(uwi_list: Optional[List[str]]) -> str:
+    """Key for the exports' uwi filter: each filter keeps its own watermark"""
+    return ",".join(uwi_list) if uwi_list else ""
+
+
+def sql_literal(value: Any) -> Optional[str]:
+    """A datetime (or whatever the driver returned) as a SQL string literal"""
+    if value is None:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def changed_clause(recipe: Dict[str, Any], since: str) -> str:
+    """Predicate for wells with any change on or after since (see above)
+
+    Args:
+        recipe (Dict[str, Any]): An asset recipe with "changes"
+        since (str): The previous watermark
+
+    Returns:
+        str: SQL predicate on w_uwi, for make_where_clause
+    """
+    literal = since.replace("'", "''")
+    selects = [
+        f"SELECT {uwi} FROM {table} WHERE {date} >= '{literal}'"
+        for table, uwi, date in recipe["changes"]
+    ]
+    return f"w_uwi IN ({' UNION '.join(selects)})"
+
+
+def latest_change(conn: Dict[str, Any], recipe: Dict[str, Any]) -> Optional[str]:
+    """The latest change date in the recipe's tables, i.e. the next watermark
+
+    Args:
+        conn (Dict[str, Any]): SQLAnywhere connection parameters
+        recipe (Dict[str, Any]): An asset recipe with "changes"
+
+    Returns:
+        Optional[str]: SQL literal, None if every table is empty
+    """
+    maxes = " UNION ALL ".join(
+        f"SELECT MAX({date}) AS changed FROM {table}"
+        for table, _, date in recipe["changes"]
+    )
+    sql = f"SELECT MAX(changed) AS watermark FROM ({maxes}) x"
+    rows = list(db_stream(conn, sql))
+    return sql_literal(rows[0]["watermark"]) if rows else None
+
+
+def track_uwis(
+    batches: Iterator[List[Dict[str, Any]]], well_table: str, uwis: Set[Any]
+) -> Iterator[List[Dict[str, Any]]]:
+    """Pass batches of docs through, adding each doc's uwi to uwis"""
+    for docs in batches:
+        uwis.update(doc.get(well_table, {}).get("uwi") for doc in docs)
+        yield docs
+
+
+def changes_manifest(
+    job: Dict[str, Any],
+    previous: Optional[List[str]],
+    current: List[str],
+    exported: Set[Any],
+) -> Dict[str, Any]:
+    """Describe what an incremental export changed
+
+    Args:
+        job (Dict[str, Any]): since, watermark and other job details to keep
+        previous (Optional[List[str]]): uwis at the last export (None if this
+            is the first, full export)
+        current (List[str]): uwis the identifier returns now
+        exported (Set[Any]): uwis of the docs written
+
+    Returns:
+        Dict[str, Any]: The manifest, with added/updated/deleted uwi lists
+        (empty for a full export)
+    """
+    manifest = {**job, "full": previous is None, "docs_wells": len(exported)}
+    if previous is None:
+        return {**manifest, "added": [], "updated": [], "deleted": []}
+
+    before, now = set(previous), set(current)
+    added = now - before
+    return {
+        **manifest,
+        "added": sorted(added),
+        "updated": sorted(exported - added),
+        "deleted": sorted(before - now),
+    }
+
+
+def write_changes(path: Union[str, Path], manifest: Dict[str, Any]) -> None:
+    """Write a changes manifest as JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    logger.info(
+        f"changes: {len(manifest['added'])} added, {len(manifest['updated'])} "
+        f"updated, {len(manifest['deleted'])} deleted"
+    )
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from purr_geographix.assets.collect.ragged import RaggedArray, lengths_to_offsets
 
 pd.set_option("display.max_colwidth", None)
 pd.set_option("display.max_rows", None)
@@ -11,75 +14,133 @@ def preserve_empty_lists(values: List[Any]) -> List[Any]:
 
 
 def flexible_agg(
-    df: pd.DataFrame, prefix_list: List[str], empty_list_cols: List[str] = []
-) -> pd.DataFrame:
+    df: pd.DataFrame,
+    prefix_list: List[str],
+    empty_list_cols: List[str] = [],
+    ragged: Optional[Dict[str, RaggedArray]] = None,
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     """Convenience template for defining dataframe-to-json aggregation. This is
     used where aggregating in SQL alone is problematic. It's basically just a
     GROUP BY w_uwi with flexible handling of other table prefixes.
     (the empty_list_cols is used by Petra, just ignore it.)
+
+    Prefixed columns are aggregated as lists per well without building Python
+    lists: each one comes back as a RaggedArray (see ragged.py) with a None
+    placeholder column in the DataFrame. Other columns take the first value.
     """
 
     def starts_with_any(col: str, prefixes: List[str]) -> bool:
         return any(col.startswith(prefix) for prefix in prefixes)
 
-    agg_columns = [col for col in df.columns if starts_with_any(col, prefix_list)]
+    ragged = dict(ragged or {})
 
-    agg_dict: dict[str, Any] = {}
-    for col in agg_columns:
-        if col in empty_list_cols:
-            agg_dict[col] = preserve_empty_lists
-        else:
-            agg_dict[col] = list
+    agg_columns = [col for col in df.columns if starts_with_any(col, prefix_list)]
 
     other_columns = [
         col for col in df.columns if col not in agg_columns and col != "w_uwi"
     ]
+
+    # rows of each well, in well (groupby) order
+    codes, uniques = pd.factorize(df["w_uwi"], sort=True)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    lengths = np.bincount(codes[order], minlength=len(uniques))
+    firsts = order[lengths_to_offsets(lengths)[:-1]]
+
+    if other_columns:
+        grouped = df.groupby("w_uwi", as_index=False).agg(
+            {col: "first" for col in other_columns}
+        )
+    else:
+        grouped = pd.DataFrame({"w_uwi": uniques})
+
+    for col in agg_columns:
+        if col in ragged:
+            rows = ragged[col]
+        else:
+            values = list(df[col])
+            if col in empty_list_cols:
+                values = preserve_empty_lists(values)
+            rows = RaggedArray.from_values(values)
+        ragged[col] = rows.take(order).group(lengths)
+        grouped[col] = None
+
     for col in other_columns:
-        agg_dict[col] = "first"
+        if col in ragged:
+            ragged[col] = ragged[col].take(firsts)
 
-    return df.groupby("w_uwi", as_index=False).agg(agg_dict)
+    return grouped[["w_uwi"] + agg_columns + other_columns], ragged
+
+
+# column prefixes aggregated into lists per well by each post_process step
+agg_prefixes: Dict[str, List[str]] = {
+    "ip_agg": ["t_"],
+    "production_agg": ["p_", "m_"],
+    "raster_log_agg": ["v_", "r_"],
+    "survey_agg": ["s_", "d_"],
+    "vector_log_agg": ["c_", "s_", "v_"],
+    "zone_agg": ["i_", "v_", "z_"],
+}
 
 
-def ip_agg(df: pd.DataFrame) -> pd.DataFrame:
+def ip_agg(
+    df: pd.DataFrame, ragged: Optional[Dict[str, RaggedArray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     return flexible_agg(
         df,
-        prefix_list=["t_"],
+        prefix_list=agg_prefixes["ip_agg"],
         # empty_list_cols=["p_treat"],
+        ragged=ragged,
     )
 
 
-def production_agg(df: pd.DataFrame) -> pd.DataFrame:
+def production_agg(
+    df: pd.DataFrame, ragged: Optional[Dict[str, RaggedArray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     return flexible_agg(
         df,
-        prefix_list=["p_", "m_"],
+        prefix_list=agg_prefixes["production_agg"],
+        ragged=ragged,
     )
 
 
-def raster_log_agg(df: pd.DataFrame) -> pd.DataFrame:
+def raster_log_agg(
+    df: pd.DataFrame, ragged: Optional[Dict[str, RaggedArray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     return flexible_agg(
         df,
-        prefix_list=["v_", "r_"],
+        prefix_list=agg_prefixes["raster_log_agg"],
+        ragged=ragged,
     )
 
 
-def survey_agg(df: pd.DataFrame) -> pd.DataFrame:
+def survey_agg(
+    df: pd.DataFrame, ragged: Optional[Dict[str, RaggedArray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     return flexible_agg(
         df,
-        prefix_list=["s_", "d_"],
+        prefix_list=agg_prefixes["survey_agg"],
+        ragged=ragged,
     )
 
 
-def vector_log_agg(df: pd.DataFrame) -> pd.DataFrame:
+def vector_log_agg(
+    df: pd.DataFrame, ragged: Optional[Dict[str, RaggedArray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     return flexible_agg(
         df,
-        prefix_list=["c_", "s_", "v_"],
+        prefix_list=agg_prefixes["vector_log_agg"],
+        ragged=ragged,
     )
 
 
-def zone_agg(df: pd.DataFrame) -> pd.DataFrame:
+def zone_agg(
+    df: pd.DataFrame, ragged: Optional[Dict[str, RaggedArray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, RaggedArray]]:
     return flexible_agg(
         df,
-        prefix_list=["i_", "v_", "z_"],
+        prefix_list=agg_prefixes["zone_agg"],
+        ragged=ragged,
     )
 
 
@@ -0,0 +1,134 @@
+"""Ragged (nested list) columns as flat values plus offsets
+
+A decoded LIST(...) column is a list of values per row, and flexible_agg turns
+that into a list of row lists per well. Holding those as Python lists means a
+list object per cell and a Python object per value, which adds up to millions
+of small objects for a big survey or zone export. A RaggedArray keeps one
+contiguous values array (float64, int64, bool or object), a null mask, and one
+offsets array per nesting level. Python lists are only built at serialization
+(tolist), one batch at a time.
+
+    rows:   [[1.0, 2.0], [], [3.0]]
+    values: [1.0, 2.0, 3.0]
+    offsets: [[0, 2, 2, 3]]
+
+    grouped by well (rows 0-1 and row 2):
+    [[[1.0, 2.0], []], [[3.0]]]
+    offsets: [[0, 2, 3], [0, 2, 2, 3]]
+"""
+
+from typing import Any, List, Optional
+import numpy as np
+
+
+def masked_list(values: np.ndarray, mask: Optional[np.ndarray]) -> List[Any]:
+    """Python objects from an array, None where mask is True"""
+    if mask is None or not mask.any():
+        return values.tolist()
+    out = values.astype(object)
+    out[mask] = None
+    return out.tolist()
+
+
+def lengths_to_offsets(lengths: np.ndarray) -> np.ndarray:
+    """[2, 0, 1] -> [0, 2, 2, 3]"""
+    return np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+
+class RaggedArray:
+    """Nested lists stored as flat values plus one offsets array per level.
+
+    offsets is ordered outermost first. Cell i of a level spans positions
+    offsets[k][i]:offsets[k][i + 1] of the next level (or of values, for the
+    innermost level). With no offsets, this is a plain column of values.
+
+    Args:
+        values (np.ndarray): Flat values of the innermost lists.
+        offsets (List[np.ndarray]): int64 offsets per level, outermost first.
+        nulls (Optional[np.ndarray]): True where a value is None.
+    """
+
+    __slots__ = ("values", "offsets", "nulls")
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        offsets: List[np.ndarray],
+        nulls: Optional[np.ndarray] = None,
+    ):
+        self.values = values
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @classmethod
+    def from_lengths(
+        cls,
+        values: np.ndarray,
+        lengths: np.ndarray,
+        positions: np.ndarray,
+        size: int,
+        nulls: Optional[np.ndarray] = None,
+    ) -> "RaggedArray":
+        """One list per row, where only the rows at positions have values.
+
+        Args:
+            values (np.ndarray): Flat values of all non-empty rows, in order.
+            lengths (np.ndarray): Value count for each row in positions.
+            positions (np.ndarray): Row numbers that have values.
+            size (int): Number of rows; the others get an empty list.
+            nulls (Optional[np.ndarray]): True where a value is None.
+        """
+        all_lengths = np.zeros(size, dtype=np.int64)
+        all_lengths[positions] = lengths
+        return cls(values, [lengths_to_offsets(all_lengths)], nulls)
+
+    @classmethod
+    def from_values(cls, values: List[Any]) -> "RaggedArray":
+        """A plain (object) column, i.e. list(series), to be grouped later"""
+        return cls(np.fromiter(values, dtype=object, count=len(values)), [])
+
+    def __len__(self) -> int:
+        if self.offsets:
+            return len(self.offsets[0]) - 1
+        return len(self.values)
+
+    def take(self, indices: np.ndarray) -> "RaggedArray":
+        """Select (and reorder) cells of the outermost level
+
+        Args:
+            indices (np.ndarray): Cell numbers, in the order wanted.
+        """
+        if not self.offsets:
+            nulls = None if self.nulls is None else self.nulls[indices]
+            return RaggedArray(self.values[indices], [], nulls)
+
+        bounds = self.offsets[0]
+        starts = bounds[:-1][indices]
+        lengths = np.diff(bounds)[indices]
+        outer = lengths_to_offsets(lengths)
+        # positions in the next level down covered by the selected cells
+        inner_indices = np.repeat(starts - outer[:-1], lengths) + np.arange(outer[-1])
+        inner = RaggedArray(self.values, self.offsets[1:], self.nulls).take(
+            inner_indices
+        )
+        return RaggedArray(inner.values, [outer] + inner.offsets, inner.nulls)
+
+    def group(self, lengths: np.ndarray) -> "RaggedArray":
+        """Nest consecutive cells into lists of the given lengths"""
+        return RaggedArray(
+            self.values, [lengths_to_offsets(lengths)] + self.offsets, self.nulls
+        )
+
+    def tolist(self) -> List[Any]:
+        """Materialize all cells as (nested) Python lists"""
+        items = masked_list(self.values, self.nulls)
+        for bounds in reversed(self.offsets):
+            edges = bounds.tolist()
+            items = [items[a:b] for a, b in zip(edges[:-1], edges[1:])]
+        return items
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the values, nulls and offsets arrays"""
+        total = self.values.nbytes + sum(o.nbytes for o in self.offsets)
+        return total + (0 if self.nulls is None else self.nulls.nbytes)
@@ -55,6 +55,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_completion", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "c_": "well_completion",
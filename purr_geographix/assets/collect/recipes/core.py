@@ -111,6 +111,12 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_core", "uwi", "row_changed_date"),
+        ("well_core_sample_anal", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "c_": "well_core",
@@ -165,6 +165,14 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_test", "uwi", "row_changed_date"),
+        ("well_test_pressure", "uwi", "row_changed_date"),
+        ("well_test_recovery", "uwi", "row_changed_date"),
+        ("well_test_flow", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "t_": "well_test",
@@ -93,6 +93,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_formation", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "f_": "well_formation",
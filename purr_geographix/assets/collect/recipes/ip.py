@@ -103,6 +103,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_test", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "t_": "well_test",
@@ -69,6 +69,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_perforation", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "p_": "well_perforation",
@@ -116,6 +116,12 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_cumulative_production", "uwi", "row_changed_date"),
+        ("gx_pden_vol_sum_by_month", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "p_": "well_cumulative_production",
@@ -103,6 +103,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("log_image_reg_log_section", "well_id", "update_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "v_": "log_depth_cal_vec",
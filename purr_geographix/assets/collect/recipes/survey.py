@@ -208,6 +208,14 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_dir_srvy", "uwi", "row_changed_date"),
+        ("well_dir_srvy_station", "uwi", "row_changed_date"),
+        ("well_dir_proposed_srvy", "uwi", "row_changed_date"),
+        ("well_dir_proposed_srvy_station", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "d_": "well_dir_srvy_station",
@@ -239,4 +247,5 @@ recipe = {
     },
     "post_process": "survey_agg",
     "chunk_size": 1000,
+    "id_transfer": "temp_table",
 }
@@ -91,6 +91,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("gx_well_curve", "wellid", "date_modified"),
+    ],
     "prefixes": {
         "w_": "well",
         "c_": "gx_well_curve",
@@ -100,4 +105,6 @@ recipe = {
     "post_process": "vector_log_agg",
     "xforms": {"v_curve_values": "decode_curve_values"},
     "chunk_size": 1000,
+    "fetch_size": 100,
+    "id_transfer": "temp_table",
 }
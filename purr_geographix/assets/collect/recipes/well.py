@@ -170,6 +170,11 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("legal_congress_loc", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "c_": "legal_congress_loc",
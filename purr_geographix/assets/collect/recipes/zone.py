@@ -113,6 +113,12 @@ identifier = f"""
 recipe = {
     "selector": selector,
     "identifier": identifier,
+    # (table, uwi column, change date column) for incremental exports
+    "changes": [
+        ("well", "uwi", "row_changed_date"),
+        ("well_zone_interval", "uwi", "row_changed_date"),
+        ("well_zone_intrvl_value", "uwi", "row_changed_date"),
+    ],
     "prefixes": {
         "w_": "well",
         "i_": "well_zone_interval",
@@ -1,15 +1,23 @@
 """FastAPI Routing for Assets"""
 
-import asyncio
+import hashlib
+import json
+import os
 import uuid
-from typing import Dict
+from typing import List, Sequence
 from enum import Enum
-from fastapi import APIRouter, HTTPException, status, Query, Path
+from fastapi import APIRouter, HTTPException, status, Query, Path, Request
 from pydantic import BaseModel
 
-from purr_geographix.assets.collect.handle_query import selector
+from purr_geographix.assets.collect.handle_query import load_recipe, selector
+from purr_geographix.assets.collect.cache import cache_summary
+from purr_geographix.assets.collect.compression import resolve_compression
+from purr_geographix.assets.collect.shards import load_resumable
+from purr_geographix.assets.collect.writers import check_export, export_ext, writers
 from purr_geographix.core.database import get_db
-from purr_geographix.core.crud import fetch_repo_ids
+from purr_geographix.core.crud import fetch_repo_ids, get_file_depot
+from purr_geographix.core.scheduler import scheduler
+from purr_geographix.core.tasks import ProgressReporter, task_store
 from purr_geographix.core.util import timestamp_filename
 import purr_geographix.core.schemas as schemas
 from purr_geographix.core.logger import logger
@@ -59,6 +67,38 @@ class AssetTypeEnum(str, Enum):
     ZONE = "zone"
 
 
+class StrategyEnum(str, Enum):
+    """Enums for asset selection strategies (see collect_and_assemble_docs)"""
+
+    CHUNKED = "chunked"
+    KEYSET = "keyset"
+
+
+class ExportFormatEnum(str, Enum):
+    """Enums for export file formats (see writers.py)"""
+
+    JSON = "json"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class CompressionEnum(str, Enum):
+    """Enums for export compression (see compression.py)"""
+
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+class ShardByEnum(str, Enum):
+    """Enums for splitting an export into shards (see shards.py)"""
+
+    DOCS = "docs"
+    BYTES = "bytes"
+    UWI_HASH = "uwi_hash"
+
+
 def parse_uwis(uwis: str | None) -> str | None:
     """Parse POSTed uwi string into a suitable SQLAnywhere SIMILAR TO clause.
     Split by commas or spaces, replace '*' with '%', joined to '|'
@@ -94,22 +134,70 @@ def parse_uwis(uwis: str | None) -> str | None:
 
 router = APIRouter()
 
-task_storage: Dict[str, schemas.AssetCollectionResponse] = {}
+
+def job_key(repo_id: str, asset: str, uwi_list: Sequence[str] | None, **options) -> str:
+    """Identify an export job: requests with the same key would write the same
+    export, so a duplicate attaches to the unfinished job instead (see
+    tasks.py, this works across workers).
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype)
+        uwi_list (Sequence[str] | None): From parse_uwis (order does not matter)
+        **options: Export options that change the output (not cache)
+
+    Returns:
+        str: sha256 hex key
+    """
+    uwis = sorted(set(uwi_list or []))
+    blob = json.dumps([repo_id, asset, uwis, options], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
 
 
 async def process_asset_collection(
-    task_id: str, repo_id: str, asset: str, export_file: str, uwi_list: str
+    task_id: str,
+    repo_id: str,
+    asset: str,
+    export_file: str,
+    uwi_list: List[str] | None,
+    strategy: str | None = None,
+    export_format: str = "json",
+    compression: str | None = None,
+    compression_level: int | None = None,
+    shard_by: str | None = None,
+    shard_size: int | None = None,
+    resume: bool = False,
+    incremental: bool = False,
+    use_cache: bool = True,
 ):
-    """Trigger selector and update task_storage"""
+    """Trigger selector and update the task store"""
+    progress = ProgressReporter(task_store, task_id)
     try:
-        task_storage[task_id].task_status = schemas.TaskStatus.IN_PROGRESS
-        res = await selector(repo_id, asset, export_file, uwi_list)
+        task_store.start(task_id)
+        res = await selector(
+            repo_id,
+            asset,
+            export_file,
+            uwi_list,
+            strategy,
+            export_format,
+            compression,
+            compression_level,
+            shard_by,
+            shard_size,
+            resume,
+            incremental,
+            use_cache,
+            progress,
+        )
         logger.info(res)
-        task_storage[task_id].task_message = res
-        task_storage[task_id].task_status = schemas.TaskStatus.COMPLETED
+        progress.flush()
+        message = res["message"] if isinstance(res, dict) else str(res)
+        task_store.finish(task_id, schemas.TaskStatus.COMPLETED, message, res)
         return res
     except Exception as e:  # pylint: disable=broad-except
-        task_storage[task_id].task_status = schemas.TaskStatus.FAILED
+        progress.flush()
+        task_store.finish(task_id, schemas.TaskStatus.FAILED, str(e))
         logger.error(f"Task failed for {task_id}: {str(e)}")
 
 
@@ -128,6 +216,7 @@ async def process_asset_collection(
     status_code=status.HTTP_202_ACCEPTED,
 )
 async def asset_collection(
+    request: Request,
     repo_id: str = Path(..., description="repo_id"),
     asset: AssetTypeEnum = Path(..., description="asset type"),
     uwi_query: str = Query(
@@ -136,40 +225,207 @@ async def asset_collection(
         description="Enter full or partial uwi(s); use * or % as wildcard."
         "Separate UWIs with spaces or commas. Leave blank to select all.",
     ),
+    strategy_query: StrategyEnum | None = Query(
+        None,
+        alias="strategy",
+        description="'chunked' runs an id query first, then queries wells in "
+        "chunks; 'keyset' pages through wells by uwi without the id query "
+        "(often faster to select all). Leave blank for the asset's default.",
+    ),
+    export_format_query: ExportFormatEnum = Query(
+        ExportFormatEnum.JSON,
+        alias="export_format",
+        description="'json' writes one JSON array; 'ndjson' writes one doc per "
+        "line, which can be streamed or split while (or after) it is written. "
+        "'parquet' and 'arrow' (IPC) write typed columns: a struct per table "
+        "and lists for aggregated rows (these need pyarrow installed).",
+    ),
+    compression_query: CompressionEnum | None = Query(
+        None,
+        alias="compression",
+        description="Compress the export as it is written: 'gzip' or 'zstd' "
+        "(json/ndjson get a .gz/.zst extension; parquet and arrow use the "
+        "codec inside the file). Leave blank for the server default.",
+    ),
+    compression_level: int | None = Query(
+        None,
+        ge=1,
+        le=22,
+        description="Codec level: gzip 1-9, zstd 1-22. Leave blank for the "
+        "codec's default.",
+    ),
+    shard_by_query: ShardByEnum | None = Query(
+        None,
+        alias="shard_by",
+        description="Write a directory of shards plus a manifest.json instead "
+        "of one file: a new shard every shard_size 'docs' or 'bytes', or "
+        "shard_size shards by 'uwi_hash'. Leave blank for a single file.",
+    ),
+    shard_size: int = Query(
+        None,
+        ge=1,
+        description="Docs or bytes per shard, or the number of uwi_hash "
+        "shards. Leave blank for the server default.",
+    ),
+    resume: str = Query(
+        None,
+        description="Name of a failed docs/bytes sharded export (the .shards "
+        "directory) to continue after its last complete shard. It keeps the "
+        "original options; the others here are ignored.",
+    ),
+    incremental: bool = Query(
+        False,
+        description="Only export wells changed since the last incremental "
+        "export of this asset and uwi filter (the first one exports all), and "
+        "write a .changes.json listing added, updated and deleted wells.",
+    ),
+    cache: bool = Query(
+        True,
+        description="Reuse the file of an identical export if the repo has "
+        "not changed since. Set false to force a fresh export.",
+    ),
+    priority: schemas.JobPriority = Query(
+        schemas.JobPriority.NORMAL,
+        description="Queued jobs run high before normal before low, taking "
+        "turns between repos and users within each priority.",
+    ),
 ):
     """Query a Repo for Asset data"""
     RepoId.validate_repo_id(repo_id)
     asset = asset.value
-
+    strategy = strategy_query.value if strategy_query else None
+    export_format = export_format_query.value
+    compression, compression_level = resolve_compression(
+        compression_query.value if compression_query else None,
+        compression_level,
+        writers[export_format].codecs,
+    )
     uwi_list = parse_uwis(uwi_query)
+    shard_by = shard_by_query.value if shard_by_query else None
+
+    if resume:
+        if os.path.basename(resume) != resume:
+            raise HTTPException(status_code=400, detail=f"Invalid resume: {resume}")
+        db = next(get_db())
+        file_depot = get_file_depot(db)
+        db.close()
+        if file_depot is None:
+            raise HTTPException(status_code=500, detail="file_depot is not set")
+        try:
+            manifest = load_resumable(os.path.join(file_depot, resume), repo_id, asset)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        export_format = manifest["export_format"]
+        compression = manifest["compression"]
+        compression_level = manifest["compression_level"]
+        uwi_list = manifest["uwi_list"]
+        strategy = manifest["strategy"]
+        shard_by = manifest["shard_by"]
+        shard_size = manifest["shard_size"]
+        incremental = False
+
+    try:
+        check_export(export_format, compression, compression_level)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    if incremental and "changes" not in load_recipe(asset):
+        raise HTTPException(
+            status_code=400, detail=f"{asset} does not support incremental exports"
+        )
+
+    key = job_key(
+        repo_id,
+        asset,
+        uwi_list,
+        strategy=strategy,
+        export_format=export_format,
+        compression=compression,
+        compression_level=compression_level,
+        shard_by=shard_by,
+        shard_size=shard_size,
+        resume=resume,
+        incremental=incremental,
+    )
 
     task_id = str(uuid.uuid4())
 
-    export_file = timestamp_filename(repo_id=repo_id, asset=asset)
+    if resume:
+        export_file = resume
+    elif shard_by:
+        export_file = timestamp_filename(repo_id=repo_id, asset=asset, ext="shards")
+    else:
+        export_file = timestamp_filename(
+            repo_id=repo_id, asset=asset, ext=export_ext(export_format, compression)
+        )
 
-    new_collect = schemas.AssetCollectionResponse(
-        id=task_id,
+    new_collect = task_store.create(
+        task_id,
+        "asset",
+        f"export file (pending): {export_file}",
+        job_key=key,
         repo_id=repo_id,
         asset=asset,
         uwi_list=uwi_list,
-        task_status=schemas.TaskStatus.PENDING,
-        task_message=f"export file (pending): {export_file}",
     )
-    task_storage[task_id] = new_collect
+    if new_collect["id"] != task_id:
+        # i.e. a retry: same task_id, same export file
+        logger.info(f"attached to unfinished task {new_collect['id']}")
+        return new_collect
+
+    if scheduler.full():
+        message = f"{scheduler.queued} jobs are already queued, try again later"
+        task_store.finish(task_id, schemas.TaskStatus.FAILED, message)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=message,
+            headers={"Retry-After": "60"},
+        )
 
-    # noinspection PyAsyncCall
-    asyncio.create_task(
-        process_asset_collection(
+    # runs once the scheduler has a free worker (see scheduler.py)
+    position = scheduler.submit(
+        task_id,
+        lambda: process_asset_collection(
             task_id,
             repo_id,
             asset,
             export_file,
             uwi_list,
-        )
+            strategy,
+            export_format,
+            compression,
+            compression_level,
+            shard_by,
+            shard_size,
+            bool(resume),
+            incremental,
+            cache,
+        ),
+        priority=priority.value,
+        repo=repo_id,
+        user=request.client.host if request.client else "",
     )
+    new_collect["queue_position"] = position or None
     return new_collect
 
 
+@router.get(
+    "/asset/cache",
+    response_model=schemas.ExportCacheStats,
+    summary="Export cache size and hit/miss counts",
+    description=(
+        "Identical exports of an unchanged repo reuse an earlier export file. "
+        "Hits, misses and evictions are counted since this worker started."
+    ),
+)
+async def get_export_cache_stats():
+    """Export cache size and hit/miss counts"""
+    db = next(get_db())
+    summary = cache_summary(db)
+    db.close()
+    return summary
+
+
 @router.get(
     "/asset/status/{task_id}",
     response_model=schemas.AssetCollectionResponse,
@@ -177,12 +433,14 @@ async def asset_collection(
     description=(
         "An assect collection job may take several minutes, so use the task_id "
         "returned by the original POST to (periodically) check the job status. "
-        "Status values are: pending, in_progress, completed or failed. Query "
-        "results will be written to the file_depot directory."
+        "Status values are: pending, in_progress, completed or failed. A "
+        "pending job's queue_position is its place in the queue (1 = next). "
+        "Query results will be written to the file_depot directory."
     ),
 )
 async def get_asset_collect_status(task_id: str):
     """Check status of a /asset/{repo_id}/{asset} job using the task_id"""
-    if task_id not in task_storage:
+    task = task_store.get(task_id)
+    if task is None or task["kind"] != "asset":
         raise HTTPException(status_code=404, detail="Asset collection task not found")
-    return task_storage[task_id]
+    return task
@@ -0,0 +1,101 @@
+"""JSON serializers for exported asset docs
+
+Every chunk of docs is encoded into one buffer (docs separated by "," or a
+newline, see writers.py) and written with a single write. Pick an engine
+with PURR_JSON_ENGINE:
+
+    json    stdlib json with the C encoder (default). The bytes are identical
+            to json.dumps(doc, default=str) per doc, as exported since v0.1.
+    orjson  orjson, if installed (pip install purr_geographix[orjson]). NumPy
+            values, Timestamps and NaN are handled natively, so it is several
+            times faster, but the output is not byte-identical: no spaces
+            after separators, non-ASCII kept as UTF-8, NaN as null and
+            Timestamps in ISO 8601 ("T" separator).
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Type
+import numpy as np
+import pandas as pd
+
+from purr_geographix.core.logger import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+JSON_ENGINE = os.environ.get("PURR_JSON_ENGINE", "json")
+
+
+class JsonSerializer:
+    """stdlib json, identical to json.dumps(doc, default=str)
+
+    One encoder is reused for every doc rather than building one per
+    json.dumps call.
+    """
+
+    name = "json"
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(default=str)
+
+    def encode_batch(self, docs: List[Dict[str, Any]], sep: bytes = b",") -> bytes:
+        """Encode docs as JSON joined by sep (no enclosing brackets)"""
+        # ensure_ascii: the output is pure ASCII
+        joiner = sep.decode("ascii")
+        return joiner.join(map(self._encoder.encode, docs)).encode("ascii")
+
+
+def orjson_default(o: Any) -> Any:
+    """Types orjson does not handle natively"""
+    if isinstance(o, pd.Timestamp):
+        return None if pd.isna(o) else o.isoformat()
+    if isinstance(o, np.generic):
+        return o.item()
+    if o is pd.NA:
+        return None
+    return str(o)
+
+
+class OrjsonSerializer:
+    """orjson with native NumPy support (not byte-identical, see above)"""
+
+    name = "orjson"
+
+    def __init__(self):
+        self._option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def encode_batch(self, docs: List[Dict[str, Any]], sep: bytes = b",") -> bytes:
+        """Encode docs as JSON joined by sep (no enclosing brackets)"""
+        dumps, option = orjson.dumps, self._option
+        return sep.join(
+            dumps(doc, default=orjson_default, option=option) for doc in docs
+        )
+
+
+serializers: Dict[str, Type] = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+}
+
+
+def get_serializer(engine: str | None = None):
+    """Create the serializer for an engine name (default: PURR_JSON_ENGINE)
+
+    Args:
+        engine (str | None): "json" or "orjson"
+
+    Returns:
+        JsonSerializer | OrjsonSerializer: falls back to json if orjson is
+        not installed or the engine is unknown.
+    """
+    engine = engine or JSON_ENGINE
+    if engine == "orjson" and orjson is None:
+        logger.warning("PURR_JSON_ENGINE=orjson but orjson is not installed")
+        engine = "json"
+    if engine not in serializers:
+        logger.warning(f"unknown json engine: {engine}, using json")
+        engine = "json"
+    return serializers[engine]()
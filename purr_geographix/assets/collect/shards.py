@@ -0,0 +1,360 @@
+"""Sharded export output with a manifest
+
+Instead of one export file, a sharded export is a directory
+(<repo>_<ts>_<asset>.shards) of part-00000.<ext>, part-00001.<ext>, ...
+plus manifest.json, so downstream loaders can fan out across shards. Each
+shard is a complete file of its export_format (and compression). Pick how
+docs are split with shard_by:
+
+    docs      Start a new shard after shard_size docs.
+    bytes     Start a new shard once a shard reaches shard_size bytes on
+              disk (checked after each batch, so shards run a bit over).
+    uwi_hash  shard_size shards, all written at once; each doc goes to
+              crc32(uwi) % shard_size, so a well always lands in the same
+              shard.
+
+A shard never splits a well: docs/bytes shards only rotate between wells.
+
+manifest.json is rewritten (atomically) every time a shard is completed, so
+it always lists the complete shards with their doc count, size, sha256,
+first/last uwi and the time each was written. "complete" is only true once
+the job is done.
+
+Rotated (docs/bytes) exports select wells in w_uwi order, which makes the
+manifest's "last_uwi" (the last well of the last complete shard) a resume
+point: resuming a failed export deletes its unfinished shard and selects
+only wells after last_uwi. uwi_hash exports cannot be resumed, since every
+shard is open until the end, and neither can incremental exports.
+"""
+
+import hashlib
+import io
+import json
+import os
+import zlib
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union, cast
+
+from purr_geographix.assets.collect.writers import export_ext, open_writer
+from purr_geographix.core.logger import logger
+
+MANIFEST = "manifest.json"
+
+# default shard_size per shard_by
+SHARD_DOCS = int(os.environ.get("PURR_SHARD_DOCS", "100000"))
+SHARD_BYTES = int(os.environ.get("PURR_SHARD_BYTES", "268435456"))
+SHARD_COUNT = int(os.environ.get("PURR_SHARD_COUNT", "8"))
+
+shard_sizes: Dict[str, int] = {
+    "docs": SHARD_DOCS,
+    "bytes": SHARD_BYTES,
+    "uwi_hash": SHARD_COUNT,
+}
+
+
+def now() -> str:
+    """Local time as an ISO 8601 string (seconds)"""
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class HashingFile(io.RawIOBase):
+    """Pass writes through to a binary file, counting bytes and hashing them
+
+    Args:
+        f (BinaryIO): The shard file, opened for binary writing (left open).
+    """
+
+    def __init__(self, f: BinaryIO):
+        super().__init__()
+        self.f = f
+        self.bytes_written = 0
+        self.sha256 = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        view = memoryview(b)
+        self.sha256.update(view)
+        self.f.write(view)
+        self.bytes_written += view.nbytes
+        return view.nbytes
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def flush(self) -> None:
+        if not self.f.closed:
+            self.f.flush()
+
+
+class Shard:
+    """One open shard file and its writer (see open_writer)
+
+    Args:
+        path (Path): Shard file path.
+        writer_args (Dict[str, Any]): open_writer's other arguments.
+    """
+
+    def __init__(self, path: Path, writer_args: Dict[str, Any]):
+        self.path = path
+        self._stack = ExitStack()
+        self.sink = HashingFile(self._stack.enter_context(open(path, "wb")))
+        # a write-only binary file, though not typed as BinaryIO
+        sink = cast(BinaryIO, self.sink)
+        self.writer = self._stack.enter_context(open_writer(sink, **writer_args))
+        self.info: Dict[str, Any] = {
+            "file": path.name,
+            "docs": 0,
+            "first_uwi": None,
+            "last_uwi": None,
+            "started": now(),
+        }
+
+    def write(self, docs: List[Dict[str, Any]], uwis: List[Any]) -> None:
+        """Append docs (uwis are their well ids, in the same order)"""
+        if not docs:
+            return
+        self.writer.write_batch(docs)
+        if self.info["first_uwi"] is None:
+            self.info["first_uwi"] = uwis[0]
+        self.info["last_uwi"] = uwis[-1]
+        self.info["docs"] += len(docs)
+
+    def close(self) -> Dict[str, Any]:
+        """Finish the shard file and return its manifest entry"""
+        self._stack.close()
+        self.info["bytes"] = self.sink.bytes_written
+        self.info["sha256"] = self.sink.sha256.hexdigest()
+        self.info["finished"] = now()
+        return self.info
+
+    def abort(self, exc: BaseException) -> None:
+        """Close the file as written so far (see open_writer)"""
+        self._stack.__exit__(type(exc), exc, exc.__traceback__)
+
+
+class ShardedWriter:
+    """Write batches of docs across shard files and keep manifest.json current
+
+    Args:
+        out_dir (Path): The .shards directory (created if missing).
+        manifest (Dict[str, Any]): The job's manifest; any shards it already
+            lists (i.e. when resuming) are kept.
+        writer_args (Dict[str, Any]): open_writer's arguments (other than the
+            file), shared by every shard.
+        well_table (str): Table (i.e. "well") of each doc holding its "uwi".
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        manifest: Dict[str, Any],
+        writer_args: Dict[str, Any],
+        well_table: str = "well",
+    ):
+        self.out_dir = out_dir
+        self.manifest = manifest
+        self.writer_args = writer_args
+        self.well_table = well_table
+        self.shard_by = manifest["shard_by"]
+        self.shard_size = manifest["shard_size"]
+        self.ext = export_ext(manifest["export_format"], manifest["compression"])
+        self.docs_written = 0
+        self._next_index = len(manifest["shards"])
+        self._open: Dict[int, Shard] = {}
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self.write_manifest()
+
+    def uwi(self, doc: Dict[str, Any]) -> Any:
+        """A doc's well id"""
+        return doc.get(self.well_table, {}).get("uwi")
+
+    def _new_shard(self, index: int) -> Shard:
+        path = self.out_dir / f"part-{index:05d}.{self.ext}"
+        return Shard(path, self.writer_args)
+
+    def _complete(self, shard: Shard) -> None:
+        info = shard.close()
+        self.manifest["shards"].append(info)
+        self.manifest["docs"] += info["docs"]
+        if self.shard_by != "uwi_hash":
+            self.manifest["last_uwi"] = info["last_uwi"]
+        self.write_manifest()
+        logger.info(f"shard complete: {info['file']} ({info['docs']} docs)")
+
+    def _is_full(self, shard: Shard) -> bool:
+        if self.shard_by == "bytes":
+            return shard.sink.bytes_written >= self.shard_size
+        return shard.info["docs"] >= self.shard_size
+
+    def write_batch(self, docs: List[Dict[str, Any]]) -> None:
+        """Route a batch of docs to their shards"""
+        if not docs:
+            return
+        uwis = [self.uwi(doc) for doc in docs]
+        if self.shard_by == "uwi_hash":
+            self._write_hashed(docs, uwis)
+        else:
+            self._write_rotated(docs, uwis)
+        self.docs_written += len(docs)
+
+    def _write_hashed(self, docs: List[Dict[str, Any]], uwis: List[Any]) -> None:
+        buckets: Dict[int, List[int]] = {}
+        for i, uwi in enumerate(uwis):
+            key = zlib.crc32(str(uwi).encode("utf-8")) % self.shard_size
+            buckets.setdefault(key, []).append(i)
+        for key in sorted(buckets):
+            if key not in self._open:
+                self._open[key] = self._new_shard(key)
+            rows = buckets[key]
+            self._open[key].write([docs[i] for i in rows], [uwis[i] for i in rows])
+
+    def _write_rotated(self, docs: List[Dict[str, Any]], uwis: List[Any]) -> None:
+        start = 0
+        while start < len(docs):
+            shard = self._open.get(0)
+            if shard is None:
+                shard = self._open[0] = self._new_shard(self._next_index)
+                self._next_index += 1
+            if self._is_full(shard):
+                # the rest of the shard's last well still goes in this shard
+                end = start
+                while end < len(docs) and uwis[end] == shard.info["last_uwi"]:
+                    end += 1
+                if end == start:
+                    self._complete(self._open.pop(0))
+                    continue
+            elif self.shard_by == "docs":
+                end = min(len(docs), start + self.shard_size - shard.info["docs"])
+            else:
+                end = len(docs)
+            shard.write(docs[start:end], uwis[start:end])
+            start = end
+
+    def close(self) -> None:
+        """Complete all open shards and mark the manifest complete"""
+        for key in sorted(self._open):
+            self._complete(self._open.pop(key))
+        self.manifest["shards"].sort(key=lambda info: info["file"])
+        self.manifest["complete"] = True
+        self.manifest["finished"] = now()
+        self.write_manifest()
+
+    def abort(self, exc: BaseException) -> None:
+        """Leave unfinished shards as written; they are not in the manifest"""
+        for shard in self._open.values():
+            shard.abort(exc)
+        self._open.clear()
+        self.write_manifest()
+
+    def write_manifest(self) -> None:
+        """Replace manifest.json (write to a temp file, then rename)"""
+        self.manifest["updated"] = now()
+        tmp = self.out_dir / f"{MANIFEST}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, default=str)
+        os.replace(tmp, self.out_dir / MANIFEST)
+
+
+def new_manifest(
+    repo_id: str,
+    asset: str,
+    export_format: str,
+    compression: Optional[str],
+    shard_by: str,
+    shard_size: Optional[int] = None,
+    **job: Any,
+) -> Dict[str, Any]:
+    """Manifest for a new sharded export.
+
+    Args:
+        repo_id (str): ID from a specific project
+        asset (str): An asset (i.e. datatype)
+        export_format (str): A key of writers.writers
+        compression (Optional[str]): "gzip", "zstd" or None
+        shard_by (str): "docs", "bytes" or "uwi_hash"
+        shard_size (Optional[int]): see shard_by, default from shard_sizes
+        **job: Other request options to keep (i.e. uwi_list, strategy), so a
+            resumed export runs the same way.
+    """
+    return {
+        "repo_id": repo_id,
+        "asset": asset,
+        "export_format": export_format,
+        "compression": compression,
+        "shard_by": shard_by,
+        "shard_size": shard_size or shard_sizes[shard_by],
+        **job,
+        "started": now(),
+        "finished": None,
+        "complete": False,
+        "docs": 0,
+        "last_uwi": None,
+        "shards": [],
+    }
+
+
+def load_resumable(
+    out_dir: Union[str, Path], repo_id: str, asset: str
+) -> Dict[str, Any]:
+    """Read the manifest of a failed sharded export, checking it can resume.
+
+    Raises:
+        ValueError: no manifest, a different repo/asset, already complete,
+            split by uwi_hash, or incremental.
+    """
+    path = Path(out_dir) / MANIFEST
+    if not path.is_file():
+        raise ValueError(f"no sharded export manifest: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if (manifest["repo_id"], manifest["asset"]) != (repo_id, asset):
+        raise ValueError(f"{path} is not a {asset} export of {repo_id}")
+    if manifest["complete"]:
+        raise ValueError(f"{path} is already complete")
+    if manifest["shard_by"] == "uwi_hash":
+        raise ValueError("uwi_hash exports cannot be resumed")
+    if manifest.get("incremental"):
+        # its changes manifest would only cover the resumed wells
+        raise ValueError("incremental exports cannot be resumed")
+    return manifest
+
+
+def remove_unfinished_shards(out_dir: Path, manifest: Dict[str, Any]) -> None:
+    """Delete shard files that are not listed in the manifest"""
+    listed = {info["file"] for info in manifest["shards"]}
+    for path in out_dir.glob("part-*"):
+        if path.name not in listed:
+            logger.info(f"removing unfinished shard: {path}")
+            path.unlink()
+
+
+@contextmanager
+def open_sharded_writer(
+    out_dir: Union[str, Path],
+    manifest: Dict[str, Any],
+    writer_args: Dict[str, Any],
+    well_table: str = "well",
+) -> Iterator[ShardedWriter]:
+    """Yield a ShardedWriter; like open_writer, shards are only completed (and
+    the manifest marked complete) if the block completes.
+
+    Args:
+        out_dir (Union[str, Path]): The .shards directory.
+        manifest (Dict[str, Any]): From new_manifest or load_resumable.
+        writer_args (Dict[str, Any]): open_writer's arguments (but the file).
+        well_table (str): Table (i.e. "well") of each doc holding its "uwi".
+    """
+    out_dir = Path(out_dir)
+    if out_dir.is_dir():
+        remove_unfinished_shards(out_dir, manifest)
+    writer = ShardedWriter(out_dir, manifest, writer_args, well_table)
+    try:
+        yield writer
+    except BaseException as e:
+        writer.abort(e)
+        raise
+    writer.close()
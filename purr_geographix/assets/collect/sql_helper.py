@@ -1,26 +1,105 @@
+import os
+import re
 import pyodbc
-from typing import Dict, Union, List, Literal, Tuple, TypeAlias
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeAlias,
+    Union,
+)
 
 from purr_geographix.assets.collect.xformer import PURR_WHERE
 
+# adaptive chunk sizing targets, per chunk selector (see AdaptiveChunker)
+CHUNK_TARGET_BYTES = int(os.environ.get("PURR_CHUNK_TARGET_BYTES", "268435456"))
+CHUNK_TARGET_SECONDS = float(os.environ.get("PURR_CHUNK_TARGET_SECONDS", "30"))
 
-def make_where_clause(uwi_list: List[str]):
+# connection-local temp table used by the "temp_table" id_transfer strategy
+PURR_ID_TABLE = "purr_ids"
+
+
+def make_where_clause(uwi_list: List[str], changed: Optional[str] = None):
     """Construct the UWI-centric part of a WHERE clause containing UWIs. The
     WHERE clause will start: "WHERE 1=1 " to which we append:
-    "AND u_uwi LIKE '0123%' OR u_uwi LIKE '4567'"
+    "AND (u_uwi LIKE '0123%' OR u_uwi LIKE '4567')"
 
     Args:
         uwi_list (List[str]): List of UWI strings with optional wildcard chars
+        changed (Optional[str]): Predicate for changed wells only, from
+            incremental.changed_clause
     """
     col = "w_uwi"
     clause = "WHERE 1=1"
     if uwi_list:
         uwis = [f"{col} LIKE '{uwi}'" for uwi in uwi_list]
-        clause += " AND " + " OR ".join(uwis)
+        clause += " AND (" + " OR ".join(uwis) + ")"
+    if changed:
+        clause += f" AND {changed}"
 
     return clause
 
 
+def make_keyset_clause(
+    uwi_list: List[str],
+    last_uwi: Optional[str],
+    changed: Optional[str] = None,
+    bound_uwi: Optional[str] = None,
+) -> str:
+    """Like make_where_clause, but also skip every w_uwi up to and including
+    last_uwi (and past bound_uwi) and sort by w_uwi, for keyset pagination
+    over a selector.
+
+    Args:
+        uwi_list (List[str]): List of UWI strings with optional wildcard chars
+        last_uwi (Optional[str]): Last w_uwi of the previous page (or None)
+        changed (Optional[str]): See make_where_clause
+        bound_uwi (Optional[str]): Last w_uwi of this page, see
+            make_keyset_bound (or None for no upper bound)
+    """
+    clause = make_where_clause(uwi_list, changed)
+    if last_uwi is not None:
+        escaped = str(last_uwi).replace("'", "''")
+        clause += f" AND w_uwi > '{escaped}'"
+    if bound_uwi is not None:
+        escaped = str(bound_uwi).replace("'", "''")
+        clause += f" AND w_uwi <= '{escaped}'"
+    return clause + " ORDER BY w_uwi"
+
+
+def make_keyset_bound(
+    uwi_list: List[str],
+    last_uwi: Optional[str],
+    page_wells: int,
+    changed: Optional[str] = None,
+) -> str:
+    """SQL for the extent of the next keyset page: the first page_wells uwis
+    of the well table after last_uwi. It returns one row, bound_uwi (the last
+    of those uwis, NULL if there are none) and wells (how many there are).
+
+    Only the well table is read, so the selector itself runs once per page on
+    a closed w_uwi range (see make_keyset_clause) instead of being re-run and
+    abandoned after page_wells wells.
+
+    Args:
+        uwi_list (List[str]): List of UWI strings with optional wildcard chars
+        last_uwi (Optional[str]): Last w_uwi of the previous page (or None)
+        page_wells (int): Number of wells per page
+        changed (Optional[str]): See make_where_clause
+    """
+    where = make_keyset_clause(uwi_list, last_uwi, changed)
+    return (
+        "SELECT MAX(w_uwi) AS bound_uwi, COUNT(*) AS wells FROM ("
+        f"SELECT TOP {int(page_wells)} w_uwi "
+        f"FROM (SELECT uwi AS w_uwi FROM well) wells {where}"
+        ") page"
+    )
+
+
 def make_id_in_clauses(ids: Union[List[Union[str, int]], None]) -> str:
     """Generate a SQL WHERE clause for filtering by ids"""
     clause = "WHERE 1=1 "
@@ -33,17 +112,80 @@ def make_id_in_clauses(ids: Union[List[Union[str, int]], None]) -> str:
     return clause
 
 
+def make_id_table_clause() -> str:
+    """Generate a SQL WHERE clause that filters by ids in PURR_ID_TABLE. The
+    statement text is identical for every chunk, unlike make_id_in_clauses.
+    """
+    return f"WHERE 1=1 AND w_uwi IN (SELECT id FROM {PURR_ID_TABLE})"
+
+
+def load_id_table(cursor: pyodbc.Cursor, ids: List[Union[str, int]]) -> None:
+    """Fill the connection-local id temp table with one chunk of ids.
+
+    The table is declared the first time a (pooled) connection sees it and
+    just emptied after that. NOT TRANSACTIONAL skips the rollback log.
+
+    Args:
+        cursor (pyodbc.Cursor): Cursor on the connection that will run the
+            selector.
+        ids (List[Union[str, int]]): Chunk of ids (usually uwis)
+    """
+    try:
+        cursor.execute(
+            f"DECLARE LOCAL TEMPORARY TABLE {PURR_ID_TABLE} "
+            "(id VARCHAR(256) NOT NULL PRIMARY KEY) NOT TRANSACTIONAL"
+        )
+    except pyodbc.Error as e:  # pylint: disable=c-extension-no-member
+        if not re.search(r"already exists", str(e)):
+            raise e
+        cursor.execute(f"DELETE FROM {PURR_ID_TABLE}")
+
+    # compound ids may repeat (see chunk_ids)
+    unique_ids = [(str(i),) for i in dict.fromkeys(ids)]
+    cursor.fast_executemany = True
+    cursor.executemany(f"INSERT INTO {PURR_ID_TABLE} (id) VALUES (?)", unique_ids)
+
+
+def create_selector(
+    ids: List[Union[str, int]], recipe: Dict[str, str]
+) -> Tuple[str, Optional[List[Union[str, int]]]]:
+    """Create a single SQL selector for one chunk of ids (see create_selectors)
+
+    Returns:
+        (selector sql, ids to load or None)
+    """
+    ordered = recipe.get("post_process") or recipe.get("ordered")
+    order_by = " ORDER BY w_uwi" if ordered else ""
+
+    if recipe.get("id_transfer") == "temp_table":
+        clause = make_id_table_clause()
+        return recipe["selector"].replace(PURR_WHERE, clause + order_by), ids
+
+    # in_clause = make_id_in_clauses(recipe["identifier_keys"], chunk)
+    in_clause = make_id_in_clauses(ids)
+    return recipe["selector"].replace(PURR_WHERE, in_clause + order_by), None
+
+
 def create_selectors(
-    chunked_ids: List[List[Union[str, int]]], recipe: Dict[str, str]
-) -> List[str]:
-    """Create a list of SQL selectors based on recipe and chunked ids"""
-    selectors = []
-    for ids in chunked_ids:
-        # in_clause = make_id_in_clauses(recipe["identifier_keys"], chunk)
-        in_clause = make_id_in_clauses(ids)
-        select_sql = recipe["selector"].replace(PURR_WHERE, in_clause)
-        selectors.append(select_sql)
-    return selectors
+    chunked_ids: Iterable[List[Union[str, int]]], recipe: Dict[str, str]
+) -> Iterator[Tuple[str, Optional[List[Union[str, int]]]]]:
+    """Create SQL selectors based on recipe and chunked ids.
+
+    Recipes with a post_process step get ORDER BY w_uwi so that a streamed
+    result never interleaves rows from different wells. So do recipes with
+    "ordered": True, which is set for sharded exports (see shards.py).
+
+    By default each selector inlines its ids as a literal IN list. Recipes
+    with "id_transfer": "temp_table" get one shared selector that joins to
+    PURR_ID_TABLE instead; the ids are returned alongside so the caller can
+    load_id_table on the same connection before executing it.
+
+    This is lazy so that chunked_ids can be an AdaptiveChunker.
+
+    Returns:
+        Iterator of (selector sql, ids to load or None)
+    """
+    return (create_selector(ids, recipe) for ids in chunked_ids)
 
 
 ColTypes: TypeAlias = Union[
@@ -95,18 +237,10 @@ def chunk_ids(ids, chunk):
     :param chunk: The preferred batch size to process in a single query
     :return: List of id lists
     """
-    id_groups = {}
-
-    for item in ids:
-        left = str(item).split("-", maxsplit=1)[0]
-        if left not in id_groups:
-            id_groups[left] = []
-        id_groups[left].append(item)
-
     result = []
-    current_subarray = []
+    current_subarray: List[Union[str, int]] = []
 
-    for group in id_groups.values():
+    for group in group_ids(ids):
         if len(current_subarray) + len(group) <= chunk:
             current_subarray.extend(group)
         else:
@@ -117,3 +251,86 @@ def chunk_ids(ids, chunk):
         result.append(current_subarray)
 
     return result
+
+
+def group_ids(ids: Iterable[Union[str, int]]) -> List[List[Union[str, int]]]:
+    """Group "compound" ids by their left part, i.e. "2-83" and "2-84" (see
+    chunk_ids). Plain uwis just end up in groups of one.
+    """
+    id_groups: Dict[str, List[Union[str, int]]] = {}
+
+    for item in ids:
+        left = str(item).split("-", maxsplit=1)[0]
+        if left not in id_groups:
+            id_groups[left] = []
+        id_groups[left].append(item)
+
+    return list(id_groups.values())
+
+
+class AdaptiveChunker:
+    """Iterate over id chunks, resizing each chunk from earlier observations.
+
+    The first chunk uses the recipe's chunk_size. After each chunk selector
+    runs, observe() records how many rows/bytes it produced and how long the
+    query took; the next chunk is sized so that it should land near both
+    target_bytes and target_seconds. Compound id groups are never split (as
+    with chunk_ids), and the size moves at most 4x per step.
+
+    Args:
+        ids (List[Union[str, int]]): Usually a list of uwis.
+        chunk_size (int): Initial (recipe hint) chunk size.
+        max_size (Optional[int]): Upper bound on ids per chunk.
+        target_bytes (int): Desired fetched bytes per chunk selector.
+        target_seconds (float): Desired query seconds per chunk selector.
+    """
+
+    def __init__(
+        self,
+        ids: List[Union[str, int]],
+        chunk_size: int,
+        max_size: Optional[int] = None,
+        target_bytes: int = CHUNK_TARGET_BYTES,
+        target_seconds: float = CHUNK_TARGET_SECONDS,
+    ):
+        self.groups = group_ids(ids)
+        self.size = max(1, chunk_size)
+        self.max_size = max_size or self.size * 4
+        self.target_bytes = target_bytes
+        self.target_seconds = target_seconds
+        self.sizes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __iter__(self) -> Iterator[List[Union[str, int]]]:
+        pos = 0
+        while pos < len(self.groups):
+            chunk = list(self.groups[pos])
+            pos += 1
+            while pos < len(self.groups):
+                if len(chunk) + len(self.groups[pos]) > self.size:
+                    break
+                chunk.extend(self.groups[pos])
+                pos += 1
+            self.sizes.append(len(chunk))
+            yield chunk
+
+    def observe(self, ids: int, n_bytes: float, seconds: float) -> None:
+        """Resize the next chunk from one finished chunk's measurements
+
+        Args:
+            ids (int): Number of ids in the finished chunk.
+            n_bytes (float): Bytes fetched for it (DataFrame memory usage).
+            seconds (float): Time spent executing and fetching.
+        """
+        if ids <= 0:
+            return
+        estimates: List[float] = [self.max_size]
+        if n_bytes > 0:
+            estimates.append(self.target_bytes * ids / n_bytes)
+        if seconds > 0:
+            estimates.append(self.target_seconds * ids / seconds)
+        wanted = min(estimates)
+        wanted = min(max(wanted, self.size / 4), self.size * 4)
+        self.size = int(min(max(1, wanted), self.max_size))
@@ -0,0 +1,343 @@
+"""Export file writers for asset docs
+
+collect_and_assemble_docs hands each batch of json docs to a writer, which
+encodes it with a serializer (see serializer.py) and appends it to the export
+file. Pick a writer per request with export_format:
+
+    json    One JSON array: [doc,doc,...]. Only valid once the job is done.
+    ndjson  One doc per line (newline-delimited JSON). Written append-only and
+            flushed per batch, so loaders can stream (or split) the file, and
+            a partial file from a failed job is still usable line by line.
+    parquet Columnar Parquet, one row group per batch (needs pyarrow:
+            pip install purr_geographix[parquet]). Each prefix table is a
+            struct column and aggregated child rows are list columns, so
+            curves and station arrays stay typed numbers instead of text.
+    arrow   The same columns as an Arrow IPC file (one record batch per batch).
+
+The columnar writers need a fixed schema before the first batch, which
+doc_schema derives from the selector's column types and the recipe.
+
+An export compression ("gzip" or "zstd", see compression.py) is a streaming
+layer around the file for json/ndjson (adding .gz/.zst to the extension).
+Parquet and Arrow IPC compress inside the file with the same codec instead
+(Arrow IPC supports zstd only), so they stay directly readable.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from purr_geographix.assets.collect.compression import (
+    check_compression,
+    compressed_stream,
+    compression_suffixes,
+)
+from purr_geographix.assets.collect.post_process import agg_prefixes
+from purr_geographix.assets.collect.serializer import get_serializer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# codec for parquet pages: zstd, snappy, gzip, lz4, brotli or none
+PARQUET_COMPRESSION = os.environ.get("PURR_PARQUET_COMPRESSION", "zstd")
+
+
+class DocWriter(ABC):
+    """Base writer: appends batches of docs to an open binary file
+
+    Args:
+        f (BinaryIO): The export file, opened for binary writing.
+        serializer: From serializer.get_serializer.
+    """
+
+    ext = "json"
+    columnar = False
+    # export compressions this format supports
+    codecs: Tuple[str, ...] = ("gzip", "zstd")
+
+    def __init__(self, f: BinaryIO, serializer):
+        self.f = f
+        self.serializer = serializer
+        self.docs_written = 0
+
+    @abstractmethod
+    def write_batch(self, docs: List[Dict[str, Any]]) -> None:
+        """Encode and append a batch of docs"""
+
+    def close(self) -> None:
+        """Finish the file after the last batch (the file itself stays open)"""
+
+
+class JsonArrayWriter(DocWriter):
+    """All docs in one JSON array"""
+
+    ext = "json"
+
+    def __init__(self, f: BinaryIO, serializer):
+        super().__init__(f, serializer)
+        self.f.write(b"[")
+
+    def write_batch(self, docs: List[Dict[str, Any]]) -> None:
+        if not docs:
+            return
+        if self.docs_written:
+            self.f.write(b",")
+        self.f.write(self.serializer.encode_batch(docs))
+        self.docs_written += len(docs)
+
+    def close(self) -> None:
+        self.f.write(b"]")
+
+
+class NdjsonWriter(DocWriter):
+    """One doc per line, every line complete once its batch is flushed"""
+
+    ext = "ndjson"
+
+    def write_batch(self, docs: List[Dict[str, Any]]) -> None:
+        if not docs:
+            return
+        self.f.write(self.serializer.encode_batch(docs, sep=b"\n") + b"\n")
+        self.f.flush()
+        self.docs_written += len(docs)
+
+
+def arrow_leaf_types() -> Dict[str, Any]:
+    """Arrow type of each formatter's output, or of a standardized dtype that
+    has no formatter (see transform_batch)
+    """
+    return {
+        "Int64": pa.int64(),
+        "bool": pa.bool_(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "datetime": pa.string(),
+        "datetime64": pa.string(),
+        "datetime64[ns]": pa.timestamp("s"),
+        "blob_to_hex": pa.string(),
+        "object": pa.binary(),
+        "array_of_int": pa.list_(pa.int64()),
+        "array_of_bool": pa.list_(pa.bool_()),
+        "array_of_float": pa.list_(pa.float64()),
+        "array_of_string": pa.list_(pa.string()),
+        "array_of_datetime": pa.list_(pa.string()),
+        # curve values are packed float32, so this is lossless
+        "decode_curve_values": pa.list_(pa.float32()),
+    }
+
+
+def doc_schema(column_types: Dict[str, str], recipe: Dict[str, Any]):
+    """Arrow schema of the docs a recipe produces: one struct per prefix table.
+
+    This follows transform_batch: each column's type comes from its xform (or
+    its standardized dtype), columns aggregated by the recipe's post_process
+    step become lists of that type, and columns without a prefix are dropped.
+
+    Args:
+        column_types (Dict[str, str]): From get_column_info, in column order.
+        recipe (Dict[str, Any]): The asset recipe.
+
+    Returns:
+        pa.Schema: A struct field per table, in order of first appearance.
+    """
+    leaf_types = arrow_leaf_types()
+    xforms = recipe["xforms"]
+    aggregated = agg_prefixes.get(recipe.get("post_process", ""), [])
+
+    tables: Dict[str, Dict[str, Any]] = {}
+    for column, col_type in column_types.items():
+        prefix = next((p for p in recipe["prefixes"] if column.startswith(p)), None)
+        if prefix is None:
+            continue
+        dtype = "Int64" if col_type == "int64" else col_type
+        arrow_type = leaf_types.get(xforms.get(column, dtype), pa.string())
+        if column != "w_uwi" and any(column.startswith(p) for p in aggregated):
+            arrow_type = pa.list_(arrow_type)
+        fields = tables.setdefault(recipe["prefixes"][prefix], {})
+        fields.setdefault(column[len(prefix) :], arrow_type)
+
+    return pa.schema(
+        [
+            pa.field(table, pa.struct(list(fields.items())))
+            for table, fields in tables.items()
+        ]
+    )
+
+
+class ArrowWriter(DocWriter):
+    """Base for columnar writers: each batch of docs becomes one Arrow table
+
+    Args:
+        f (BinaryIO): The export file, opened for binary writing.
+        serializer: Unused (docs are not encoded as JSON).
+        schema (pa.Schema): From doc_schema.
+        compression (Optional[str]): Codec used inside the file, if any.
+        level (Optional[int]): Codec level, None for the codec's default.
+    """
+
+    columnar = True
+
+    def __init__(
+        self,
+        f: BinaryIO,
+        serializer,
+        schema,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+    ):
+        super().__init__(f, serializer)
+        self.schema = schema
+        self._writer = self.open_table_writer(f, schema, compression, level)
+
+    @abstractmethod
+    def open_table_writer(
+        self,
+        f: BinaryIO,
+        schema,
+        compression: Optional[str],
+        level: Optional[int],
+    ):
+        """Create the pyarrow writer (must have write_table and close)"""
+
+    def write_batch(self, docs: List[Dict[str, Any]]) -> None:
+        if not docs:
+            return
+        try:
+            table = pa.Table.from_pylist(docs, schema=self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"docs do not match the export schema: {e}") from e
+        self._writer.write_table(table)
+        self.docs_written += len(docs)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ParquetWriter(ArrowWriter):
+    """Parquet file, one row group per batch"""
+
+    ext = "parquet"
+
+    def open_table_writer(self, f, schema, compression, level):
+        return pq.ParquetWriter(
+            f,
+            schema,
+            compression=compression or PARQUET_COMPRESSION,
+            compression_level=level if compression else None,
+        )
+
+
+class ArrowIpcWriter(ArrowWriter):
+    """Arrow IPC (Feather v2) file, one record batch per batch"""
+
+    ext = "arrow"
+    codecs = ("zstd",)
+
+    def open_table_writer(self, f, schema, compression, level):
+        codec = pa.Codec(compression, level) if compression else None
+        options = pa.ipc.IpcWriteOptions(compression=codec)
+        return pa.ipc.new_file(f, schema, options=options)
+
+
+writers: Dict[str, Type[DocWriter]] = {
+    "json": JsonArrayWriter,
+    "ndjson": NdjsonWriter,
+    "parquet": ParquetWriter,
+    "arrow": ArrowIpcWriter,
+}
+
+
+def export_ext(export_format: str, compression: Optional[str] = None) -> str:
+    """File extension for an export_format, i.e. for timestamp_filename"""
+    writer_class = writers[export_format]
+    if compression and not writer_class.columnar:
+        return f"{writer_class.ext}.{compression_suffixes[compression]}"
+    return writer_class.ext
+
+
+def check_export(
+    export_format: str, compression: Optional[str] = None, level: Optional[int] = None
+) -> None:
+    """Raise ValueError if this server cannot write the export as requested"""
+    writer_class = writers[export_format]
+    if writer_class.columnar and pa is None:
+        raise ValueError(
+            f"{export_format} export needs pyarrow: "
+            "pip install purr_geographix[parquet]"
+        )
+    if compression and compression not in writer_class.codecs:
+        raise ValueError(f"{export_format} export does not support {compression}")
+    check_compression(compression, level, streaming=not writer_class.columnar)
+
+
+def export_available(export_format: str, compression: Optional[str] = None) -> bool:
+    """False if check_export would fail (i.e. pyarrow is not installed)"""
+    try:
+        check_export(export_format, compression)
+    except ValueError:
+        return False
+    return True
+
+
+@contextmanager
+def open_writer(
+    out_file: Union[str, Path, BinaryIO],
+    export_format: str = "json",
+    serializer=None,
+    schema: Optional[Any] = None,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> Iterator[DocWriter]:
+    """Open out_file and yield a writer for export_format.
+
+    The writer is only closed (i.e. the JSON array's "]") if the block
+    completes; after an error the file is left as written so far (and a
+    compressed stream is still ended, see compressed_stream).
+
+    Args:
+        out_file (Union[str, Path, BinaryIO]): Export file path, or a binary
+            file that is already open (which is then left open).
+        export_format (str): A key of writers.
+        serializer: From serializer.get_serializer (default engine if None).
+        schema (Optional[pa.Schema]): From doc_schema, for columnar writers.
+        compression (Optional[str]): "gzip", "zstd" or None.
+        level (Optional[int]): Codec level, None for the codec's default.
+    """
+    check_export(export_format, compression, level)
+    writer_class = writers[export_format]
+    target: ContextManager[BinaryIO]
+    if isinstance(out_file, (str, Path)):
+        target = open(out_file, "wb")
+    else:
+        target = nullcontext(out_file)
+    with target as f:
+        layer: ContextManager[BinaryIO]
+        if writer_class.columnar:
+            layer = nullcontext(f)
+        else:
+            layer = compressed_stream(f, compression, level)
+        with layer as stream:
+            writer: DocWriter
+            if issubclass(writer_class, ArrowWriter):
+                writer = writer_class(stream, serializer, schema, compression, level)
+            else:
+                writer = writer_class(stream, serializer or get_serializer())
+            yield writer
+            writer.close()
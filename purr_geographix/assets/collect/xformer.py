@@ -2,10 +2,26 @@
 
 import re
 import struct
+import warnings
+from itertools import chain
 import numpy as np
-from typing import Any, Dict, Optional, List, Union
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 import pandas as pd
 
+from purr_geographix.assets.collect.ragged import RaggedArray
+
 
 PURR_NULL = "_purrNULL_"
 PURR_DELIM = "_purrDELIM_"
@@ -39,20 +55,28 @@ def unpack_int(buffer, start):
 
 def standardize_df_columns(df: pd.DataFrame, column_types: Dict[str, str]):
     """Try to normalize some column types in a dataframe based on column_types
-    as returned by pyodbc/SQLAnywhere."""
+    as returned by pyodbc/SQLAnywhere.
+
+    Every cast is done on the whole column: None/NaN become <NA>/NaT in the
+    nullable Int64, string and datetime64 dtypes, so there is no per-cell
+    null check. Columns already in the target dtype (i.e. from the arrow
+    fetch engine) are left alone. See benchmark.bench_standardize.
+    """
 
     for col, col_type in column_types.items():
+        series = df[col]
         if "int" in col_type:
-            df[col] = df[col].apply(lambda x: None if pd.isna(x) else x)
-            df[col] = df[col].astype("Int64")
+            if series.dtype != "Int64":
+                df[col] = series.astype("Int64")
         elif "str" in col_type:
-            df[col] = df[col].apply(lambda x: None if pd.isna(x) else x)
-            df[col] = df[col].astype("string")
+            if series.dtype != "string":
+                df[col] = series.astype("string")
         elif "datetime64[ns]" in col_type:
-            df[col] = df[col].apply(lambda x: None if pd.isna(x) else x)
-            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d %H:%M:%S").dt.floor("s")
+            if not pd.api.types.is_datetime64_dtype(series.dtype):
+                series = pd.to_datetime(series, format="%Y-%m-%d %H:%M:%S")
+            df[col] = series.dt.floor("s")
         else:
-            df[col] = df[col].astype(col_type)
+            df[col] = series.astype(col_type)
 
     return df
 
@@ -192,41 +216,243 @@ def array_of_datetime(x: Optional[str]) -> List[Optional[str]]:
 
 ###############################################################################
 
+# Column-level versions of the array_of_* formatters above. Instead of
+# checking and converting one cell at a time, every cell in the column is
+# split into a single flat array of values (plus a count per cell) and the
+# values are cast together with one null mask. The result is a RaggedArray
+# whose tolist() is identical to applying the per-cell formatter.
+
+Decoded = Tuple[np.ndarray, np.ndarray]
+
+
+def split_delimited(series: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split a column of PURR_DELIM strings into one flat array of values.
+
+    Args:
+        series (pd.Series): A LIST(...) column, <NA> for wells without rows.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: flat values (object dtype),
+        the positions of the non-null cells and the value count per cell.
+    """
+    valid = series.notna().to_numpy()
+    parts = [str(cell).split(PURR_DELIM) for cell in series.to_numpy()[valid]]
+    lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+    flat = np.fromiter(chain.from_iterable(parts), dtype=object, count=lengths.sum())
+    return flat, np.flatnonzero(valid), lengths
+
+
+def object_values(items: List[Any]) -> Decoded:
+    """Values and null mask for a list of Python objects (None is null)"""
+    values = np.fromiter(items, dtype=object, count=len(items))
+    nulls = np.fromiter((item is None for item in items), dtype=bool, count=len(items))
+    return values, nulls
+
+
+def decode_ints(flat: np.ndarray) -> Decoded:
+    """Vectorized safe_int for strings (only whole numbers survive int())"""
+    nulls = flat == PURR_NULL
+    try:
+        ints = list(map(int, np.where(nulls, "0", flat).tolist()))
+    except ValueError:
+        return object_values([None if n else safe_int(v) for v, n in zip(flat, nulls)])
+    try:
+        return np.array(ints, dtype=np.int64), nulls
+    except OverflowError:
+        return object_values(ints)[0], nulls
+
+
+def decode_bools(flat: np.ndarray) -> Decoded:
+    """Vectorized safe_bool for strings"""
+    nulls = flat == PURR_NULL
+    values = pd.Series(flat, dtype=object).str.strip().str.lower() == "true"
+    return values.to_numpy(dtype=bool), nulls
+
+
+def decode_floats(flat: np.ndarray) -> Decoded:
+    """Vectorized safe_float for strings (NaN is None, like safe_float)"""
+    nulls = flat == PURR_NULL
+    try:
+        values = np.array(list(map(float, np.where(nulls, "nan", flat).tolist())))
+    except ValueError:
+        # safe_float per value (to_numeric would reject i.e. "1_000")
+        floats = [None if n else safe_float(v) for v, n in zip(flat, nulls)]
+        values = np.array(floats, dtype=np.float64)
+    return values.astype(np.float64), np.isnan(values)
+
+
+def decode_strings(flat: np.ndarray) -> Decoded:
+    """safe_string, run once per distinct value rather than once per value"""
+    nulls = flat == PURR_NULL
+    distinct = pd.unique(flat[~nulls])
+    cleaned = dict(zip(distinct, (safe_string(v) for v in distinct)))
+    return object_values([None if n else cleaned[v] for v, n in zip(flat, nulls)])
+
+
+def decode_datetimes(flat: np.ndarray) -> Decoded:
+    """Vectorized safe_datetime: parse the whole column as ISO 8601 and only
+    fall back to per-value parsing for whatever that could not handle.
+    """
+    nulls = flat == PURR_NULL
+    strings = pd.Series(flat, dtype=object)
+    try:
+        with warnings.catch_warnings():
+            # mixed offsets: an object Series now, a ValueError in pandas 3
+            warnings.simplefilter("ignore", FutureWarning)
+            parsed = pd.to_datetime(
+                strings.where(~nulls), errors="coerce", format="ISO8601"
+            )
+    except (ValueError, TypeError, OverflowError):
+        parsed = None
+    if parsed is None or not pd.api.types.is_datetime64_any_dtype(parsed):
+        return object_values(
+            [None if n else safe_datetime(v) for v, n in zip(flat, nulls)]
+        )
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_localize(None)
+
+    values = parsed.dt.floor("s").dt.strftime("%Y-%m-%d %H:%M:%S").astype(object)
+    retry = (parsed.isna() & ~nulls).to_numpy()
+    if retry.any():
+        values[retry] = strings[retry].map(safe_datetime)
+    return values.to_numpy(), nulls | values.isna().to_numpy()
+
+
+def decode_column(decoder) -> Callable[[pd.Series], RaggedArray]:
+    """Make a column formatter (Series in, RaggedArray out) from a decoder"""
+
+    def column_formatter(series: pd.Series) -> RaggedArray:
+        flat, positions, lengths = split_delimited(series)
+        values, nulls = decoder(flat)
+        return RaggedArray.from_lengths(values, lengths, positions, len(series), nulls)
+
+    return column_formatter
+
+
+###############################################################################
+
+NullPolicy = Literal["scalar", "nested", "ragged"]
+
+
+class PlannedColumn(NamedTuple):
+    """Where a column goes in a json doc, and how its nulls are handled"""
 
-def series_row_to_json(
-    row: pd.Series, prefix_mapping: Dict[str, str]
-) -> Dict[str, Any]:
-    """Convert a pandas Series row to a JSON-like dictionary structure."""
-    result: Dict[str, Dict[str, Union[None, int, float, str, List[Any]]]] = {}
-    for column, value in row.items():
-        if isinstance(value, np.ndarray):
-            value = value.tolist()
+    column: str
+    table: str
+    key: str
+    policy: NullPolicy
 
-        # Handle list of numpy arrays
-        elif isinstance(value, list):
-            value = [
-                item.tolist() if isinstance(item, np.ndarray) else item
-                for item in value
-            ]
 
-        elif not isinstance(value, list):
-            if pd.isna(value):
-                value = None
+@lru_cache(maxsize=256)
+def column_plan(
+    columns: Tuple[str, ...],
+    prefixes: Tuple[Tuple[str, str], ...],
+    nested: FrozenSet[str] = frozenset(),
+    ragged: FrozenSet[str] = frozenset(),
+) -> Tuple[PlannedColumn, ...]:
+    """Map each column to (table_name, key, null policy) once per column set.
 
-        for prefix, table_name in prefix_mapping.items():
+    The first matching prefix wins and columns without one are dropped.
+
+    Args:
+        columns (Tuple[str, ...]): DataFrame columns, in order.
+        prefixes (Tuple[Tuple[str, str], ...]): recipe["prefixes"] items.
+        nested (FrozenSet[str]): columns that may hold lists or arrays.
+        ragged (FrozenSet[str]): columns held as a RaggedArray.
+
+    Returns:
+        Tuple[PlannedColumn, ...]: One entry per column that is kept.
+    """
+    plan = []
+    policy: NullPolicy
+    for column in columns:
+        for prefix, table_name in prefixes:
             if column.startswith(prefix):
-                if table_name not in result:
-                    result[table_name] = {}
-                result[table_name][column[len(prefix) :]] = value
+                if column in ragged:
+                    policy = "ragged"
+                elif column in nested:
+                    policy = "nested"
+                else:
+                    policy = "scalar"
+                plan.append(
+                    PlannedColumn(column, table_name, column[len(prefix) :], policy)
+                )
                 break
-    return result
+    return tuple(plan)
+
+
+def nested_to_list(value: Any) -> Any:
+    """A nested column's value as json: arrays to lists, NaN/<NA> to None"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, list):
+        return [
+            item.tolist() if isinstance(item, np.ndarray) else item for item in value
+        ]
+    return None if pd.isna(value) else value
+
+
+def planned_values(
+    df: pd.DataFrame, planned: PlannedColumn, ragged: Dict[str, RaggedArray]
+) -> List[Any]:
+    """All json values of one planned column, in row order"""
+    if planned.policy == "ragged":
+        return ragged[planned.column].tolist()
+
+    values = df[planned.column].to_numpy(dtype=object)
+    if planned.policy == "nested":
+        return [nested_to_list(v) for v in values]
+
+    values[pd.isna(values)] = None
+    return values.tolist()
 
 
 def transform_dataframe_to_json(
-    df: pd.DataFrame, prefix_mapping: Dict[str, str]
+    df: pd.DataFrame,
+    prefix_mapping: Dict[str, str],
+    ragged: Optional[Dict[str, RaggedArray]] = None,
+    nested: FrozenSet[str] = frozenset(),
 ) -> List[Dict[str, Dict[str, Union[None, int, float, str, List[Any]]]]]:
-    """Convert a DataFrame to a list of JSON-like dictionary structures."""
-    return [series_row_to_json(row, prefix_mapping) for _, row in df.iterrows()]
+    """Convert a DataFrame to a list of JSON-like dictionary structures.
+
+    Docs are assembled a column at a time from a column_plan rather than
+    matching prefixes per row. Columns in ragged are placeholders in df; their
+    (nested) lists are only built here.
+
+    Args:
+        df (pd.DataFrame): A transformed (and maybe post-processed) batch.
+        prefix_mapping (Dict[str, str]): recipe["prefixes"]
+        ragged (Optional[Dict[str, RaggedArray]]): see ragged.py
+        nested (FrozenSet[str]): columns that may hold lists or arrays.
+    """
+    ragged = ragged or {}
+    plan = column_plan(
+        tuple(df.columns),
+        tuple(prefix_mapping.items()),
+        nested,
+        frozenset(ragged),
+    )
+
+    # table -> (keys, values per key), tables in order of first column
+    tables: Dict[str, Tuple[List[str], List[List[Any]]]] = {}
+    for planned in plan:
+        keys, columns = tables.setdefault(planned.table, ([], []))
+        keys.append(planned.key)
+        columns.append(planned_values(df, planned, ragged))
+
+    if not tables:
+        return [{} for _ in range(len(df))]
+
+    names = list(tables)
+    rows_per_table = [zip(*columns) for _, columns in tables.values()]
+    keys_per_table = [keys for keys, _ in tables.values()]
+    return [
+        {
+            name: dict(zip(keys, row))
+            for name, keys, row in zip(names, keys_per_table, rows)
+        }
+        for rows in zip(*rows_per_table)
+    ]
 
 
 ###############################################################################
@@ -247,3 +473,15 @@ formatters = {
     "array_of_datetime": array_of_datetime,
     "decode_curve_values": decode_curve_values,
 }
+
+# formatters above that return a list per cell (see column_plan)
+nested_formatters = frozenset({"decode_curve_values"})
+
+# formatters that take (and return) a whole column, preferred over the above
+column_formatters = {
+    "array_of_int": decode_column(decode_ints),
+    "array_of_bool": decode_column(decode_bools),
+    "array_of_float": decode_column(decode_floats),
+    "array_of_string": decode_column(decode_strings),
+    "array_of_datetime": decode_column(decode_datetimes),
+}
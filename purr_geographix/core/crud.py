@@ -1,9 +1,10 @@
 """SQLite database CRUD"""
 
 import tempfile
-from typing import Dict, Union, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Union, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import insert, update
+from sqlalchemy import insert, literal, update
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import purr_geographix.core.models as models
 from purr_geographix.core.logger import logger
@@ -135,3 +136,232 @@ def fetch_repo_ids(db: Session) -> List[str]:
     """
     repo_ids = db.query(models.Repo.id).all()
     return [repo_id[0] for repo_id in repo_ids]
+
+
+def update_conn_strategy(
+    db: Session, repo_id: str, conn_strategy: Optional[Dict[str, Any]]
+) -> None:
+    """Save the connection strategy that last worked for a Repo
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        repo_id (str): A Repo.id string
+        conn_strategy (Optional[Dict[str, Any]]): see sqlanywhere.conn_variants
+    """
+    if conn_strategy is None:
+        return
+    stmt = (
+        update(models.Repo)
+        .where(models.Repo.id == repo_id)
+        .values(conn_strategy=conn_strategy)
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def get_approximate_repos(db: Session) -> List[models.Repo]:
+    """Fetch Repos whose well counts came from a fast (approximate) recon
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+
+    Returns:
+        List[models.Repo]: List of Repos flagged counts_approximate
+    """
+    return db.query(models.Repo).filter(models.Repo.counts_approximate.is_(True)).all()
+
+
+def claim_repo_counts(db: Session, repo_id: str, stale_before: datetime) -> bool:
+    """Claim a counts_approximate Repo for an exact recount
+
+    Every uvicorn worker runs the refresher; the conditional UPDATE is atomic
+    in SQLite, so only one of them gets each Repo. A claim older than
+    stale_before (e.g. from a worker that died mid-count) can be taken over.
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        repo_id (str): A Repo.id string
+        stale_before (datetime): Claims made before this time are expired
+
+    Returns:
+        bool: True if this process now holds the claim
+    """
+    stmt = (
+        update(models.Repo)
+        .where(
+            models.Repo.id == repo_id,
+            models.Repo.counts_approximate.is_(True),
+            (models.Repo.counts_claimed.is_(None))
+            | (models.Repo.counts_claimed < literal(stale_before)),
+        )
+        .values(counts_claimed=datetime.now())
+    )
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount == 1
+
+
+def update_repo_counts(
+    db: Session, repo_id: str, counts: Dict[str, Optional[int]]
+) -> None:
+    """Replace a Repo's approximate well counts with exact ones
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        repo_id (str): A Repo.id string
+        counts (Dict[str, Optional[int]]): see repo_db.exact_counts
+    """
+    stmt = (
+        update(models.Repo)
+        .where(models.Repo.id == repo_id)
+        .values(**counts, counts_approximate=False, counts_claimed=None)
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def release_repo_counts(db: Session, repo_id: str) -> None:
+    """Drop a Repo's recount claim after a failed recount, so the next pass
+    (on any worker) retries it instead of waiting for the claim to go stale
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        repo_id (str): A Repo.id string
+    """
+    stmt = (
+        update(models.Repo).where(models.Repo.id == repo_id).values(counts_claimed=None)
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def get_export_watermark(
+    db: Session, repo_id: str, asset: str, scope: str
+) -> Optional[models.ExportWatermark]:
+    """Fetch the watermark of the last incremental export, if any
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        repo_id (str): A Repo.id string
+        asset (str): An asset (i.e. datatype)
+        scope (str): The exports' uwi filter (see incremental.watermark_scope)
+
+    Returns:
+        Optional[models.ExportWatermark]: None before the first export
+    """
+    return db.get(models.ExportWatermark, (repo_id, asset, scope))
+
+
+def upsert_export_watermark(
+    db: Session,
+    repo_id: str,
+    asset: str,
+    scope: str,
+    watermark: Optional[str],
+    uwis: List[str],
+) -> None:
+    """Save the watermark and uwis after a successful incremental export
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        repo_id (str): A Repo.id string
+        asset (str): An asset (i.e. datatype)
+        scope (str): The exports' uwi filter (see incremental.watermark_scope)
+        watermark (Optional[str]): Latest change date seen, as a SQL literal
+        uwis (List[str]): All uwis the identifier returned
+    """
+    values = {
+        "repo_id": repo_id,
+        "asset": asset,
+        "scope": scope,
+        "watermark": watermark,
+        "uwis": uwis,
+        "exported_at": datetime.now(),
+    }
+    stmt = sqlite_insert(models.ExportWatermark).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["repo_id", "asset", "scope"],
+        set_={
+            k: v for k, v in values.items() if k not in ("repo_id", "asset", "scope")
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def get_cache_entry(db: Session, key: str) -> Optional[models.ExportCacheEntry]:
+    """Fetch an export cache entry
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        key (str): See cache.cache_key
+
+    Returns:
+        Optional[models.ExportCacheEntry]: None on a cache miss
+    """
+    return db.get(models.ExportCacheEntry, key)
+
+
+def get_cache_entries(db: Session) -> List[models.ExportCacheEntry]:
+    """Fetch all export cache entries, most recently used first
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+
+    Returns:
+        List[models.ExportCacheEntry]: List of cache entries
+    """
+    return (
+        db.query(models.ExportCacheEntry)
+        .order_by(models.ExportCacheEntry.last_used.desc())
+        .all()
+    )
+
+
+def touch_cache_entry(db: Session, key: str) -> None:
+    """Count a cache hit and mark the entry as just used
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        key (str): See cache.cache_key
+    """
+    stmt = (
+        update(models.ExportCacheEntry)
+        .where(models.ExportCacheEntry.key == key)
+        .values(hits=models.ExportCacheEntry.hits + 1, last_used=datetime.now())
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def upsert_cache_entry(db: Session, entry: Dict[str, Any]) -> None:
+    """Insert or replace an export cache entry
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        entry (Dict[str, Any]): Column values of a models.ExportCacheEntry
+    """
+    now = datetime.now()
+    values = {**entry, "hits": 0, "created_at": now, "last_used": now}
+    stmt = sqlite_insert(models.ExportCacheEntry).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={k: v for k, v in values.items() if k != "key"},
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def delete_cache_entries(db: Session, keys: List[str]) -> None:
+    """Delete export cache entries (but not their files)
+
+    Args:
+        db (Session): Current SQLAlchemy Session (SQLite)
+        keys (List[str]): See cache.cache_key
+    """
+    if not keys:
+        return
+    db.query(models.ExportCacheEntry).filter(
+        models.ExportCacheEntry.key.in_(keys)
+    ).delete(synchronize_session=False)
+    db.commit()
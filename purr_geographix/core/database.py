@@ -1,6 +1,6 @@
 """SQLAlchemy configuration (SQLite)"""
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 import purr_geographix.core.models as models
 
@@ -11,7 +11,33 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def add_missing_columns():
+    """create_all only creates missing tables, so add any columns (and
+    indexes) that were added to a model since an existing
+    purr_geographix.sqlite was created.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in models.Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE {table.name} "
+                            f"ADD COLUMN {column.name} {col_type}"
+                        )
+                    )
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
 models.Base.metadata.create_all(bind=engine)
+add_missing_columns()
 
 
 def get_db():
@@ -0,0 +1,124 @@
+"""Concurrency limits for all SQLAnywhere traffic
+
+Recon and asset collection both run their queries on worker threads, so many
+repos (and several chunks per repo) can hit the same GeoGraphix project server
+at once. Every pooled connection checkout goes through the governor, which
+caps concurrent queries per server (conn["server"], i.e. GGX_SCARAB) and
+overall. Waiters on a busy server are served round-robin by repo (dbn) so one
+big export cannot starve the other repos on that server.
+"""
+
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from itertools import count
+from typing import Deque, Dict, Iterator, Tuple
+from purr_geographix.core.logger import logger
+
+GOVERNOR_GLOBAL = int(os.environ.get("PURR_GOVERNOR_GLOBAL", "16"))
+GOVERNOR_PER_SERVER = int(os.environ.get("PURR_GOVERNOR_PER_SERVER", "4"))
+
+
+def server_limit(server: str) -> int:
+    """Concurrent query limit for one server, i.e. PURR_GOVERNOR_GGX_SCARAB=8
+    or else PURR_GOVERNOR_PER_SERVER.
+    """
+    value = os.environ.get(f"PURR_GOVERNOR_{server.upper()}")
+    return max(1, int(value)) if value else max(1, GOVERNOR_PER_SERVER)
+
+
+class Governor:
+    """Per-server and global concurrency limits with per-repo fairness.
+
+    Args:
+        global_limit (int): Max concurrent queries across all servers.
+    """
+
+    def __init__(self, global_limit: int = GOVERNOR_GLOBAL):
+        self.global_limit = max(1, global_limit)
+        self._cond = threading.Condition()
+        self._tickets = count()
+        self._total = 0
+        self._active: Dict[str, int] = {}
+        # per server: repos in the order they get served, each with a queue
+        self._rotation: Dict[str, Deque[str]] = {}
+        self._waiting: Dict[Tuple[str, str], Deque[int]] = {}
+
+    def _is_next(self, server: str, repo: str, ticket: int) -> bool:
+        if self._total >= self.global_limit:
+            return False
+        if self._active.get(server, 0) >= server_limit(server):
+            return False
+        rotation = self._rotation[server]
+        return rotation[0] == repo and self._waiting[(server, repo)][0] == ticket
+
+    def acquire(self, server: str, repo: str) -> None:
+        """Block until a query slot on server is granted to this repo"""
+        with self._cond:
+            ticket = next(self._tickets)
+            queue = self._waiting.setdefault((server, repo), deque())
+            rotation = self._rotation.setdefault(server, deque())
+            queue.append(ticket)
+            if repo not in rotation:
+                rotation.append(repo)
+
+            if not self._is_next(server, repo, ticket):
+                logger.debug(f"governor: waiting for {server} ({repo})")
+                self._cond.wait_for(lambda: self._is_next(server, repo, ticket))
+
+            queue.popleft()
+            rotation.popleft()
+            if queue:
+                # the repo goes to the back of the line for its next query
+                rotation.append(repo)
+            else:
+                del self._waiting[(server, repo)]
+            if not rotation:
+                del self._rotation[server]
+
+            self._total += 1
+            self._active[server] = self._active.get(server, 0) + 1
+            self._cond.notify_all()
+
+    def release(self, server: str) -> None:
+        """Give back a slot from acquire()"""
+        with self._cond:
+            self._total -= 1
+            self._active[server] -= 1
+            if not self._active[server]:
+                del self._active[server]
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Active and waiting query counts per server (for logging/status)"""
+        with self._cond:
+            servers = set(self._active) | set(self._rotation)
+            return {
+                server: {
+                    "active": self._active.get(server, 0),
+                    "waiting": sum(
+                        len(q) for (s, _), q in self._waiting.items() if s == server
+                    ),
+                }
+                for server in servers
+            }
+
+
+governor = Governor()
+
+
+@contextmanager
+def governed(conn: dict) -> Iterator[None]:
+    """Hold a governor slot for the server and repo in conn params
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+    """
+    server = str(conn.get("server", conn.get("host", "localhost")))
+    repo = str(conn.get("dbn", conn.get("dbf", "")))
+    governor.acquire(server, repo)
+    try:
+        yield
+    finally:
+        governor.release(server)
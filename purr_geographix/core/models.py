@@ -1,6 +1,6 @@
 """SQLAlchemy Model definition"""
 
-from sqlalchemy import Boolean, Column, Integer, String, JSON, TIMESTAMP
+from sqlalchemy import Boolean, Column, Index, Integer, String, JSON, TIMESTAMP
 
 # from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import DeclarativeBase
@@ -23,6 +23,7 @@ class Repo(Base):
     fs_path = Column(String)
     conn = Column(JSON)
     conn_aux = Column(JSON)
+    conn_strategy = Column(JSON)
     suite = Column(String)
     well_count = Column(Integer)
     wells_with_completion = Column(Integer)
@@ -36,6 +37,8 @@ class Repo(Base):
     wells_with_survey = Column(Integer)
     wells_with_vector_log = Column(Integer)
     wells_with_zone = Column(Integer)
+    counts_approximate = Column(Boolean)
+    counts_claimed = Column(TIMESTAMP)
     storage_epsg = Column(Integer)
     storage_name = Column(String)
     display_epsg = Column(Integer)
@@ -58,3 +61,80 @@ class Settings(Base):
         nullable=True,
         server_default="C:/temp",
     )
+
+
+class ExportWatermark(Base):
+    """High-water mark of incremental asset exports (see incremental.py)"""
+
+    __tablename__ = "export_watermarks"
+
+    repo_id = Column(String, primary_key=True)
+    asset = Column(String, primary_key=True)
+    # the uwi filter of the exports ("" for all wells)
+    scope = Column(String, primary_key=True)
+    # latest change date seen by the last export, as a SQL literal
+    watermark = Column(String)
+    # uwis the identifier returned at the last export, to find deleted wells
+    uwis = Column(JSON)
+    exported_at = Column(TIMESTAMP)
+
+
+class ExportCacheEntry(Base):
+    """A cached copy of an export that identical requests reuse (see
+    cache.py)
+    """
+
+    __tablename__ = "export_cache"
+
+    # sha256 of repo_id, asset, params and fingerprint
+    key = Column(String, primary_key=True)
+    repo_id = Column(String, index=True)
+    asset = Column(String)
+    # normalized uwi_list and export options
+    params = Column(JSON)
+    # repo state when the export started (see cache.repo_fingerprint)
+    fingerprint = Column(String)
+    # the copy's name in the depot's cache.CACHE_DIR
+    export_file = Column(String)
+    bytes = Column(Integer)
+    hits = Column(Integer, default=0)
+    created_at = Column(TIMESTAMP)
+    last_used = Column(TIMESTAMP)
+
+
+class Task(Base):
+    """An asset collection or recon job, shared by all API workers (see
+    tasks.py)
+    """
+
+    __tablename__ = "tasks"
+
+    id = Column(String, primary_key=True)
+    # "asset" or "recon"
+    kind = Column(String, index=True)
+    task_status = Column(String)
+    task_message = Column(String)
+    # request details, i.e. repo_id, asset and uwi_list
+    params = Column(JSON)
+    # routes_assets.job_key of an export, unique among unfinished tasks
+    job_key = Column(String)
+    # counters updated while the job runs, i.e. docs
+    progress = Column(JSON)
+    # the job's summary, i.e. out_file
+    result = Column(JSON)
+    # 1 = next to run while queued (see scheduler.py), else None
+    queue_position = Column(Integer)
+    created_at = Column(TIMESTAMP)
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
+    updated_at = Column(TIMESTAMP, index=True)
+
+    # single-flight: a second identical export attaches to the first
+    __table_args__ = (
+        Index(
+            "ix_tasks_job_key_unfinished",
+            job_key,
+            unique=True,
+            sqlite_where=finished_at.is_(None),
+        ),
+    )
@@ -1,34 +1,36 @@
 """FastAPI Routing for Settings and Repo Recon"""
 
-import asyncio
 import json
 import uuid
-from typing import Dict
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 import purr_geographix.core.schemas as schemas
 import purr_geographix.core.crud as crud
 from purr_geographix.core.database import get_db
+from purr_geographix.core.scheduler import scheduler
+from purr_geographix.core.tasks import task_store
 from purr_geographix.core.util import is_valid_dir, hostname
 from purr_geographix.recon.recon import repo_recon
 from purr_geographix.core.logger import logger
 
 router = APIRouter()
 
-task_storage: Dict[str, schemas.RepoReconResponse] = {}
 
-
-async def process_repo_recon(task_id: str, recon_root: str, ggx_host: str):
-    """Trigger repo_recon and update task_storage"""
+async def process_repo_recon(
+    task_id: str, recon_root: str, ggx_host: str, fast: bool = False
+):
+    """Trigger repo_recon and update the task store"""
     try:
-        task_storage[task_id].task_status = schemas.TaskStatus.IN_PROGRESS
-        repos = await repo_recon(recon_root, ggx_host)
+        task_store.start(task_id)
+        repos = await repo_recon(recon_root, ggx_host, fast)
         for r in repos:
             logger.info(json.dumps(r, indent=4))
 
-        task_storage[task_id].task_status = schemas.TaskStatus.COMPLETED
+        message = f"repos found: {len(repos)}"
+        result = {"repo_ids": [r.get("id") for r in repos]}
+        task_store.finish(task_id, schemas.TaskStatus.COMPLETED, message, result)
     except Exception as e:  # pylint: disable=broad-except
-        task_storage[task_id].task_status = schemas.TaskStatus.FAILED
+        task_store.finish(task_id, schemas.TaskStatus.FAILED, str(e))
         logger.error(f"Task failed for {task_id}: {str(e)}")
 
 
@@ -136,11 +138,20 @@ def get_repo_by_id(repo_id: str, db: Session = Depends(get_db)):
         "projects (a.k.a. repos). Metadata will be collected from valid repos "
         "and stored in a local database. You can collect asset data from these "
         "'known' repos later. "
+        "Set fast=true to estimate well counts from catalog statistics rather "
+        "than counting them; such repos are flagged counts_approximate until "
+        "exact counts are refreshed in the background. "
         "The task_id is returned immediately; use it to check task status."
     ),
     status_code=status.HTTP_202_ACCEPTED,
 )
-async def run_repo_recon(recon_root: str, ggx_host: str = hostname()):
+async def run_repo_recon(
+    request: Request,
+    recon_root: str,
+    ggx_host: str = hostname(),
+    fast: bool = False,
+    priority: schemas.JobPriority = schemas.JobPriority.NORMAL,
+):
     """Scan network path for GeoGraphix projects"""
     valid_recon_root = is_valid_dir(recon_root)
     if not valid_recon_root:
@@ -148,18 +159,30 @@ async def run_repo_recon(recon_root: str, ggx_host: str = hostname()):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid directory: {recon_root}",
         )
+    if scheduler.full():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{scheduler.queued} jobs are already queued, try again later",
+            headers={"Retry-After": "60"},
+        )
     task_id = str(uuid.uuid4())
-    new_repo_recon = schemas.RepoReconResponse(
-        id=task_id,
+    new_repo_recon = task_store.create(
+        task_id,
+        "recon",
         recon_root=valid_recon_root,
         ggx_host=ggx_host,
-        task_status=schemas.TaskStatus.PENDING,
+        fast=fast,
     )
-    task_storage[task_id] = new_repo_recon
 
-    # do not await create_task, or it will block the 202 response
-    # noinspection PyAsyncCall
-    asyncio.create_task(process_repo_recon(task_id, valid_recon_root, ggx_host))
+    # runs once the scheduler has a free worker (see scheduler.py)
+    position = scheduler.submit(
+        task_id,
+        lambda: process_repo_recon(task_id, valid_recon_root, ggx_host, fast),
+        priority=priority.value,
+        repo=valid_recon_root,
+        user=request.client.host if request.client else "",
+    )
+    new_repo_recon["queue_position"] = position or None
     return new_repo_recon
 
 
@@ -170,11 +193,13 @@ async def run_repo_recon(recon_root: str, ggx_host: str = hostname()):
     description=(
         "A recon job may take several minutes, so use the task_id returned "
         "by the original POST to (periodically) check the job status. Possible "
-        "status values are: pending, in_progress, completed or failed."
+        "status values are: pending, in_progress, completed or failed. A "
+        "pending job's queue_position is its place in the queue (1 = next)."
     ),
 )
 async def get_repo_recon_status(task_id: str):
     """Check the status of a /repos/recon job using the task_id"""
-    if task_id not in task_storage:
+    task = task_store.get(task_id)
+    if task is None or task["kind"] != "recon":
         raise HTTPException(status_code=404, detail="repo recon not found")
-    return task_storage[task_id]
+    return task
@@ -0,0 +1,190 @@
+"""Bounded job scheduler for asset collection and recon jobs
+
+Rather than every POST starting its job on the event loop at once (where one
+big vector_log export can starve everyone else), jobs wait in a queue and at
+most PURR_SCHEDULER_WORKERS of them run at a time (per API worker process).
+
+The next job to run is picked by:
+
+    priority  "high" before "normal" before "low"
+    repo      round-robin across repos with queued jobs of that priority
+    user      round-robin across the users (client hosts) of that repo
+
+so a user queueing twenty exports of one repo does not hold up a single
+export of another repo, or another user's export of the same repo. Once
+PURR_SCHEDULER_QUEUE jobs are waiting, submit raises QueueFull and the API
+answers 429. Each queued task's queue_position (1 = next) is kept in the
+task store (see tasks.py), so status polls show it from any worker.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Coroutine, Dict, Iterable, Iterator, List, Optional
+
+from purr_geographix.core.logger import logger
+from purr_geographix.core.tasks import TaskStore, task_store
+
+SCHEDULER_WORKERS = int(os.environ.get("PURR_SCHEDULER_WORKERS", "2"))
+SCHEDULER_QUEUE = int(os.environ.get("PURR_SCHEDULER_QUEUE", "100"))
+
+priorities: Dict[str, int] = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFull(Exception):
+    """Raised by JobScheduler.submit when no more jobs can wait"""
+
+
+@dataclass
+class Job:
+    """A queued job: run() creates its coroutine once it is dispatched"""
+
+    task_id: str
+    run: Callable[[], Coroutine[Any, Any, Any]]
+    priority: int = priorities["normal"]
+    repo: str = ""
+    user: str = ""
+    on_done: List[Callable[[], None]] = field(default_factory=list)
+
+
+def interleave(queues: Iterable[Iterable[Job]]) -> Iterator[Job]:
+    """Round-robin: the first job of each queue, then the second of each..."""
+    iters = deque(iter(q) for q in queues)
+    while iters:
+        it = iters.popleft()
+        job = next(it, None)
+        if job is not None:
+            yield job
+            iters.append(it)
+
+
+class JobScheduler:
+    """Run queued jobs, at most max_workers at once (see above)
+
+    Args:
+        max_workers (int): Jobs running at once.
+        max_queue (int): Jobs waiting before submit raises QueueFull.
+        store (TaskStore): Where queue positions are published.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = SCHEDULER_WORKERS,
+        max_queue: int = SCHEDULER_QUEUE,
+        store: TaskStore = task_store,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self.store = store
+        self.running: Dict[str, asyncio.Task] = {}
+        # priority -> repo -> user -> jobs, each level in round-robin order
+        self._queues: Dict[int, OrderedDict] = {}
+        self._positions: Dict[str, int] = {}
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting"""
+        return len(self._positions)
+
+    def full(self) -> bool:
+        """True if submit would raise QueueFull"""
+        return self.queued >= self.max_queue
+
+    def order(self) -> List[Job]:
+        """Queued jobs in the order they would run (if nothing else arrives)"""
+        ordered: List[Job] = []
+        for priority in sorted(self._queues):
+            repos = self._queues[priority].values()
+            ordered.extend(interleave(interleave(users.values()) for users in repos))
+        return ordered
+
+    def submit(
+        self,
+        task_id: str,
+        run: Callable[[], Coroutine[Any, Any, Any]],
+        priority: str = "normal",
+        repo: str = "",
+        user: str = "",
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> int:
+        """Queue a job, then start it right away if a worker is free.
+
+        Args:
+            task_id (str): The job's task (already in the task store).
+            run (Callable[[], Coroutine[Any, Any, Any]]): Creates the job's coroutine.
+            priority (str): "high", "normal" or "low".
+            repo (str): Fairness group, i.e. a repo_id.
+            user (str): Fairness group within the repo, i.e. a client host.
+            on_done (Optional[Callable[[], None]]): Called when the job ends.
+
+        Raises:
+            QueueFull: max_queue jobs are already waiting.
+
+        Returns:
+            int: Queue position (1 = next), 0 if the job is already running.
+        """
+        if self.full():
+            raise QueueFull(f"{self.queued} jobs are already queued")
+        job = Job(task_id, run, priorities[priority], repo, user)
+        if on_done is not None:
+            job.on_done.append(on_done)
+        repos = self._queues.setdefault(job.priority, OrderedDict())
+        repos.setdefault(repo, OrderedDict()).setdefault(user, deque()).append(job)
+        self._positions[task_id] = 0
+        self._dispatch()
+        return self._positions.get(task_id, 0)
+
+    def _pop_next(self) -> Job:
+        priority = min(self._queues)
+        repos = self._queues[priority]
+        repo, users = next(iter(repos.items()))
+        user, jobs = next(iter(users.items()))
+        job = jobs.popleft()
+        # this repo and user go to the back of their round-robin
+        if jobs:
+            users.move_to_end(user)
+        else:
+            del users[user]
+        if users:
+            repos.move_to_end(repo)
+        else:
+            del repos[repo]
+        if not repos:
+            del self._queues[priority]
+        return job
+
+    def _dispatch(self) -> None:
+        while self._queues and len(self.running) < self.max_workers:
+            job = self._pop_next()
+            del self._positions[job.task_id]
+            logger.info(f"starting task {job.task_id} ({len(self.running)} running)")
+            task = asyncio.create_task(job.run())
+            self.running[job.task_id] = task
+            task.add_done_callback(partial(self._finished, job))
+        self._publish()
+
+    def _finished(self, job: Job, _task: Optional[asyncio.Task] = None) -> None:
+        del self.running[job.task_id]
+        for callback in job.on_done:
+            try:
+                callback()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error(f"on_done failed for task {job.task_id}: {e}")
+        self._dispatch()
+
+    def _publish(self) -> None:
+        """Save changed queue positions to the task store (in one write)"""
+        changed: Dict[str, int] = {}
+        for position, job in enumerate(self.order(), start=1):
+            if self._positions.get(job.task_id) != position:
+                self._positions[job.task_id] = position
+                changed[job.task_id] = position
+        try:
+            self.store.set_queue_positions(changed)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(f"could not save queue positions: {e}")
+
+
+scheduler = JobScheduler()
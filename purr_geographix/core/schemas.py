@@ -46,6 +46,7 @@ class RepoBase(BaseModel):
     fs_path: str
     conn: Dict[str, Any]
     conn_aux: Dict[str, Any] | None
+    conn_strategy: Dict[str, Any] | None = None
     suite: str
     well_count: int | None
     wells_with_completion: int | None
@@ -59,6 +60,7 @@ class RepoBase(BaseModel):
     wells_with_survey: int | None
     wells_with_vector_log: int | None
     wells_with_zone: int | None
+    counts_approximate: bool | None = None
     storage_epsg: int
     storage_name: str
     display_epsg: int
@@ -104,6 +106,14 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
 
 
+class JobPriority(str, Enum):
+    """JobPriority Enum (see scheduler.py)"""
+
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
 class RepoReconCreate(BaseModel):
     """Pydantic model for RepoReconCreate"""
 
@@ -111,18 +121,48 @@ class RepoReconCreate(BaseModel):
     ggx_host: Optional[str] = None
 
 
-class RepoReconResponse(BaseModel):
+class TaskProgress(BaseModel):
+    """Pydantic model (Base) for progress and timings of a task (see tasks.py)"""
+
+    task_message: str | None = None
+    progress: Dict[str, Any] = {}
+    result: Any = None
+    queue_position: int | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class RepoReconResponse(TaskProgress):
     """Pydantic model for RepoReconResponse"""
 
     id: str
     recon_root: str
     ggx_host: str
+    fast: bool = False
     task_status: TaskStatus
 
 
-class AssetCollectionResponse(BaseModel):
+class AssetCollectionResponse(TaskProgress):
     """Pydantic model for AssetCollectionResponse"""
 
     id: str
+    repo_id: str | None = None
+    asset: str | None = None
+    uwi_list: List[str] | None = None
     task_status: TaskStatus
     task_message: str
+
+
+class ExportCacheStats(BaseModel):
+    """Pydantic model for ExportCacheStats"""
+
+    enabled: bool
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    entry_hits: int
+    hits: int
+    misses: int
+    evictions: int
@@ -1,10 +1,16 @@
 """Convenience method for dealing with SQLAnywhere via ODBC"""
 
+import os
 import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import pyodbc
 from retry import retry
+from purr_geographix.core.governor import governed
 from purr_geographix.core.logger import logger
 
 
@@ -14,8 +20,286 @@ class RetryException(Exception):
 
 SQLANY_DRIVER = "SQL Anywhere 17"
 
+POOL_MAX_SIZE = int(os.environ.get("PURR_POOL_MAX_SIZE", "4"))
+POOL_IDLE_TIMEOUT = float(os.environ.get("PURR_POOL_IDLE_TIMEOUT", "300"))
+POOL_HEALTH_CHECK = float(os.environ.get("PURR_POOL_HEALTH_CHECK", "30"))
 
-@retry(RetryException, tries=5)
+
+class ConnectionPool:
+    """A small pool of pyodbc connections sharing one set of conn params.
+
+    Connecting to a gxdb (with astart=YES) is expensive relative to most recon
+    and asset queries, so connections are kept open and handed out one thread
+    at a time. Idle connections are closed after idle_timeout seconds, and a
+    connection that has been idle for more than health_check seconds is
+    probed with a trivial query before it gets reused.
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+        max_size (int): Maximum number of open connections (idle + in use).
+        idle_timeout (float): Seconds before an idle connection gets closed.
+        health_check (float): Idle seconds before a connection gets probed.
+    """
+
+    def __init__(
+        self,
+        conn: dict,
+        max_size: int = POOL_MAX_SIZE,
+        idle_timeout: float = POOL_IDLE_TIMEOUT,
+        health_check: float = POOL_HEALTH_CHECK,
+    ):
+        self.conn = dict(conn)
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self._idle: List[Tuple[pyodbc.Connection, float]] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def _connect(self) -> pyodbc.Connection:
+        """Connect with the remembered variant first (see conn_variants)"""
+        last_error = None
+        # pylint: disable=c-extension-no-member
+        for variant, params in conn_variants(self.conn):
+            try:
+                connection = pyodbc.connect(**params)
+            except pyodbc.OperationalError as oe:
+                record_conn_result(self.conn, variant, ok=False)
+                logger.debug(f"connect via {variant} failed: {oe}")
+                last_error = oe
+                continue
+            record_conn_result(self.conn, variant, ok=True)
+            # I suspect LMKR does not modify this per locale, but you should
+            # probably verify the gxdb encoding if dealing with non-US data.
+            connection.setencoding("CP1252")
+            return connection
+        assert last_error is not None  # conn_variants is never empty
+        raise last_error
+
+    @staticmethod
+    def _close(connection: pyodbc.Connection) -> None:
+        try:
+            connection.close()
+        except pyodbc.Error:  # pylint: disable=c-extension-no-member
+            pass
+
+    def _is_healthy(self, connection: pyodbc.Connection, last_used: float) -> bool:
+        if time.monotonic() - last_used < self.health_check:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except pyodbc.Error:  # pylint: disable=c-extension-no-member
+            return False
+
+    def _reap_idle(self) -> None:
+        """Close connections idle longer than idle_timeout (hold the lock)"""
+        now = time.monotonic()
+        keep = []
+        for connection, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._close(connection)
+            else:
+                keep.append((connection, last_used))
+        self._idle = keep
+
+    def acquire(self) -> pyodbc.Connection:
+        """Check out a connection, waiting if max_size are already in use
+
+        Returns:
+            pyodbc.Connection: An open connection owned by the caller until it
+            gets handed back via release().
+        """
+        with self._cond:
+            while True:
+                self._reap_idle()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._in_use < self.max_size:
+                    connection, last_used = None, 0.0
+                    break
+                self._cond.wait()
+            self._in_use += 1
+
+        try:
+            if connection is not None and not self._is_healthy(connection, last_used):
+                logger.debug(f"discarding stale connection: {self.conn['dbn']}")
+                self._close(connection)
+                connection = None
+            if connection is None:
+                connection = self._connect()
+            return connection
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, connection: pyodbc.Connection, discard: bool = False) -> None:
+        """Return a connection to the pool (or close it if discard is True)
+
+        Args:
+            connection (pyodbc.Connection): A connection from acquire().
+            discard (bool): Close rather than reuse, e.g. after an ODBC error.
+        """
+        if not discard:
+            try:
+                connection.rollback()
+            except pyodbc.Error:  # pylint: disable=c-extension-no-member
+                discard = True
+        if discard:
+            self._close(connection)
+
+        with self._cond:
+            self._in_use -= 1
+            if not discard:
+                self._idle.append((connection, time.monotonic()))
+            self._reap_idle()
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        with self._cond:
+            for connection, _ in self._idle:
+                self._close(connection)
+            self._idle = []
+
+
+_strategies: Dict[str, Dict[str, Any]] = {}
+_strategies_lock = threading.Lock()
+
+
+def strategy_key(conn: dict) -> str:
+    """Identify a repo's database across conn variants (with or without dbf)"""
+    return f"{conn.get('server')}/{conn.get('dbn')}"
+
+
+def get_conn_strategy(conn: dict) -> Optional[Dict[str, Any]]:
+    """The remembered connection strategy for a repo, if any.
+
+    Returns:
+        Optional[Dict[str, Any]]: i.e. {"variant": "dbn", "failures": 0,
+        "updated": "2024-10-01 12:00:00"}
+    """
+    with _strategies_lock:
+        strategy = _strategies.get(strategy_key(conn))
+        return dict(strategy) if strategy else None
+
+
+def set_conn_strategy(conn: dict, strategy: Optional[Dict[str, Any]]) -> None:
+    """Seed the remembered strategy (i.e. from models.Repo.conn_strategy)"""
+    if not strategy or strategy.get("variant") not in ("dbf", "dbn"):
+        return
+    with _strategies_lock:
+        _strategies.setdefault(strategy_key(conn), dict(strategy))
+
+
+def record_conn_result(conn: dict, variant: str, ok: bool) -> None:
+    """Remember which variant worked, or count a failure of the current one"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with _strategies_lock:
+        key = strategy_key(conn)
+        strategy = _strategies.get(key)
+        if ok:
+            _strategies[key] = {"variant": variant, "failures": 0, "updated": now}
+        elif strategy and strategy["variant"] == variant:
+            strategy["failures"] += 1
+            strategy["updated"] = now
+
+
+def conn_variants(conn: dict) -> List[Tuple[str, dict]]:
+    """Parameter sets to try when connecting, remembered variant first.
+
+    "dbf" uses every param, which (with astart=YES) starts the database if it
+    is not already running. "dbn" drops dbf, which is what works when the
+    database is already running under that name (otherwise SQLAnywhere says
+    "Database name not unique").
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+
+    Returns:
+        List[Tuple[str, dict]]: (variant name, connection params) pairs
+    """
+    by_dbn = {k: v for k, v in conn.items() if k != "dbf"}
+    if "dbf" not in conn:
+        return [("dbn", by_dbn)]
+
+    variants = [("dbf", dict(conn)), ("dbn", by_dbn)]
+    strategy = get_conn_strategy(conn)
+    if strategy and strategy["variant"] == "dbn":
+        variants.reverse()
+    return variants
+
+
+_pools: Dict[Tuple[Tuple[str, str], ...], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_key(conn: dict) -> Tuple[Tuple[str, str], ...]:
+    """Hashable key for a set of SQLAnywhere connection parameters"""
+    return tuple(sorted((str(k), str(v)) for k, v in conn.items()))
+
+
+def get_pool(conn: dict) -> ConnectionPool:
+    """Fetch (or create) the ConnectionPool for a repo's conn params
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+
+    Returns:
+        ConnectionPool: The pool shared by every caller using these params.
+    """
+    key = pool_key(conn)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(conn)
+            _pools[key] = pool
+        return pool
+
+
+def close_pools() -> None:
+    """Close idle connections in every pool (i.e. on shutdown)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+@contextmanager
+def pooled_connection(conn: dict) -> Iterator[pyodbc.Connection]:
+    """Borrow a connection from the pool matching conn
+
+    A governor slot for the repo's server is held for as long as the
+    connection is borrowed (see core.governor). Connections that raise an
+    OperationalError or InterfaceError are closed rather than returned to the
+    pool.
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+
+    Yields:
+        pyodbc.Connection: An open connection to the gxdb.
+    """
+    with governed(conn):
+        pool = get_pool(conn)
+        connection = pool.acquire()
+        discard = False
+        try:
+            yield connection
+        # pylint: disable=c-extension-no-member
+        except (pyodbc.OperationalError, pyodbc.InterfaceError):
+            discard = True
+            raise
+        finally:
+            pool.release(connection, discard=discard)
+
+
+@retry(RetryException, tries=5, delay=0.5, backoff=2, max_delay=8)
 def db_exec(conn: dict, sql: str) -> List[Dict[str, Any]] | Exception:
     """Convenience method for using pyodbc and SQLAnywhere with GeoGraphix
 
@@ -27,8 +311,8 @@ def db_exec(conn: dict, sql: str) -> List[Dict[str, Any]] | Exception:
         List[Dict[str, Any]]: list of dicts representing rows from query result.
 
     Raises:
-        - RetryException: If the gxdb.db file is in use and the database name is
-        not unique, trigger a retry without 'dbf' parameter.
+        - RetryException: If the database name is still not unique after
+        trying both conn_variants, retry with backoff.
         - pyodbc.ProgrammingError: For cases where table(s) might not exist due
         to an unxepected/ancient schema. Schema's >~ 2015 should work.
         - This retry "trick" does not seem to work if you are connected to a
@@ -36,12 +320,7 @@ def db_exec(conn: dict, sql: str) -> List[Dict[str, Any]] | Exception:
     """
 
     try:
-        # pylint: disable=c-extension-no-member
-        with pyodbc.connect(**conn) as connection:
-            # I suspect LMKR does not modify this per locale, but you should
-            # probably verify the gxdb encoding if dealing with non-US data.
-            connection.setencoding("CP1252")
-
+        with pooled_connection(conn) as connection:
             with connection.cursor() as cursor:
                 cursor.execute(sql)
 
@@ -53,7 +332,6 @@ def db_exec(conn: dict, sql: str) -> List[Dict[str, Any]] | Exception:
     except pyodbc.OperationalError as oe:
         logger.error(f"{oe}, context: {conn}")
         if re.search(r"Database name not unique", str(oe)):
-            conn.pop("dbf")
             raise RetryException from oe
         else:
             raise oe
@@ -65,6 +343,33 @@ def db_exec(conn: dict, sql: str) -> List[Dict[str, Any]] | Exception:
         raise ex
 
 
+def db_stream(conn: dict, sql: str, fetch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Like db_exec, but yield rows as dicts while pulling fetchmany batches.
+
+    Use this rather than db_exec when a result may be large. There is no
+    retry here since rows may already have been consumed by the caller.
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+        sql (str): A single SQL statement to execute on the gxdb.
+        fetch_size (int): Number of rows to pull per round-trip.
+
+    Yields:
+        Dict[str, Any]: One row of the query result.
+    """
+    try:
+        with pooled_connection(conn) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                columns = [col[0] for col in cursor.description]
+                while rows := cursor.fetchmany(fetch_size):
+                    for row in rows:
+                        yield dict(zip(columns, row))
+    except pyodbc.Error as e:  # pylint: disable=c-extension-no-member
+        logger.error(f"{e}, context: {conn}")
+        raise e
+
+
 def make_conn_params(repo_path: str, host: str) -> dict:
     """Assemble GeoGraphix-centric connection parameters used by pyodbc
 
@@ -92,3 +397,24 @@ def make_conn_params(repo_path: str, host: str) -> dict:
         "astart": "YES",
     }
     return params
+
+
+def make_conn_string(conn: dict) -> str:
+    """Format connection parameters as an ODBC connection string.
+
+    pyodbc accepts the params as keywords, but other ODBC clients (i.e.
+    arrow-odbc) want the plain string form.
+
+    Args:
+        conn (dict): SQLAnywhere connection parameters.
+
+    Returns:
+        str: "driver={SQL Anywhere 17};uid=dba;..." style connection string.
+    """
+    parts = []
+    for key, value in conn.items():
+        value = str(value)
+        if key == "driver" or ";" in value:
+            value = "{" + value + "}"
+        parts.append(f"{key}={value}")
+    return ";".join(parts)
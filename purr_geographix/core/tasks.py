@@ -0,0 +1,353 @@
+"""Task store for asset collection and recon jobs
+
+uvicorn runs PURR_GEOGRAPHIX_WORKERS processes, so a job's status has to be
+readable from whichever worker a status poll lands on. Jobs are kept in the
+"tasks" table of purr_geographix.sqlite by default (PURR_TASK_STORE=sqlite);
+PURR_TASK_STORE=memory keeps them in the process instead, which only works
+with a single worker.
+
+Each task holds its status and message, the request details, progress
+counters (updated at most every PURR_TASK_PROGRESS_SECONDS while it runs),
+the job's result (i.e. the export file path) and its timings. Tasks are
+deleted PURR_TASK_TTL seconds after they finish (or stop updating).
+
+A task created with a job_key is single-flight: while an unfinished task
+has the same key, create returns that task instead (in the sqlite store a
+partial unique index makes this atomic across workers).
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, bindparam, literal, or_, update
+from sqlalchemy.exc import IntegrityError
+
+import purr_geographix.core.models as models
+from purr_geographix.core.database import SessionLocal
+from purr_geographix.core.logger import logger
+from purr_geographix.core.schemas import TaskStatus
+
+TASK_STORE = os.environ.get("PURR_TASK_STORE", "sqlite")
+TASK_TTL = int(os.environ.get("PURR_TASK_TTL", "86400"))
+TASK_PROGRESS_SECONDS = float(os.environ.get("PURR_TASK_PROGRESS_SECONDS", "2"))
+
+FINISHED = (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value)
+
+
+def jsonable(value: Any) -> Any:
+    """A job result as plain JSON types (i.e. Path to str)"""
+    return json.loads(json.dumps(value, default=str))
+
+
+class TaskStore(ABC):
+    """Interface of a task store. Tasks are dicts: id, kind, task_status,
+    task_message, the request params (flattened, so they fit the response
+    models), progress, result, queue_position, created_at, started_at and
+    finished_at.
+    """
+
+    @abstractmethod
+    def create(
+        self,
+        task_id: str,
+        kind: str,
+        message: str = "",
+        job_key: Optional[str] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """Add a pending task and return it, or return the unfinished task
+        with the same job_key (its id is then not task_id)
+        """
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """A task, or None if it is unknown (or expired)"""
+
+    @abstractmethod
+    def update(self, task_id: str, **fields: Any) -> None:
+        """Set some of a task's fields (see models.Task)"""
+
+    @abstractmethod
+    def purge(self) -> int:
+        """Delete expired tasks, returning how many"""
+
+    def start(self, task_id: str) -> None:
+        """Mark a task in progress"""
+        self.update(
+            task_id,
+            task_status=TaskStatus.IN_PROGRESS.value,
+            queue_position=None,
+            started_at=datetime.now(),
+        )
+
+    def set_queue_positions(self, positions: Dict[str, int]) -> None:
+        """Set the queue_position of several queued tasks (see scheduler.py)"""
+        for task_id, position in positions.items():
+            self.update(task_id, queue_position=position)
+
+    def progress(self, task_id: str, counters: Dict[str, Any]) -> None:
+        """Replace a running task's progress counters"""
+        self.update(task_id, progress=dict(counters))
+
+    def finish(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        message: str,
+        result: Optional[Any] = None,
+    ) -> None:
+        """Mark a task completed or failed, with the job's result"""
+        self.update(
+            task_id,
+            task_status=status.value,
+            task_message=message,
+            result=jsonable(result),
+            finished_at=datetime.now(),
+        )
+
+
+def task_dict(task: models.Task) -> Dict[str, Any]:
+    """A models.Task as a task dict (see TaskStore)"""
+    return {
+        **(task.params or {}),
+        "id": task.id,
+        "kind": task.kind,
+        "task_status": task.task_status,
+        "task_message": task.task_message,
+        "progress": task.progress or {},
+        "result": task.result,
+        "queue_position": task.queue_position,
+        "created_at": task.created_at,
+        "started_at": task.started_at,
+        "finished_at": task.finished_at,
+    }
+
+
+class SqliteTaskStore(TaskStore):
+    """Tasks in the purr_geographix.sqlite "tasks" table (all workers)"""
+
+    def create(
+        self,
+        task_id: str,
+        kind: str,
+        message: str = "",
+        job_key: Optional[str] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        self.purge()
+        now = datetime.now()
+        task = models.Task(
+            id=task_id,
+            kind=kind,
+            task_status=TaskStatus.PENDING.value,
+            task_message=message,
+            params=jsonable(params),
+            job_key=job_key,
+            progress={},
+            created_at=now,
+            updated_at=now,
+        )
+        with SessionLocal() as db:
+            db.add(task)
+            try:
+                db.commit()
+                return task_dict(task)
+            except IntegrityError:
+                # ix_tasks_job_key_unfinished: an identical job is unfinished
+                db.rollback()
+                if job_key is None:
+                    raise
+            running = (
+                db.query(models.Task)
+                .filter(
+                    models.Task.job_key == job_key, models.Task.finished_at.is_(None)
+                )
+                .first()
+            )
+            if running is not None:
+                return task_dict(running)
+        # it finished in the meantime
+        return self.create(task_id, kind, message, job_key, **params)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with SessionLocal() as db:
+            task = db.get(models.Task, task_id)
+            return None if task is None else task_dict(task)
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        stmt = (
+            update(models.Task)
+            .where(models.Task.id == task_id)
+            .values(**fields, updated_at=datetime.now())
+        )
+        with SessionLocal() as db:
+            db.execute(stmt)
+            db.commit()
+
+    def set_queue_positions(self, positions: Dict[str, int]) -> None:
+        # one transaction rather than a commit per queued task
+        if not positions:
+            return
+        # Core, not the ORM's bulk update by primary key (which raises on purged ids)
+        table = models.Base.metadata.tables[models.Task.__tablename__]
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("task_id"))
+            .values(queue_position=bindparam("position"), updated_at=datetime.now())
+        )
+        with SessionLocal() as db:
+            db.execute(
+                stmt,
+                [
+                    {"task_id": task_id, "position": position}
+                    for task_id, position in positions.items()
+                ],
+            )
+            db.commit()
+
+    def purge(self) -> int:
+        cutoff = datetime.now() - timedelta(seconds=TASK_TTL)
+        with SessionLocal() as db:
+            # unfinished tasks that stopped updating were on a dead worker
+            expired = or_(
+                and_(
+                    models.Task.task_status.in_(FINISHED),
+                    models.Task.finished_at < literal(cutoff),
+                ),
+                models.Task.updated_at < literal(cutoff),
+            )
+            count = db.query(models.Task).filter(expired).delete()
+            db.commit()
+        if count:
+            logger.debug(f"purged {count} expired tasks")
+        return count
+
+
+class MemoryTaskStore(TaskStore):
+    """Tasks in a dict (this process only)"""
+
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        task_id: str,
+        kind: str,
+        message: str = "",
+        job_key: Optional[str] = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        self.purge()
+        now = datetime.now()
+        task = {
+            **jsonable(params),
+            "id": task_id,
+            "kind": kind,
+            "task_status": TaskStatus.PENDING.value,
+            "task_message": message,
+            "progress": {},
+            "result": None,
+            "queue_position": None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "updated_at": now,
+            "job_key": job_key,
+        }
+        with self._lock:
+            running = [
+                t
+                for t in self._tasks.values()
+                if job_key is not None
+                and t["job_key"] == job_key
+                and t["finished_at"] is None
+            ]
+            if running:
+                return self._public(running[0])
+            self._tasks[task_id] = task
+            return self._public(task)
+
+    @staticmethod
+    def _public(task: Dict[str, Any]) -> Dict[str, Any]:
+        """A copy of a task without the store's bookkeeping fields"""
+        return {k: v for k, v in task.items() if k not in ("updated_at", "job_key")}
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return None if task is None else self._public(task)
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id].update(fields, updated_at=datetime.now())
+
+    def purge(self) -> int:
+        cutoff = datetime.now() - timedelta(seconds=TASK_TTL)
+        with self._lock:
+            expired = [
+                task_id
+                for task_id, task in self._tasks.items()
+                if task["updated_at"] < cutoff
+                or (task["finished_at"] and task["finished_at"] < cutoff)
+            ]
+            for task_id in expired:
+                del self._tasks[task_id]
+        return len(expired)
+
+
+def get_task_store(kind: Optional[str] = None) -> TaskStore:
+    """Create the task store (default: PURR_TASK_STORE)
+
+    Args:
+        kind (Optional[str]): "sqlite" or "memory"
+
+    Returns:
+        TaskStore: falls back to sqlite if kind is unknown
+    """
+    kind = kind or TASK_STORE
+    if kind == "memory":
+        return MemoryTaskStore()
+    if kind != "sqlite":
+        logger.warning(f"unknown task store: {kind}, using sqlite")
+    return SqliteTaskStore()
+
+
+class ProgressReporter:
+    """Callable that saves a task's progress counters, at most every
+    interval seconds (it is called per batch, from a worker thread).
+
+    Args:
+        store (TaskStore): The task store.
+        task_id (str): The running task.
+        interval (float): Minimum seconds between saves.
+    """
+
+    def __init__(
+        self, store: TaskStore, task_id: str, interval: float = TASK_PROGRESS_SECONDS
+    ):
+        self.store = store
+        self.task_id = task_id
+        self.interval = interval
+        self.counters: Dict[str, Any] = {}
+        self._saved = time.monotonic()
+
+    def __call__(self, **counters: Any) -> None:
+        self.counters.update(counters)
+        if time.monotonic() - self._saved >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Save the latest counters now"""
+        if self.counters:
+            self.store.progress(self.task_id, self.counters)
+        self._saved = time.monotonic()
+
+
+task_store = get_task_store()
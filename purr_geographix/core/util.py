@@ -182,7 +182,7 @@ def timestamp_filename(repo_id: str, asset: str, ext: str = "json"):
     Args:
         repo_id (str): The repo_id (three-letter + hash)
         asset (str): The specific (enum) data type from which this data came.
-        ext (Optional[str]): file extension--json for now
+        ext (Optional[str]): file extension, i.e. json, ndjson.zst or parquet
 
     Returns:
         str: A plausibly unique export file name
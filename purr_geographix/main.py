@@ -1,6 +1,7 @@
 """Main entry point of purr_geographix"""
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 import os
 import uvicorn
@@ -9,7 +10,9 @@ from purr_geographix.assets.collect import routes_assets
 from purr_geographix.core.crud import init_file_depot
 from purr_geographix.core.database import get_db
 from purr_geographix.core.logger import logger
+from purr_geographix.core.sqlanywhere import close_pools
 from purr_geographix.prep.setup import prepare
+from purr_geographix.recon.recon import exact_count_refresher
 
 
 @asynccontextmanager
@@ -21,7 +24,14 @@ async def lifespan(fastapp: FastAPI):  # pylint: disable=unused-argument
     """
     db = next(get_db())
     init_file_depot(db)
+    # replaces counts from fast (approximate) recon runs with exact ones; every
+    # worker runs it but each repo is claimed by one (crud.claim_repo_counts)
+    refresher = asyncio.create_task(exact_count_refresher())
     yield
+    refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresher
+    close_pools()
 
 
 app = FastAPI(lifespan=lifespan)
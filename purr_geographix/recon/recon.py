@@ -1,27 +1,46 @@
 """Main entry for Repo Recon"""
 
 import asyncio
+import os
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any
-from purr_geographix.core.crud import upsert_repos
+from purr_geographix.core.crud import (
+    claim_repo_counts,
+    get_approximate_repos,
+    get_repos,
+    release_repo_counts,
+    update_repo_counts,
+    upsert_repos,
+)
 from purr_geographix.core.database import get_db
-from purr_geographix.core.sqlanywhere import make_conn_params
+from purr_geographix.core.sqlanywhere import (
+    get_conn_strategy,
+    make_conn_params,
+    set_conn_strategy,
+)
 from purr_geographix.core.util import generate_repo_id, async_wrap
 from purr_geographix.recon.epsg import epsg_codes
-from purr_geographix.recon.repo_db import well_counts, get_polygon, check_gxdb
+from purr_geographix.recon.repo_db import exact_counts, probe_repo
 from purr_geographix.recon.repo_fs import network_repo_scan, dir_stats, repo_mod
 from purr_geographix.core.schemas import Repo
 from purr_geographix.core.logger import logger
 
+# seconds between background passes replacing approximate counts (0 = never)
+EXACT_COUNT_INTERVAL = int(os.environ.get("PURR_EXACT_COUNT_INTERVAL", "3600"))
+
 
 async def repo_recon(
-    recon_root: str, ggx_host: str = "localhost"
+    recon_root: str, ggx_host: str = "localhost", fast: bool = False
 ) -> List[Dict[str, Any]]:
     """Recursively crawl a network path for GeoGraphix project metadata.
 
     1. repo_paths: identify potential repos by file structure
     2. create initial repo_base dict for each potential repo
-    3. repo_list: check SQLAnywhere connectivity, reject (but log) failures
+    3. probe each repo's gxdb in one session (connectivity, well counts and
+       polygon), reject (but log) failures. In fast mode the well counts are
+       estimates, flagged counts_approximate until exact_count_refresher
+       replaces them.
     4. define and run 'augment' functions to add metadata to each repo_base
     5. validate dict against pydantic Repo schema and save to sqlite
     6. reformat repo.repo_mod to string to permit json serialization
@@ -29,6 +48,7 @@ async def repo_recon(
     Args:
         recon_root (str): A directory containing GeoGraphix repos (projects).
         ggx_host (str): Hostname or IP of the GeoGraphix project *server.
+        fast (bool): Estimate well counts from catalog statistics.
 
     * You can technically use any PC with GeoGraphix installed, but performance
     is best if you use the actual project server since it has probably been
@@ -43,18 +63,30 @@ async def repo_recon(
     repo_paths = await network_repo_scan(recon_root)
     repo_list = [create_repo_base(rp, ggx_host) for rp in repo_paths]
 
-    # make another pass to verify gxdb
-    repo_list = [repo_base for repo_base in repo_list if check_gxdb(repo_base)]
+    # start from whichever connection variant worked last time
+    db = next(get_db())
+    known: Dict[str, Any] = {str(repo.id): repo.conn_strategy for repo in get_repos(db)}
+    db.close()
+    for repo_base in repo_list:
+        set_conn_strategy(repo_base["conn"], known.get(repo_base["id"]))
 
-    augment_funcs = [well_counts, get_polygon, epsg_codes, dir_stats, repo_mod]
+    augment_funcs = [epsg_codes, dir_stats, repo_mod]
 
     async def update_repo(repo_base):
+        # the probe doubles as the gxdb check
+        probe = await async_wrap(probe_repo)(repo_base, fast)
+        if probe is None:
+            return None
+        repo_base.update(probe)
+
         for func in augment_funcs:
             repo_base.update(await async_wrap(func)(repo_base))
             logger.debug(f"{repo_base} applied function: {func}")
+        repo_base["conn_strategy"] = get_conn_strategy(repo_base["conn"])
         return repo_base
 
     repos = await asyncio.gather(*[update_repo(repo) for repo in repo_list])
+    repos = [repo for repo in repos if repo is not None]
 
     valid_repo_dicts = [Repo(**r).model_dump() for r in repos]
 
@@ -81,3 +113,64 @@ def create_repo_base(rp: str, ggx_host: str) -> Dict[str, Any]:
         "conn_aux": {"ggx_host": ggx_host},
         "suite": "geographix",
     }
+
+
+async def refresh_approximate_counts(claim_ttl: int = EXACT_COUNT_INTERVAL) -> int:
+    """Replace the well counts of every counts_approximate repo with exact ones
+
+    Each repo is claimed first (see crud.claim_repo_counts), so when several
+    workers run this pass only one of them recounts a given repo. A failed
+    recount releases its claim and the next pass tries again.
+
+    Args:
+        claim_ttl (int): Seconds before another worker's claim is expired.
+
+    Returns:
+        int: Number of repos updated
+    """
+    db = next(get_db())
+    repos = get_approximate_repos(db)
+    db.close()
+
+    refreshed = 0
+    for repo in repos:
+        repo_id = str(repo.id)
+        db = next(get_db())
+        stale_before = datetime.now() - timedelta(seconds=claim_ttl)
+        claimed = claim_repo_counts(db, repo_id, stale_before)
+        db.close()
+        if not claimed:
+            continue
+        repo_base = {"conn": repo.conn, "fs_path": repo.fs_path}
+        counts = None
+        try:
+            counts = await async_wrap(exact_counts)(repo_base)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(f"exact count failed for {repo.fs_path}: {e}")
+        db = next(get_db())
+        if counts is None:
+            release_repo_counts(db, repo_id)
+        else:
+            update_repo_counts(db, repo_id, counts)
+            refreshed += 1
+        db.close()
+
+    if repos:
+        logger.info(f"refreshed exact counts for {refreshed}/{len(repos)} repos")
+    return refreshed
+
+
+async def exact_count_refresher(interval: int = EXACT_COUNT_INTERVAL) -> None:
+    """Run refresh_approximate_counts every interval seconds (see lifespan)
+
+    Args:
+        interval (int): Seconds between passes, 0 disables the refresher.
+    """
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_approximate_counts(interval)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(f"exact count refresh failed: {e}")
@@ -1,10 +1,13 @@
 """Stuff involving metadata within Repo databases"""
 
-from typing import Dict, List, Optional, Tuple
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from shapely.geometry import Polygon, MultiPolygon
 import numpy as np
+import pyodbc
 import alphashape  # mypy: ignore-missing-imports
-from purr_geographix.core.sqlanywhere import db_exec
+from purr_geographix.core.sqlanywhere import db_exec, pooled_connection
 from purr_geographix.core.logger import logger
 
 # from purr_geographix.core.util import debugger
@@ -63,6 +66,89 @@ WELLS_WITH_VECTOR_LOG = "SELECT COUNT(DISTINCT wellid) AS tally FROM gx_well_cur
 
 WELLS_WITH_ZONE = "SELECT COUNT(DISTINCT uwi) AS tally FROM well_zone_interval"
 
+COUNTER_SQL = {
+    "well_count": WELLS,
+    "wells_with_completion": WELLS_WITH_COMPLETION,
+    "wells_with_core": WELLS_WITH_CORE,
+    "wells_with_dst": WELLS_WITH_DST,
+    "wells_with_formation": WELLS_WITH_FORMATION,
+    "wells_with_ip": WELLS_WITH_IP,
+    "wells_with_perforation": WELLS_WITH_PERFORATION,
+    "wells_with_production": WELLS_WITH_PRODUCTION,
+    "wells_with_raster_log": WELLS_WITH_RASTER_LOG,
+    "wells_with_survey": WELLS_WITH_SURVEY,
+    "wells_with_vector_log": WELLS_WITH_VECTOR_LOG,
+    "wells_with_zone": WELLS_WITH_ZONE,
+}
+
+
+# FAST (APPROXIMATE) COUNTS ###################################################
+
+# rows read per table to estimate the distinct ids per row
+APPROX_SAMPLE_ROWS = int(os.environ.get("PURR_APPROX_SAMPLE_ROWS", "10000"))
+
+# count key: (table, id column, row filter) for each table that feeds it
+APPROX_SOURCES: Dict[str, List[Tuple[str, str, str]]] = {
+    "wells_with_completion": [("well_completion", "uwi", "1=1")],
+    "wells_with_core": [("well_core", "uwi", "1=1")],
+    "wells_with_dst": [("well_test", "uwi", "test_type = 'DST'")],
+    "wells_with_formation": [("well_formation", "uwi", "1=1")],
+    "wells_with_ip": [("well_test", "uwi", "test_type = 'IP'")],
+    "wells_with_perforation": [("well_perforation", "uwi", "1=1")],
+    "wells_with_production": [("well_cumulative_production", "uwi", "1=1")],
+    "wells_with_raster_log": [("log_image_reg_log_section", "well_id", "1=1")],
+    "wells_with_survey": [
+        ("well_dir_srvy_station", "uwi", "1=1"),
+        ("well_dir_proposed_srvy_station", "uwi", "1=1"),
+    ],
+    "wells_with_vector_log": [("gx_well_curve", "wellid", "1=1")],
+    "wells_with_zone": [("well_zone_interval", "uwi", "1=1")],
+}
+
+
+def catalog_rows(table: str) -> str:
+    """Row count maintained by SQLAnywhere in the catalog (no table scan)"""
+    return f"SELECT MAX(count) FROM SYS.SYSTAB WHERE table_name = '{table}'"
+
+
+def approx_distinct(table: str, column: str, where: str, sample: int) -> str:
+    """Estimate COUNT(DISTINCT column) as catalog rows * distinct ids per row,
+    with the ratio taken from the first sample rows of the table. GeoGraphix
+    child rows are mostly stored clustered by well, so this is usually close;
+    exact counts replace it later (see recon.refresh_approximate_counts).
+    """
+    return (
+        "SELECT CAST(CASE WHEN COUNT(*) = 0 THEN 0 ELSE "
+        f"({catalog_rows(table)}) * COUNT(DISTINCT CASE WHEN hit = 1 THEN id END) "
+        "/ COUNT(*) END AS BIGINT) "
+        f"FROM (SELECT TOP {sample} {column} AS id, "
+        f"CASE WHEN {where} THEN 1 ELSE 0 END AS hit FROM {table}) s"
+    )
+
+
+APPROX_COUNTER_SQL = {
+    "well_count": catalog_rows("well"),
+    **{
+        key: " + ".join(
+            f"({approx_distinct(t, c, w, APPROX_SAMPLE_ROWS)})" for t, c, w in sources
+        )
+        for key, sources in APPROX_SOURCES.items()
+    },
+}
+
+
+def cap_counts(counts: Dict[str, Optional[int]]) -> Dict[str, Optional[int]]:
+    """Keep estimates within 0..well_count (sampling can overshoot)"""
+    wells = counts.get("well_count")
+    capped = {}
+    for key, tally in counts.items():
+        if tally is not None and key != "well_count":
+            tally = max(0, int(tally))
+            if wells is not None:
+                tally = min(tally, wells)
+        capped[key] = tally
+    return capped
+
 
 def check_gxdb(repo_base) -> bool:
     """A simple query to see if a SQLAnywhere/gxdb database is accessible
@@ -96,24 +182,9 @@ def well_counts(repo_base) -> Dict[str, Optional[int]]:
     """
     logger.info(f"well_counts: {repo_base['fs_path']}")
 
-    counter_sql = {
-        "well_count": WELLS,
-        "wells_with_completion": WELLS_WITH_COMPLETION,
-        "wells_with_core": WELLS_WITH_CORE,
-        "wells_with_dst": WELLS_WITH_DST,
-        "wells_with_formation": WELLS_WITH_FORMATION,
-        "wells_with_ip": WELLS_WITH_IP,
-        "wells_with_perforation": WELLS_WITH_PERFORATION,
-        "wells_with_production": WELLS_WITH_PRODUCTION,
-        "wells_with_raster_log": WELLS_WITH_RASTER_LOG,
-        "wells_with_survey": WELLS_WITH_SURVEY,
-        "wells_with_vector_log": WELLS_WITH_VECTOR_LOG,
-        "wells_with_zone": WELLS_WITH_ZONE,
-    }
-
     counts: Dict[str, Optional[int]] = {}
 
-    for key, sql in counter_sql.items():
+    for key, sql in COUNTER_SQL.items():
         res = db_exec(repo_base["conn"], sql)
 
         if isinstance(res, Exception):
@@ -185,8 +256,13 @@ def get_polygon(repo_base) -> Dict[str, Optional[List[Tuple[float, float]]]]:
         logger.error(f"{res}, context: {repo_base["fs_path"]}")
         return {"polygon": None}
 
-    points = [[r["lon"], r["lat"]] for r in res]
+    return polygon_from_points([[r["lon"], r["lat"]] for r in res], repo_base)
 
+
+def polygon_from_points(
+    points: List[List[float]], repo_base
+) -> Dict[str, Optional[List[Tuple[float, float]]]]:
+    """Closed concave hull of lon/lat points (see get_polygon)"""
     if len(points) < 3:
         logger.warning(f"Too few valid Lon/Lat, context: {repo_base["name"]}")
         return {"polygon": None}
@@ -201,3 +277,120 @@ def get_polygon(repo_base) -> Dict[str, Optional[List[Tuple[float, float]]]]:
     hull.append(first_point)
 
     return {"polygon": hull}
+
+
+def run_counts(
+    cursor, counter_sql: Dict[str, str], timed, context: str
+) -> Dict[str, Optional[int]]:
+    """Run each count statement on an open cursor.
+
+    Counts run one statement at a time (so each one is timed by itself), and
+    a failing count (i.e. a table missing from an ancient schema) ends up as
+    None without affecting the others.
+
+    Args:
+        cursor: An open pyodbc cursor.
+        counter_sql (Dict[str, str]): The count statements, by count key.
+        timed: Callable(cursor, key, sql) that executes and fetches all rows.
+        context (str): fs_path for log messages.
+
+    Returns:
+        Dict[str, Optional[int]]: A count per key
+    """
+    # pylint: disable=c-extension-no-member
+    counts: Dict[str, Optional[int]] = {}
+    for key, sql in counter_sql.items():
+        try:
+            counts[key] = timed(cursor, key, sql)[0][0] or 0
+        except pyodbc.Error as e:
+            logger.error(f"{e}, context: {context}")
+            counts[key] = None
+    return counts
+
+
+def probe_repo(repo_base, fast: bool = False) -> Optional[Dict[str, Any]]:
+    """Collect check_gxdb, well_counts and get_polygon metadata in one session.
+
+    Rather than a connection per statement, this borrows one pooled
+    connection and runs: db_name(), each count (see run_counts), and the
+    lon/lat pull. Per-statement timings (ms) are logged.
+
+    In fast mode the wells_with_* counts are estimated from catalog row
+    counts and a sampled distinct ratio instead of COUNT(DISTINCT) scans, and
+    the result is flagged with counts_approximate.
+
+    Args:
+        repo_base (dict): A stub repo dict.
+        fast (bool): Estimate counts rather than scanning for exact ones.
+
+    Returns:
+        Optional[Dict[str, Any]]: counts and polygon, or None if the gxdb is
+        not accessible (same as check_gxdb returning False).
+    """
+    logger.info(f"probe_repo{' (fast)' if fast else ''}: {repo_base['fs_path']}")
+
+    timings: Dict[str, float] = {}
+
+    def timed(cursor, key: str, sql: str) -> List[Any]:
+        start = time.perf_counter()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchall()
+        finally:
+            timings[key] = round((time.perf_counter() - start) * 1000, 1)
+
+    counter_sql = APPROX_COUNTER_SQL if fast else COUNTER_SQL
+
+    # pylint: disable=c-extension-no-member
+    try:
+        with pooled_connection(repo_base["conn"]) as connection:
+            with connection.cursor() as cursor:
+                timed(cursor, "db_name", "select db_name()")
+
+                counts = run_counts(cursor, counter_sql, timed, repo_base["fs_path"])
+                if fast:
+                    counts = cap_counts(counts)
+
+                try:
+                    points = [list(r) for r in timed(cursor, "lonlat", NOTNULL_LONLAT)]
+                except pyodbc.Error as e:
+                    logger.error(f"{e}, context: {repo_base["fs_path"]}")
+                    points = []
+
+    except pyodbc.Error as e:
+        logger.warning(f"Looks like a GGX project but has invalid gxdb?: {e}")
+        return None
+
+    logger.info(f"probe_repo timings (ms) {repo_base['name']}: {timings}")
+
+    return {
+        **counts,
+        **polygon_from_points(points, repo_base),
+        "counts_approximate": fast,
+    }
+
+
+def exact_counts(repo_base) -> Optional[Dict[str, Optional[int]]]:
+    """Exact well counts in one pooled session (replaces a fast probe's).
+
+    Args:
+        repo_base (dict): A repo dict (needs conn and fs_path).
+
+    Returns:
+        Optional[Dict[str, Optional[int]]]: A count per key, or None if the
+        gxdb is not accessible.
+    """
+    logger.info(f"exact_counts: {repo_base['fs_path']}")
+
+    def timed(cursor, _key: str, sql: str) -> List[Any]:
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+    # pylint: disable=c-extension-no-member
+    try:
+        with pooled_connection(repo_base["conn"]) as connection:
+            with connection.cursor() as cursor:
+                return run_counts(cursor, COUNTER_SQL, timed, repo_base["fs_path"])
+    except pyodbc.Error as e:
+        logger.warning(f"exact_counts failed for {repo_base['fs_path']}: {e}")
+        return None
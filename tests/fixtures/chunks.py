@@ -0,0 +1,223 @@
+"""Synthetic selector chunks, as the pyodbc fetch engine returns them
+
+Each chunk is (column_types, rows): the types as get_column_info maps them
+and the row tuples (Python values: Decimal, datetime, None, PURR_DELIM
+strings for LIST(...) columns) in w_uwi order. load_chunk turns one into
+the raw DataFrame that transform_batch gets (see benchmark.record_chunk).
+The column sets are trimmed versions of the recipes' selectors.
+
+tests/golden/<asset>.ndjson holds the docs the per-row pipeline (list
+aggregation and series_row_to_json, before ragged.py) built from each
+chunk, one json.dumps(doc, default=str) per line.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from purr_geographix.assets.collect.xformer import PURR_DELIM, PURR_NULL
+
+N = PURR_NULL
+
+Chunk = Tuple[Dict[str, str], List[tuple]]
+
+
+def cell(*values: str) -> Optional[str]:
+    """A LIST(...) cell, None if the well has no child rows"""
+    return PURR_DELIM.join(values) if values else None
+
+
+well_types = {
+    "w_gx_wsn": "int64",
+    "w_uwi": "string",
+    "w_well_name": "string",
+    "w_operator": "string",
+    "w_row_changed_date": "datetime64[ns]",
+}
+
+wells = {
+    "0500100001": (1, "0500100001", "Alpha 1", "ACME", datetime(2021, 3, 4, 5, 6, 7)),
+    "0500100002": (2, "0500100002", None, None, None),
+    "0500100003": (None, "0500100003", " Gamma\x013 ", "Zeta Oil", None),
+    "0500100004": (4, "0500100004", "Delta 4", "ACME", datetime(2020, 1, 1)),
+}
+
+chunks: Dict[str, Chunk] = {
+    "well": (
+        {**well_types, "c_township": "int64", "c_section": "string"},
+        [
+            wells["0500100001"] + (12, "31"),
+            wells["0500100002"] + (None, None),
+            wells["0500100003"] + (7, None),
+        ],
+    ),
+    "survey": (
+        {
+            **well_types,
+            "s_survey_id": "string",
+            "s_base_depth": "float64",
+            "s_survey_date": "datetime64[ns]",
+            "d_station_id": "string",
+            "d_station_md": "string",
+            "d_azimuth": "string",
+            "d_row_changed_date": "string",
+        },
+        [
+            wells["0500100001"]
+            + (
+                "S1",
+                Decimal("1520.5"),
+                datetime(2019, 6, 1, 12, 30),
+                cell("1", "2", "3"),
+                cell("0", "100.25", "200"),
+                cell("0", N, "45.5"),
+                cell("2019-06-01 12:30:00.25", N, "2019-06-02"),
+            ),
+            wells["0500100001"]
+            + (
+                "S2",
+                None,
+                None,
+                cell("1"),
+                cell("0"),
+                cell("12"),
+                cell("2019-06-03 00:00:00"),
+            ),
+            wells["0500100002"] + ("S1", Decimal("0"), None, None, None, None, None),
+            wells["0500100003"]
+            + (
+                None,
+                Decimal("-3.25"),
+                datetime(2018, 1, 1),
+                cell(N, ""),
+                cell(N, "1_000"),
+                cell("x", "1e3"),
+                cell("", N),
+            ),
+        ],
+    ),
+    "production": (
+        {
+            **well_types,
+            "p_zone_id": "string",
+            "p_cumulative_oil_volume": "float64",
+            "p_first_oil_volume_date": "datetime64[ns]",
+            "m_pden_date": "string",
+            "m_pden_source": "string",
+            "m_oil_volume": "string",
+            "m_volume_year": "string",
+        },
+        [
+            wells["0500100001"]
+            + (
+                "BAKKEN",
+                Decimal("1234.5"),
+                datetime(2015, 2, 1),
+                cell("2015-02-01 00:00:00", "2015-03-01 00:00:00"),
+                cell("STATE", "STATE"),
+                cell("10.5", N),
+                cell("2015", "2015"),
+            ),
+            wells["0500100001"]
+            + (
+                "THREE FORKS",
+                None,
+                None,
+                cell("2016-01-01 00:00:00"),
+                cell(" IHS "),
+                cell("0"),
+                cell("2016"),
+            ),
+            wells["0500100004"] + ("NIOBRARA", Decimal("7"), None) + (None,) * 4,
+        ],
+    ),
+    "zone": (
+        {
+            **well_types,
+            "i_zone_name": "string",
+            "i_top_md": "float64",
+            "i_row_changed_date": "datetime64[ns]",
+            "v_zattribute_name": "string",
+            "v_zattribute_value_numeric": "string",
+            "v_zattribute_value_date": "string",
+            "g_zattribute_decimals": "string",
+            "z_domain": "string",
+        },
+        [
+            wells["0500100001"]
+            + (
+                "NIOBRARA",
+                Decimal("6012.75"),
+                datetime(2022, 5, 6, 7, 8, 9),
+                cell("PHI", "SW", "TESTED"),
+                cell("0.12", "0.4", N),
+                cell(N, N, "2022-05-06 00:00:00"),
+                cell("2", "2", "0"),
+                "GEOLOGIC",
+            ),
+            wells["0500100001"]
+            + ("CODELL", Decimal("6200"), None, None, None, None, None, None),
+            wells["0500100003"]
+            + (
+                "NIOBRARA",
+                None,
+                None,
+                cell("PHI"),
+                cell("bad"),
+                cell("2021-13-01"),
+                cell("x"),
+                "GEOLOGIC",
+            ),
+            wells["0500100004"]
+            + (
+                "NIOBRARA",
+                Decimal("5900.1"),
+                datetime(2020, 2, 2),
+                cell("PHI"),
+                cell("0.08"),
+                cell(""),
+                cell("2"),
+                None,
+            ),
+        ],
+    ),
+}
+
+
+def load_chunk(asset: str) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """A fresh raw DataFrame of an asset's chunk and its column types"""
+    column_types, rows = chunks[asset]
+    return pd.DataFrame(rows, columns=list(column_types)), dict(column_types)
+
+
+def standardize_cases() -> Dict[str, Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """Raw frames for standardize_df_columns: nullable ints, all-None,
+    datetime and Decimal columns, and an empty frame
+    """
+    column_types = {
+        "ints": "int64",
+        "nullable_ints": "int64",
+        "none_ints": "int64",
+        "strings": "string",
+        "none_strings": "string",
+        "dates": "datetime64[ns]",
+        "none_dates": "datetime64[ns]",
+        "decimals": "float64",
+        "floats": "float64",
+        "bools": "bool",
+        "blobs": "object",
+    }
+    rows = [
+        (1, 1, None, "a", None, datetime(2020, 1, 1, 0, 0, 0, 500000), None)
+        + (Decimal("1.25"), 1.5, True, b"\x01"),
+        (2, None, None, None, None, None, None, None, None, False, None),
+        (3, 3, None, " c ", None, datetime(2021, 12, 31, 23, 59, 59), None)
+        + (Decimal("-7"), float("nan"), True, b""),
+    ]
+    columns = list(column_types)
+    return {
+        "mixed": (pd.DataFrame(rows, columns=columns), column_types),
+        "empty": (pd.DataFrame([], columns=columns), column_types),
+    }
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import purr_geographix.core.models as models
+
+cache = pytest.importorskip(
+    "purr_geographix.assets.collect.cache", exc_type=ImportError
+)
+
+
+@pytest.fixture
+def db():
+    """An in-memory SQLite session"""
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def export(depot, name, text="[]"):
+    """A finished export file in the depot"""
+    out_file = depot / name
+    out_file.write_text(text, encoding="utf-8")
+    return out_file
+
+
+def store(db, depot, out_file, fingerprint="fs:1", uwi_list=None):
+    """cache_store an export of "well" from repo r1, return its key"""
+    key, params = cache.cache_key("r1", "well", fingerprint, uwi_list=uwi_list)
+    cache.cache_store(db, depot, key, "r1", "well", params, fingerprint, out_file)
+    return key
+
+
+def test_cache_miss(db, tmp_path):
+    key, _ = cache.cache_key("r1", "well", "fs:1", uwi_list=None)
+    assert cache.cache_lookup(db, tmp_path, key) is None
+
+
+def test_cache_hit_is_a_cached_copy(db, tmp_path):
+    first = export(tmp_path, "well_1.json", '[{"well": {}}]')
+    key = store(db, tmp_path, first)
+
+    cached = cache.cache_lookup(db, tmp_path, key)
+    assert cached is not None and cached.parent == tmp_path / cache.CACHE_DIR
+    assert cached.read_text(encoding="utf-8") == '[{"well": {}}]'
+
+    second = tmp_path / "well_2.json"
+    cache.link_or_copy(cached, second)
+    assert first.is_file() and second.is_file()
+    assert db.get(models.ExportCacheEntry, key).hits == 1
+
+
+def test_cache_stale_fingerprint(db, tmp_path):
+    first = export(tmp_path, "well_1.json")
+    old_key = store(db, tmp_path, first, fingerprint="fs:1")
+    old_copy = cache.cache_lookup(db, tmp_path, old_key)
+
+    second = export(tmp_path, "well_2.json")
+    new_key = store(db, tmp_path, second, fingerprint="fs:2")
+
+    assert cache.cache_lookup(db, tmp_path, old_key) is None
+    assert not old_copy.exists()
+    assert cache.cache_lookup(db, tmp_path, new_key) is not None
+    assert first.is_file() and second.is_file()
+
+
+def test_cache_eviction_keeps_export_files(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "EXPORT_CACHE_ENTRIES", 1)
+    first = export(tmp_path, "well_1.json")
+    first_key = store(db, tmp_path, first, uwi_list=["05%"])
+    second = export(tmp_path, "well_2.json")
+    second_key = store(db, tmp_path, second, uwi_list=["42%"])
+
+    assert cache.cache_lookup(db, tmp_path, first_key) is None
+    assert cache.cache_lookup(db, tmp_path, second_key) is not None
+    assert [p.name for p in (tmp_path / cache.CACHE_DIR).iterdir()] == [
+        f"{second_key}_well_2.json"
+    ]
+    assert first.is_file() and second.is_file()
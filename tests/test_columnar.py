@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+columnar = pytest.importorskip(
+    "purr_geographix.assets.collect.columnar", exc_type=ImportError
+)
+sqlanywhere = pytest.importorskip(
+    "purr_geographix.core.sqlanywhere", exc_type=ImportError
+)
+
+
+def frame(*uwis):
+    return pd.DataFrame({"w_uwi": list(uwis), "n": range(len(uwis))})
+
+
+def regrouped(*frames):
+    return [df["w_uwi"].tolist() for df in columnar.regroup_frames(iter(frames))]
+
+
+def test_regroup_frames_never_splits_a_well():
+    assert regrouped(frame("a", "a", "b"), frame("b", "c"), frame("c")) == [
+        ["a", "a"],
+        ["b", "b"],
+        ["c", "c"],
+    ]
+
+
+def test_regroup_frames_carries_single_well_frames():
+    assert regrouped(frame("a"), frame("a"), frame("a", "b")) == [
+        ["a", "a", "a"],
+        ["b"],
+    ]
+
+
+def test_regroup_frames_empty_and_unkeyed():
+    assert regrouped() == []
+    assert regrouped(frame(), frame("a"), frame()) == [["a"]]
+    unkeyed = pd.DataFrame({"n": [1, 2]})
+    batches = list(columnar.regroup_frames(iter([unkeyed, unkeyed.iloc[:0]])))
+    assert len(batches) == 1 and batches[0]["n"].tolist() == [1, 2]
+
+
+class OdbcError(Exception):
+    pass
+
+
+def test_open_arrow_reader_falls_back_to_dbn(monkeypatch):
+    tried = []
+
+    def read(query, connection_string, **kwargs):
+        tried.append(connection_string)
+        if "dbf=" in connection_string:
+            raise OdbcError("Database name not unique")
+        return "reader"
+
+    monkeypatch.setattr(columnar, "ArrowOdbcError", OdbcError)
+    monkeypatch.setattr(columnar, "read_arrow_batches_from_odbc", read)
+    conn = {"server": "GGX_ARROWTEST", "dbn": "r1", "dbf": "/p/r1/gxdb.db"}
+
+    assert columnar.open_arrow_reader(conn, "SELECT 1", 10) == "reader"
+    assert ["dbf=" in c for c in tried] == [True, False]
+    assert sqlanywhere.get_conn_strategy(conn)["variant"] == "dbn"
+
+    # the remembered variant goes first next time
+    tried.clear()
+    columnar.open_arrow_reader(conn, "SELECT 1", 10)
+    assert ["dbf=" in c for c in tried] == [False]
@@ -0,0 +1,65 @@
+import gzip
+import io
+
+import pytest
+
+from purr_geographix.assets.collect import compression
+from purr_geographix.assets.collect.compression import (
+    check_compression,
+    compressed_stream,
+    resolve_compression,
+)
+
+
+@pytest.fixture
+def defaults(monkeypatch):
+    """Set PURR_EXPORT_COMPRESSION(_LEVEL) as the module read them"""
+
+    def set_defaults(codec, level=None):
+        monkeypatch.setattr(compression, "EXPORT_COMPRESSION", codec)
+        monkeypatch.setattr(compression, "EXPORT_COMPRESSION_LEVEL", level)
+
+    return set_defaults
+
+
+def test_resolve_no_default(defaults):
+    defaults("none", "5")
+    assert resolve_compression() == (None, None)
+    assert resolve_compression("gzip") == ("gzip", None)
+    assert resolve_compression("none", 3) == (None, None)
+
+
+def test_resolve_default_codec_and_level(defaults):
+    defaults("gzip", "9")
+    assert resolve_compression() == ("gzip", 9)
+    assert resolve_compression(level=2) == ("gzip", 2)
+
+
+def test_resolve_default_codec_only_if_supported(defaults):
+    defaults("gzip", "9")
+    # i.e. arrow exports only support zstd
+    assert resolve_compression(codecs=("zstd",)) == (None, None)
+    assert resolve_compression("zstd", codecs=("zstd",)) == ("zstd", None)
+
+
+def test_resolve_default_level_not_for_requested_codec(defaults):
+    defaults("zstd", "19")
+    assert resolve_compression("gzip") == ("gzip", None)
+    assert resolve_compression("gzip", 4) == ("gzip", 4)
+    assert resolve_compression("zstd") == ("zstd", None)
+
+
+def test_check_compression():
+    check_compression(None, 99)
+    check_compression("gzip", 9)
+    with pytest.raises(ValueError):
+        check_compression("gzip", 19)
+    with pytest.raises(ValueError):
+        check_compression("lzma")
+
+
+def test_compressed_stream_gzip():
+    f = io.BytesIO()
+    with compressed_stream(f, "gzip", 1) as stream:
+        stream.write(b'{"a": 1}\n')
+    assert gzip.decompress(f.getvalue()) == b'{"a": 1}\n'
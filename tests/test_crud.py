@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import purr_geographix.core.models as models
+from purr_geographix.core.crud import (
+    claim_repo_counts,
+    release_repo_counts,
+    update_repo_counts,
+)
+
+
+def session():
+    """An in-memory SQLite session with one counts_approximate Repo"""
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.Repo(id="r1", name="r1", counts_approximate=True))
+    db.commit()
+    return db
+
+
+def test_claim_repo_counts_once():
+    db = session()
+    stale_before = datetime.now() - timedelta(hours=1)
+    assert claim_repo_counts(db, "r1", stale_before)
+    assert not claim_repo_counts(db, "r1", stale_before)
+    assert not claim_repo_counts(db, "missing", stale_before)
+
+
+def test_claim_repo_counts_takes_over_stale_claim():
+    db = session()
+    assert claim_repo_counts(db, "r1", datetime.now())
+    assert claim_repo_counts(db, "r1", datetime.now() + timedelta(seconds=1))
+
+
+def test_update_repo_counts_releases_claim():
+    db = session()
+    assert claim_repo_counts(db, "r1", datetime.now())
+    update_repo_counts(db, "r1", {"well_count": 3})
+    repo = db.get(models.Repo, "r1")
+    assert (repo.well_count, repo.counts_approximate) == (3, False)
+    assert repo.counts_claimed is None
+    assert not claim_repo_counts(db, "r1", datetime.now())
+
+
+def test_release_repo_counts_after_failed_recount():
+    db = session()
+    assert claim_repo_counts(db, "r1", datetime.now())
+    release_repo_counts(db, "r1")
+    repo = db.get(models.Repo, "r1")
+    assert repo.counts_claimed is None and repo.counts_approximate
+    assert claim_repo_counts(db, "r1", datetime.now() - timedelta(hours=1))
@@ -0,0 +1,165 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from tests.fixtures.chunks import chunks, load_chunk, wells
+
+handle_query = pytest.importorskip(
+    "purr_geographix.assets.collect.handle_query", exc_type=ImportError
+)
+
+GOLDEN = Path(__file__).parent / "golden"
+
+
+@pytest.mark.parametrize("asset", sorted(chunks))
+def test_transform_batch_matches_golden(asset):
+    df, column_types = load_chunk(asset)
+    docs = handle_query.transform_batch(
+        df, column_types, handle_query.load_recipe(asset)
+    )
+    golden = (GOLDEN / f"{asset}.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.dumps(doc, default=str) for doc in docs] == golden
+
+
+def test_transform_batch_empty():
+    df, column_types = load_chunk("survey")
+    recipe = handle_query.load_recipe("survey")
+    assert handle_query.transform_batch(df.iloc[:0], column_types, recipe) == []
+
+
+def uwi_range(sql):
+    """The (last_uwi, bound_uwi) of a keyset clause, None where absent"""
+    last = re.search(r"w_uwi > '([^']*)'", sql)
+    bound = re.search(r"w_uwi <= '([^']*)'", sql)
+    return last and last.group(1), bound and bound.group(1)
+
+
+class FakeCursor:
+    """Serves the rows of a chunk within the selector's w_uwi range"""
+
+    python_types = {
+        "int64": int,
+        "string": str,
+        "datetime64[ns]": datetime,
+        "float64": Decimal,
+    }
+
+    def __init__(self, asset, selectors):
+        self.column_types, self.rows = chunks[asset]
+        self.selectors = selectors
+        self.description = [
+            (col, self.python_types[t]) for col, t in self.column_types.items()
+        ]
+
+    def execute(self, sql):
+        self.selectors.append(sql)
+        last, bound = uwi_range(sql)
+        uwi_idx = list(self.column_types).index("w_uwi")
+        self.pending = [
+            row
+            for row in self.rows
+            if (last is None or row[uwi_idx] > last)
+            and (bound is None or row[uwi_idx] <= bound)
+        ]
+
+    def fetchmany(self, size):
+        batch, self.pending = self.pending[:size], self.pending[size:]
+        return batch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_iter_keyset_docs_bounds_each_page(monkeypatch):
+    asset = "survey"
+    selectors = []
+
+    def fake_db_stream(conn, sql):
+        last, _ = uwi_range(sql)
+        top = int(re.search(r"TOP (\d+)", sql).group(1))
+        page = [uwi for uwi in sorted(wells) if last is None or uwi > last][:top]
+        yield {"bound_uwi": page[-1] if page else None, "wells": len(page)}
+
+    @contextmanager
+    def fake_pooled_connection(conn):
+        class Connection:
+            def cursor(self):
+                return FakeCursor(asset, selectors)
+
+        yield Connection()
+
+    monkeypatch.setattr(handle_query, "db_stream", fake_db_stream)
+    monkeypatch.setattr(handle_query, "pooled_connection", fake_pooled_connection)
+
+    recipe = {**handle_query.load_recipe(asset), "keyset_page": 2}
+    docs = [
+        doc
+        for batch in handle_query.iter_keyset_docs({}, recipe, [], fetch_size=100)
+        for doc in batch
+    ]
+
+    # one selector per page of 2 wells, each on a closed w_uwi range
+    pages = [(None, "0500100002"), ("0500100002", "0500100004")]
+    assert [uwi_range(sql) for sql in selectors] == pages
+
+    expected = []
+    for last, bound in pages:
+        df, column_types = load_chunk(asset)
+        in_page = (df["w_uwi"] <= bound) & (last is None or df["w_uwi"] > last)
+        page = df[in_page].reset_index(drop=True)
+        expected += handle_query.transform_batch(page, column_types, recipe)
+    assert docs == expected
+    uwis = [doc["well"]["uwi"] for doc in docs]
+    assert uwis == ["0500100001", "0500100002", "0500100003"]
+
+
+def fake_stream_docs(produced, batches_per_chunk=5):
+    """stream_docs for create_selector's ids: one doc batch per step, and
+    produced counts the batches made so far
+    """
+
+    def stream_docs(conn_params, sel, recipe, fetch_size, stats):
+        stats.update({"seconds": 0.0, "rows": 0, "bytes": 0})
+        for i in range(batches_per_chunk):
+            produced.append(sel)
+            yield [{"chunk": sel, "batch": i}]
+
+    return stream_docs
+
+
+def test_iter_selector_docs_parallel_is_ordered_and_bounded(monkeypatch):
+    produced = []
+    monkeypatch.setattr(handle_query, "stream_docs", fake_stream_docs(produced))
+    monkeypatch.setattr(handle_query, "create_selector", lambda ids, recipe: ids[0])
+    monkeypatch.setattr(handle_query, "CHUNK_QUEUE_BATCHES", 1)
+    chunks = [[c] for c in "abcd"]
+
+    written = []
+    docs = handle_query.iter_selector_docs({}, chunks, {}, 10, workers=2)
+    for batch in docs:
+        written.extend(batch)
+        # each running chunk: its queue, plus one batch waiting to be put
+        assert len(produced) - len(written) <= 2 * (1 + 1)
+
+    sequential = handle_query.iter_selector_docs({}, chunks, {}, 10, workers=1)
+    assert written == [doc for batch in sequential for doc in batch]
+
+
+def test_iter_selector_docs_parallel_stops_early(monkeypatch):
+    produced = []
+    monkeypatch.setattr(
+        handle_query, "stream_docs", fake_stream_docs(produced, batches_per_chunk=100)
+    )
+    monkeypatch.setattr(handle_query, "create_selector", lambda ids, recipe: ids[0])
+    docs = handle_query.iter_selector_docs({}, [["a"], ["b"]], {}, 10, workers=2)
+    assert next(docs) == [{"chunk": "a", "batch": 0}]
+    docs.close()
+    assert len(produced) < 200
@@ -0,0 +1,89 @@
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+
+from purr_geographix.assets.collect.post_process import (
+    agg_prefixes,
+    flexible_agg,
+    post_process,
+)
+from purr_geographix.assets.collect.xformer import (
+    PURR_DELIM,
+    PURR_NULL,
+    column_formatters,
+    formatters,
+)
+
+
+def list_agg(df: pd.DataFrame, prefix_list: List[str]) -> pd.DataFrame:
+    """flexible_agg as it was before ragged.py: groupby(...).agg(list)"""
+    agg_columns = [c for c in df.columns if any(c.startswith(p) for p in prefix_list)]
+    agg_dict: Dict[str, Any] = {col: list for col in agg_columns}
+    for col in df.columns:
+        if col not in agg_columns and col != "w_uwi":
+            agg_dict[col] = "first"
+    return df.groupby("w_uwi", as_index=False).agg(agg_dict)
+
+
+def formatted_batch():
+    """One batch with a scalar and a LIST column per aggregated prefix, a
+    LIST column that is not aggregated and wells out of order
+    """
+    lists = {
+        "d_md": ["1.5" + PURR_DELIM + PURR_NULL, None, "3", "", "4" + PURR_DELIM + "5"],
+        "g_decimals": ["2", "2" + PURR_DELIM + "3", None, "x", "1"],
+    }
+    xforms = {"d_md": "array_of_float", "g_decimals": "array_of_int"}
+    df = pd.DataFrame(
+        {
+            "w_uwi": ["b", "a", "b", "c", "a"],
+            "w_name": [None, "A", "B", "C", None],
+            "s_id": ["S1", "S1", None, "S1", "S2"],
+            **lists,
+        }
+    )
+    return df, xforms
+
+
+@pytest.mark.parametrize("ragged_input", [True, False])
+def test_flexible_agg_matches_list_agg(ragged_input):
+    df, xforms = formatted_batch()
+    listed = df.copy()
+    for col, xform in xforms.items():
+        listed[col] = listed[col].apply(formatters[xform])
+    expected = list_agg(listed, ["s_", "d_"])
+
+    if ragged_input:
+        ragged = {col: column_formatters[x](df[col]) for col, x in xforms.items()}
+        df[list(xforms)] = None
+        grouped, ragged = flexible_agg(df, ["s_", "d_"], ragged=ragged)
+    else:
+        grouped, ragged = flexible_agg(listed, ["s_", "d_"])
+
+    for col, rows in ragged.items():
+        grouped[col] = rows.tolist()
+    assert grouped.columns.tolist() == expected.columns.tolist()
+    assert grouped.to_dict("list") == expected.to_dict("list")
+
+
+def test_flexible_agg_groups_ragged_rows():
+    df, xforms = formatted_batch()
+    ragged = {"d_md": column_formatters["array_of_float"](df["d_md"])}
+    df["d_md"] = None
+    grouped, ragged = flexible_agg(df, ["s_", "d_"], ragged=ragged)
+    assert grouped["w_uwi"].tolist() == ["a", "b", "c"]
+    assert ragged["d_md"].tolist() == [[[], [4.0, 5.0]], [[1.5, None], [3.0]], [[None]]]
+    assert ragged["s_id"].tolist() == [["S1", "S2"], ["S1", None], ["S1"]]
+    assert grouped["w_name"].tolist() == ["A", "B", "C"]
+
+
+def test_flexible_agg_empty():
+    df = pd.DataFrame({"w_uwi": [], "w_name": [], "s_id": []})
+    grouped, ragged = flexible_agg(df, ["s_"])
+    assert grouped.empty and grouped.columns.tolist() == ["w_uwi", "s_id", "w_name"]
+    assert ragged["s_id"].tolist() == []
+
+
+def test_post_processors_use_agg_prefixes():
+    assert set(post_process) == set(agg_prefixes)
@@ -0,0 +1,83 @@
+import numpy as np
+
+from purr_geographix.assets.collect.ragged import (
+    RaggedArray,
+    lengths_to_offsets,
+    masked_list,
+)
+
+
+def rows():
+    """[[1.0, None], [], [3.0], [4.0, 5.0, 6.0]] with a null mask"""
+    values = np.array([1.0, np.nan, 3.0, 4.0, 5.0, 6.0])
+    return RaggedArray.from_lengths(
+        values,
+        lengths=np.array([2, 1, 3]),
+        positions=np.array([0, 2, 3]),
+        size=4,
+        nulls=np.isnan(values),
+    )
+
+
+def test_lengths_to_offsets():
+    assert lengths_to_offsets(np.array([2, 0, 1])).tolist() == [0, 2, 2, 3]
+    assert lengths_to_offsets(np.array([], dtype=np.int64)).tolist() == [0]
+
+
+def test_masked_list():
+    values = np.array([1, 2, 3])
+    assert masked_list(values, None) == [1, 2, 3]
+    assert masked_list(values, np.array([False, True, False])) == [1, None, 3]
+
+
+def test_from_lengths_tolist():
+    ragged = rows()
+    assert len(ragged) == 4
+    assert ragged.tolist() == [[1.0, None], [], [3.0], [4.0, 5.0, 6.0]]
+
+
+def test_from_values():
+    ragged = RaggedArray.from_values(["a", None, "c"])
+    assert len(ragged) == 3
+    assert ragged.tolist() == ["a", None, "c"]
+
+
+def test_take_reorders_and_repeats():
+    taken = rows().take(np.array([3, 1, 0, 0]))
+    assert taken.tolist() == [[4.0, 5.0, 6.0], [], [1.0, None], [1.0, None]]
+    assert rows().take(np.array([], dtype=np.int64)).tolist() == []
+
+
+def test_take_plain_column_keeps_nulls():
+    plain = RaggedArray(np.array([1, 2, 3]), [], np.array([False, True, False]))
+    assert plain.take(np.array([2, 1])).tolist() == [3, None]
+
+
+def test_group():
+    grouped = rows().group(np.array([2, 0, 2]))
+    assert len(grouped) == 3
+    assert grouped.tolist() == [[[1.0, None], []], [], [[3.0], [4.0, 5.0, 6.0]]]
+
+
+def test_take_grouped():
+    grouped = rows().group(np.array([2, 0, 2]))
+    taken = grouped.take(np.array([2, 0]))
+    assert taken.tolist() == [[[3.0], [4.0, 5.0, 6.0]], [[1.0, None], []]]
+
+
+def test_all_null_and_empty():
+    values = np.array([None, None], dtype=object)
+    ragged = RaggedArray.from_lengths(
+        values, np.array([2]), np.array([1]), 2, np.array([True, True])
+    )
+    assert ragged.tolist() == [[], [None, None]]
+    empty = RaggedArray.from_lengths(
+        np.array([]), np.array([], dtype=np.int64), np.array([], dtype=np.int64), 2
+    )
+    assert empty.tolist() == [[], []]
+    assert empty.group(np.array([2])).tolist() == [[[], []]]
+
+
+def test_nbytes():
+    ragged = rows()
+    assert ragged.nbytes == 6 * 8 + 5 * 8 + 6
@@ -0,0 +1,75 @@
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+if sys.version_info < (3, 12):
+    pytest.skip("repo_db needs Python 3.12 f-strings", allow_module_level=True)
+
+repo_db = pytest.importorskip("purr_geographix.recon.repo_db", exc_type=ImportError)
+pyodbc = pytest.importorskip("pyodbc", exc_type=ImportError)
+
+
+class FakeCursor:
+    """Answers every statement with one row, except those that mention a
+    missing table
+    """
+
+    def __init__(self, missing=()):
+        self.missing = missing
+        self.executed = []
+
+    def execute(self, sql):
+        self.executed.append(sql)
+        if any(table in sql for table in self.missing):
+            raise pyodbc.Error(f"Table not found: {sql}")
+        self.rows = [("gxdb",)] if "db_name" in sql else [(7,)]
+
+    def fetchall(self):
+        return [] if "surface_longitude" in self.executed[-1] else self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def probe(monkeypatch, cursor, fast=False):
+    @contextmanager
+    def fake_pooled_connection(conn):
+        class Connection:
+            def cursor(self):
+                return cursor
+
+        yield Connection()
+
+    monkeypatch.setattr(repo_db, "pooled_connection", fake_pooled_connection)
+    repo_base = {"conn": {}, "fs_path": "/p/r1", "name": "r1", "conn_aux": {}}
+    return repo_db.probe_repo(repo_base, fast)
+
+
+def test_one_failing_count_keeps_the_others(monkeypatch):
+    cursor = FakeCursor(missing=("well_core",))
+    result = probe(monkeypatch, cursor)
+    assert result["wells_with_core"] is None
+    others = {k: v for k, v in result.items() if k in repo_db.COUNTER_SQL}
+    del others["wells_with_core"]
+    assert set(others.values()) == {7} and len(others) == 11
+    assert result["polygon"] is None and result["counts_approximate"] is False
+    assert "conn_aux" not in result
+
+
+def test_each_count_is_timed():
+    timings = {}
+
+    def timed(cursor, key, sql):
+        timings[key] = sql
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+    counts = repo_db.run_counts(
+        FakeCursor(missing=("well_zone_interval",)), repo_db.COUNTER_SQL, timed, ""
+    )
+    assert timings == repo_db.COUNTER_SQL
+    assert counts["wells_with_zone"] is None and counts["well_count"] == 7
@@ -0,0 +1,50 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from purr_geographix.core import tasks
+from tests.test_tasks import memory_sessions
+
+routes_assets = pytest.importorskip(
+    "purr_geographix.assets.collect.routes_assets", exc_type=ImportError
+)
+
+
+class FakeScheduler:
+    """Records submitted jobs instead of running them"""
+
+    queued = 0
+
+    def __init__(self):
+        self.submitted = []
+
+    def full(self):
+        return False
+
+    def submit(self, task_id, run, **kwargs):
+        self.submitted.append(task_id)
+        return len(self.submitted)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(tasks, "SessionLocal", memory_sessions())
+    monkeypatch.setattr(routes_assets, "task_store", tasks.SqliteTaskStore())
+    monkeypatch.setattr(routes_assets, "scheduler", FakeScheduler())
+    monkeypatch.setattr(routes_assets, "fetch_repo_ids", lambda db: ["r1"])
+    app = FastAPI()
+    app.include_router(routes_assets.router)
+    return TestClient(app)
+
+
+def test_identical_posts_share_a_task(client):
+    url = "/asset/r1/well?uwi_query=0500*&export_format=ndjson"
+    first = client.post(url)
+    second = client.post(url)
+    assert first.status_code == second.status_code == 202
+    assert first.json()["id"] == second.json()["id"]
+    assert routes_assets.scheduler.submitted == [first.json()["id"]]
+
+    other = client.post("/asset/r1/well?uwi_query=0500*")
+    assert other.json()["id"] != first.json()["id"]
+    assert len(routes_assets.scheduler.submitted) == 2
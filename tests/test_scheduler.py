@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from purr_geographix.core.scheduler import JobScheduler, QueueFull
+from purr_geographix.core.tasks import MemoryTaskStore
+
+
+def scheduler(max_workers=1, max_queue=10):
+    """A JobScheduler on a MemoryTaskStore, and that store"""
+    store = MemoryTaskStore()
+    return JobScheduler(max_workers, max_queue, store), store
+
+
+def submit(jobs, store, started, task_id, gate=None, **kwargs):
+    """Queue a job that appends its task_id to started, then waits for gate"""
+    store.create(task_id, "asset")
+
+    async def run():
+        started.append(task_id)
+        if gate is not None:
+            await gate.wait()
+
+    return jobs.submit(task_id, run, **kwargs)
+
+
+def test_priority_order():
+    async def main():
+        jobs, store = scheduler()
+        started = []
+        gate = asyncio.Event()
+        assert submit(jobs, store, started, "blocker", gate) == 0
+        submit(jobs, store, started, "low", priority="low")
+        submit(jobs, store, started, "normal", priority="normal")
+        submit(jobs, store, started, "high", priority="high")
+        assert [job.task_id for job in jobs.order()] == ["high", "normal", "low"]
+        assert [store.get(t)["queue_position"] for t in ("high", "low")] == [1, 3]
+
+        gate.set()
+        while jobs.running or jobs.queued:
+            await asyncio.sleep(0)
+        assert started == ["blocker", "high", "normal", "low"]
+
+    asyncio.run(main())
+
+
+def test_round_robin_repos_and_users():
+    async def main():
+        jobs, store = scheduler()
+        started = []
+        submit(jobs, store, started, "blocker", asyncio.Event())
+        submit(jobs, store, started, "r1-u1-a", repo="r1", user="u1")
+        submit(jobs, store, started, "r1-u1-b", repo="r1", user="u1")
+        submit(jobs, store, started, "r1-u2", repo="r1", user="u2")
+        submit(jobs, store, started, "r2-u1", repo="r2", user="u1")
+        assert [job.task_id for job in jobs.order()] == [
+            "r1-u1-a",
+            "r2-u1",
+            "r1-u2",
+            "r1-u1-b",
+        ]
+
+    asyncio.run(main())
+
+
+def test_queue_full():
+    async def main():
+        jobs, store = scheduler(max_queue=1)
+        started = []
+        submit(jobs, store, started, "blocker", asyncio.Event())
+        assert submit(jobs, store, started, "queued") == 1
+        assert jobs.full()
+        with pytest.raises(QueueFull):
+            submit(jobs, store, started, "rejected")
+        assert jobs.queued == 1
+
+    asyncio.run(main())
+
+
+def test_failing_on_done_does_not_stall_the_queue():
+    async def main():
+        jobs, store = scheduler()
+        started = []
+
+        def on_done():
+            raise RuntimeError("boom")
+
+        submit(jobs, store, started, "first", on_done=on_done)
+        submit(jobs, store, started, "second")
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert started == ["first", "second"]
+        assert not jobs.running and not jobs.queued
+
+    asyncio.run(main())
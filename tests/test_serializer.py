@@ -0,0 +1,83 @@
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from purr_geographix.assets.collect.serializer import JsonSerializer, get_serializer
+from purr_geographix.assets.collect.writers import JsonArrayWriter, NdjsonWriter
+
+GOLDEN = Path(__file__).parent / "golden" / "serializer.ndjson"
+
+
+def serializer_docs():
+    """Docs with the values transform_batch can leave in them"""
+    return [
+        {
+            "well": {
+                "uwi": "0500100001",
+                "wsn": np.int64(7),
+                "depth": np.float64(1520.5),
+                "nan": float("nan"),
+                "inf": float("inf"),
+                "na": pd.NA,
+                "none": None,
+                "active": np.bool_(True),
+                "flag": False,
+                "changed": pd.Timestamp("2021-03-04 05:06:07"),
+                "spud": datetime(2020, 1, 2, 3, 4, 5),
+                "volume": Decimal("12.50"),
+                "name": "Café “A” \U0001f6e2",
+                "quote": 'say "hi"\\\n\t',
+            },
+            "survey": {"md": [[0.0, None, 1e-07], []], "ids": ["S1", None]},
+        },
+        {},
+        {"well": {"uwi": "0500100002", "curve": np.array([1.0, 2.0]).tolist()}},
+    ]
+
+
+def golden_lines():
+    """json.dumps(doc, default=str) of each doc, as exported since v0.1"""
+    return GOLDEN.read_bytes().splitlines()
+
+
+def test_golden_is_legacy_json_dumps():
+    legacy = [json.dumps(doc, default=str).encode() for doc in serializer_docs()]
+    assert legacy == golden_lines()
+
+
+def test_json_serializer_matches_golden():
+    serializer = JsonSerializer()
+    docs = serializer_docs()
+    assert serializer.encode_batch(docs) == b",".join(golden_lines())
+    assert serializer.encode_batch(docs, sep=b"\n") == b"\n".join(golden_lines())
+    assert serializer.encode_batch([]) == b""
+
+
+def test_default_engine_is_json():
+    assert isinstance(get_serializer("json"), JsonSerializer)
+    assert isinstance(get_serializer("unknown"), JsonSerializer)
+
+
+def test_writers_match_golden():
+    docs = serializer_docs()
+    lines = golden_lines()
+
+    f = io.BytesIO()
+    writer = JsonArrayWriter(f, JsonSerializer())
+    for batch in (docs[:1], [], docs[1:]):
+        writer.write_batch(batch)
+    writer.close()
+    assert f.getvalue() == b"[" + b",".join(lines) + b"]"
+    assert writer.docs_written == len(docs)
+
+    f = io.BytesIO()
+    writer = NdjsonWriter(f, JsonSerializer())
+    writer.write_batch(docs[:2])
+    writer.write_batch(docs[2:])
+    writer.close()
+    assert f.getvalue() == b"".join(line + b"\n" for line in lines)
@@ -0,0 +1,24 @@
+import pytest
+
+sql_helper = pytest.importorskip(
+    "purr_geographix.assets.collect.sql_helper", exc_type=ImportError
+)
+
+
+def test_make_keyset_clause():
+    clause = sql_helper.make_keyset_clause(["05%"], "O'1", "w_uwi IN (x)", "O'9")
+    assert clause == (
+        "WHERE 1=1 AND (w_uwi LIKE '05%') AND w_uwi IN (x)"
+        " AND w_uwi > 'O''1' AND w_uwi <= 'O''9' ORDER BY w_uwi"
+    )
+    assert sql_helper.make_keyset_clause([], None) == "WHERE 1=1 ORDER BY w_uwi"
+
+
+def test_make_keyset_bound():
+    sql = sql_helper.make_keyset_bound(["05%"], "0500100002", 500)
+    assert sql == (
+        "SELECT MAX(w_uwi) AS bound_uwi, COUNT(*) AS wells FROM ("
+        "SELECT TOP 500 w_uwi FROM (SELECT uwi AS w_uwi FROM well) wells "
+        "WHERE 1=1 AND (w_uwi LIKE '05%') AND w_uwi > '0500100002' ORDER BY w_uwi"
+        ") page"
+    )
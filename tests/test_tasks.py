@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import purr_geographix.core.models as models
+from purr_geographix.core import tasks
+from purr_geographix.core.schemas import TaskStatus
+
+
+def memory_sessions():
+    """A sessionmaker on one shared in-memory SQLite database"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, monkeypatch):
+    """Each TaskStore, the sqlite one on an in-memory database"""
+    monkeypatch.setattr(tasks, "SessionLocal", memory_sessions())
+    return tasks.get_task_store(request.param)
+
+
+def test_create_attaches_to_unfinished_job(store):
+    first = store.create("t1", "asset", job_key="k", repo_id="r1")
+    assert first["id"] == "t1" and first["repo_id"] == "r1"
+    assert store.create("t2", "asset", job_key="k")["id"] == "t1"
+    assert store.get("t2") is None
+
+    store.start("t1")
+    assert store.create("t3", "asset", job_key="k")["id"] == "t1"
+
+
+def test_create_after_job_finished(store):
+    store.create("t1", "asset", job_key="k")
+    store.finish("t1", TaskStatus.FAILED, "boom")
+    assert store.create("t2", "asset", job_key="k")["id"] == "t2"
+    assert store.create("t3", "asset", job_key="other")["id"] == "t3"
+
+
+def test_create_without_job_key(store):
+    assert store.create("t1", "recon")["id"] == "t1"
+    assert store.create("t2", "recon")["id"] == "t2"
+
+
+def test_set_queue_positions(store):
+    store.create("t1", "asset")
+    store.create("t2", "asset")
+    store.set_queue_positions({"t1": 2, "t2": 1})
+    assert [store.get(t)["queue_position"] for t in ("t1", "t2")] == [2, 1]
+    store.set_queue_positions({})
+    # a task purged meanwhile is skipped
+    store.set_queue_positions({"t1": 1, "gone": 2})
+    assert store.get("t1")["queue_position"] == 1
+
+
+def test_purge_expired(store, monkeypatch):
+    store.create("t1", "asset")
+    store.finish("t1", TaskStatus.COMPLETED, "done")
+    assert store.purge() == 0 and store.get("t1") is not None
+    # everything finished (or last updated) before now + 60s has expired
+    monkeypatch.setattr(tasks, "TASK_TTL", -60)
+    assert store.purge() == 1
+    assert store.get("t1") is None
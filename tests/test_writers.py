@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from purr_geographix.assets.collect.serializer import JsonSerializer
+from purr_geographix.assets.collect.writers import ArrowWriter, DocWriter, writers
+
+
+def test_doc_writer_is_abstract():
+    with pytest.raises(TypeError):
+        DocWriter(io.BytesIO(), JsonSerializer())
+
+    class NoWriteBatch(DocWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWriteBatch(io.BytesIO(), JsonSerializer())
+
+
+@pytest.mark.parametrize("export_format", ["json", "ndjson"])
+def test_json_writers_are_concrete(export_format):
+    f = io.BytesIO()
+    writer = writers[export_format](f, JsonSerializer())
+    writer.write_batch([{"well": {"uwi": "a"}}])
+    writer.close()
+    assert writer.docs_written == 1
+
+
+def test_arrow_writer_is_abstract():
+    pa = pytest.importorskip("pyarrow")
+
+    class NoTableWriter(ArrowWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        NoTableWriter(io.BytesIO(), None, pa.schema([]))
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_arrow_writers_are_concrete(export_format):
+    pa = pytest.importorskip("pyarrow")
+    schema = pa.schema([pa.field("well", pa.struct([("uwi", pa.string())]))])
+    f = io.BytesIO()
+    writer = writers[export_format](f, None, schema)
+    writer.write_batch([{"well": {"uwi": "a"}}])
+    writer.close()
+    assert writer.docs_written == 1
@@ -0,0 +1,208 @@
+import json
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from purr_geographix.assets.collect.xformer import (
+    PURR_DELIM,
+    PURR_NULL,
+    column_formatters,
+    column_plan,
+    decode_datetimes,
+    formatters,
+    standardize_df_columns,
+    transform_dataframe_to_json,
+)
+from tests.fixtures.chunks import chunks, load_chunk, standardize_cases
+
+
+def delimited(*cells):
+    """A LIST(...) column: one PURR_DELIM string per cell, None for no rows"""
+    return pd.Series(
+        [None if cell is None else PURR_DELIM.join(cell) for cell in cells],
+        dtype=object,
+    )
+
+
+# one column per array_of_* formatter: PURR_NULL, empty strings, whitespace
+# and values the vectorized cast can't handle (so it falls back per value)
+decoder_cases = {
+    "array_of_int": delimited(
+        ["1", "-2", PURR_NULL, "", " 3 "],
+        None,
+        ["1_000", "x", "1.5"],
+        [PURR_NULL],
+        [""],
+    ),
+    "array_of_bool": delimited(
+        ["true", "False", PURR_NULL, "", " TRUE "],
+        None,
+        ["1", "yes", PURR_NULL],
+    ),
+    "array_of_float": delimited(
+        ["1.5", "-2", PURR_NULL, "", " 3e2 "],
+        None,
+        ["1_000", "2"],
+        ["1_000", "x", "nan", "inf"],
+    ),
+    "array_of_string": delimited(
+        [" a ", "b\x01c", PURR_NULL, "", "cafÃ©"],
+        None,
+        ["a", "a", "a"],
+    ),
+    "array_of_datetime": delimited(
+        ["2020-01-01 10:00:00.500", PURR_NULL, "", "2020-01-02"],
+        None,
+        ["2020-01-01 00:00:00+01:00", "2020-01-02 00:00:00+02:00"],
+        ["2020-01-01 00:00:00+01:00", "2020-01-02 00:00:00"],
+        ["not a date", "2020-02-30"],
+    ),
+}
+
+
+@pytest.mark.parametrize("xform", sorted(decoder_cases))
+def test_column_formatter_matches_per_cell(xform):
+    series = decoder_cases[xform]
+    expected = series.apply(formatters[xform]).tolist()
+    assert column_formatters[xform](series).tolist() == expected
+
+
+@pytest.mark.parametrize("xform", sorted(column_formatters))
+def test_column_formatter_all_null(xform):
+    series = delimited(None, None)
+    assert column_formatters[xform](series).tolist() == [[], []]
+
+
+def test_decode_datetimes_mixed_offsets():
+    flat = np.array(
+        ["2020-01-01 00:00:00+01:00", "2020-01-02 00:00:00+02:00"], dtype=object
+    )
+    values, nulls = decode_datetimes(flat)
+    assert values.tolist() == ["2020-01-01 00:00:00", "2020-01-02 00:00:00"]
+    assert not nulls.any()
+
+
+@pytest.mark.parametrize("case", ["mixed", "empty"])
+def test_standardize_matches_legacy(case):
+    benchmark = pytest.importorskip(
+        "purr_geographix.assets.collect.benchmark", exc_type=ImportError
+    )
+    df, column_types = standardize_cases()[case]
+    expected = benchmark.legacy_standardize_df_columns(df.copy(), column_types)
+    result = standardize_df_columns(df.copy(), column_types)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("asset", sorted(chunks))
+def test_standardize_chunk_matches_legacy(asset):
+    benchmark = pytest.importorskip(
+        "purr_geographix.assets.collect.benchmark", exc_type=ImportError
+    )
+    df, column_types = load_chunk(asset)
+    expected = benchmark.legacy_standardize_df_columns(df.copy(), column_types)
+    pd.testing.assert_frame_equal(standardize_df_columns(df, column_types), expected)
+
+
+def test_standardize_nullable_dtypes():
+    df, column_types = standardize_cases()["mixed"]
+    df = standardize_df_columns(df, column_types)
+    assert df["nullable_ints"].tolist() == [1, pd.NA, 3]
+    assert df["none_ints"].isna().all() and df["none_ints"].dtype == "Int64"
+    assert df["none_strings"].dtype == "string"
+    assert df["dates"].tolist()[0] == pd.Timestamp("2020-01-01 00:00:00")
+    assert df["none_dates"].isna().all()
+    assert df["decimals"].tolist()[::2] == [1.25, -7.0]
+
+
+def series_row_to_json(row: pd.Series, prefix_mapping: Dict[str, str]):
+    """The per-row doc builder transform_dataframe_to_json replaced (as it was
+    before column_plan), kept as the reference output
+    """
+    result: Dict[str, Dict[str, Any]] = {}
+    for column, value in row.items():
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+
+        # Handle list of numpy arrays
+        elif isinstance(value, list):
+            value = [
+                item.tolist() if isinstance(item, np.ndarray) else item
+                for item in value
+            ]
+
+        elif not isinstance(value, list):
+            if pd.isna(value):
+                value = None
+
+        for prefix, table_name in prefix_mapping.items():
+            if column.startswith(prefix):
+                if table_name not in result:
+                    result[table_name] = {}
+                result[table_name][column[len(prefix) :]] = value
+                break
+    return result
+
+
+prefixes = {"w_": "well", "c_": "curve", "cv_": "curve_view", "s_": "survey"}
+
+
+def planned_batch():
+    """A post-processed batch: scalars with NaN/<NA>/NaT, a nested column with
+    arrays and lists of arrays, a ragged column and an unprefixed column
+    """
+    df = pd.DataFrame(
+        {
+            "w_uwi": ["a", "b", "c"],
+            "w_depth": [1.5, np.nan, 3.0],
+            "w_wsn": pd.array([1, None, 3], dtype="Int64"),
+            "w_date": pd.to_datetime(["2020-01-01", None, "2020-01-03"]),
+            "c_values": [np.array([1.0, 2.0]), [np.array([3.0])], []],
+            "cv_name": ["x", None, "z"],
+            "s_md": None,
+            "id_skipped": [1, 2, 3],
+        }
+    )
+    ragged = {"s_md": column_formatters["array_of_float"](delimited(["1"], None, []))}
+    return df, ragged
+
+
+def test_column_plan():
+    columns = ("w_uwi", "c_values", "cv_name", "s_md", "id_skipped")
+    plan = column_plan(
+        columns, tuple(prefixes.items()), frozenset({"c_values"}), frozenset({"s_md"})
+    )
+    assert [tuple(p) for p in plan] == [
+        ("w_uwi", "well", "uwi", "scalar"),
+        ("c_values", "curve", "values", "nested"),
+        ("cv_name", "curve_view", "name", "scalar"),
+        ("s_md", "survey", "md", "ragged"),
+    ]
+
+
+def test_transform_dataframe_to_json_matches_series_row_to_json():
+    df, ragged = planned_batch()
+    docs = transform_dataframe_to_json(df, prefixes, ragged, frozenset({"c_values"}))
+
+    listed = df.copy()
+    listed["s_md"] = ragged["s_md"].tolist()
+    expected = [series_row_to_json(row, prefixes) for _, row in listed.iterrows()]
+    assert json.dumps(docs, default=str) == json.dumps(expected, default=str)
+
+
+def test_transform_dataframe_to_json_golden():
+    df, ragged = planned_batch()
+    docs = transform_dataframe_to_json(df, prefixes, ragged, frozenset({"c_values"}))
+    assert docs[1] == {
+        "well": {"uwi": "b", "depth": None, "wsn": None, "date": None},
+        "curve": {"values": [[3.0]]},
+        "curve_view": {"name": None},
+        "survey": {"md": []},
+    }
+    assert json.dumps(docs[0], default=str) == (
+        '{"well": {"uwi": "a", "depth": 1.5, "wsn": 1, "date": "2020-01-01 00:00:00"}'
+        ', "curve": {"values": [1.0, 2.0]}, "curve_view": {"name": "x"}'
+        ', "survey": {"md": [1.0]}}'
+    )
+    assert transform_dataframe_to_json(df[["id_skipped"]], prefixes) == [{}, {}, {}]